@@ -0,0 +1,338 @@
+"""
+Implicit-feedback matrix factorization (ALS, Hu/Koren/Volinsky 2008).
+
+Trains user and item factors on the view/saved weights of the interactions
+table (confidence = 1 + ALPHA * weight) in a separate process, so the web
+worker never blocks on training:
+
+    python als_model.py train            # warm-starts from the previous artifact
+    python als_model.py train --cold     # ignore the previous artifact
+
+The artifact is a single uncompressed .npz (float32 factors plus id arrays)
+written to a temp file and moved into place with os.replace, so readers only
+ever see a complete model. Training holds an flock on train.lock in the artifact
+directory, so only one run happens at a time across workers and restarts, and
+the scheduler skips the spawn while meta.json's trained_at is newer than
+ALS_TRAIN_INTERVAL. Serving is one dot product plus argpartition:
+
+    model = get_als_model()
+    if model is not None:
+        ids = model.recommend(user_id, 10, exclude_ids=seen_ids)
+"""
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+ARTIFACT_DIR = os.getenv(
+    "ALS_ARTIFACT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts", "als")
+)
+MODEL_FILE = "model.npz"
+META_FILE = "meta.json"
+LOCK_FILE = "train.lock"
+# Minimum age of the current model before the scheduler trains a new one
+TRAIN_INTERVAL_SECONDS = int(os.getenv("ALS_TRAIN_INTERVAL", 3 * 60 * 60))
+
+FACTORS = int(os.getenv("ALS_FACTORS", 32))
+REGULARIZATION = float(os.getenv("ALS_REGULARIZATION", 0.1))
+ALPHA = float(os.getenv("ALS_ALPHA", 20.0))
+ITERATIONS = int(os.getenv("ALS_ITERATIONS", 15))
+WARM_ITERATIONS = int(os.getenv("ALS_WARM_ITERATIONS", 4))
+# How often a serving process checks the artifact for a newer model
+RELOAD_SECONDS = int(os.getenv("ALS_RELOAD_SECONDS", 60))
+
+
+# --- training -----------------------------------------------------------------
+
+def load_training_matrix():
+    """
+    (matrix, user_ids, listing_ids) from the interactions table, using the same
+    view/saved weights as load_datasets and the recommender state.
+    """
+    from sqlalchemy import create_engine
+
+    from helpers import INTERACTION_DTYPES, interactions_query, read_sql_frame
+    from settings import settings
+
+    engine = create_engine(settings.SUPABASE_SQLALCHEMY_DATABASE_URI)
+    with engine.connect() as conn:
+        df = read_sql_frame(interactions_query(), dtype=INTERACTION_DTYPES, connection=conn)
+    engine.dispose()
+
+    # The SQL codes are the weights
+    weights = df["interaction_type"].to_numpy(dtype=np.float32)
+    user_ids, rows = np.unique(df["user_id"].to_numpy(dtype=np.int64), return_inverse=True)
+    listing_ids, cols = np.unique(df["listing_id"].to_numpy(dtype=np.int64), return_inverse=True)
+    matrix = csr_matrix((weights, (rows, cols)), shape=(len(user_ids), len(listing_ids)), dtype=np.float32)
+    matrix.sum_duplicates()
+    return matrix, user_ids, listing_ids
+
+
+def _init_factors(ids, previous_ids, previous_factors, rng):
+    """Random small factors, reusing the previous model's rows for known ids (warm start)."""
+    factors = (rng.standard_normal((len(ids), FACTORS)) * 0.01).astype(np.float32)
+    if previous_factors is not None and len(previous_ids) and previous_factors.shape[1] == FACTORS:
+        pos = np.searchsorted(previous_ids, ids)
+        pos[pos == len(previous_ids)] = 0
+        known = previous_ids[pos] == ids
+        factors[known] = previous_factors[pos[known]]
+    return factors
+
+
+def _solve(confidence, fixed, regularization):
+    """
+    One ALS half-step: solve every row of `confidence` (CSR, raw weights) against
+    the fixed factor matrix.
+    """
+    n_factors = fixed.shape[1]
+    fixed64 = fixed.astype(np.float64)
+    gram = fixed64.T @ fixed64 + regularization * np.eye(n_factors)
+    out = np.zeros((confidence.shape[0], n_factors), dtype=np.float32)
+    indptr, indices, data = confidence.indptr, confidence.indices, confidence.data
+    for row in range(confidence.shape[0]):
+        start, stop = indptr[row], indptr[row + 1]
+        if start == stop:
+            continue
+        factors = fixed64[indices[start:stop]]
+        conf = 1.0 + ALPHA * data[start:stop].astype(np.float64)
+        # (Y^T C Y + lambda I) x = Y^T C p, with p = 1 on observed items
+        a = gram + (factors.T * (conf - 1.0)) @ factors
+        b = factors.T @ conf
+        out[row] = np.linalg.solve(a, b)
+    return out
+
+
+def train(matrix, user_ids, listing_ids, previous=None, iterations=None, seed=42):
+    """
+    Fit ALS factors.
+
+    Args:
+        matrix (csr_matrix): users x listings interaction weights.
+        previous (ALSModel): Earlier model used for warm starts, or None.
+        iterations (int): Defaults to WARM_ITERATIONS with a previous model, else ITERATIONS.
+
+    Returns:
+        (user_factors, item_factors) as float32 arrays.
+    """
+    rng = np.random.default_rng(seed)
+    item_factors = _init_factors(
+        listing_ids,
+        previous.listing_ids if previous else [],
+        previous.item_factors if previous else None,
+        rng
+    )
+    user_factors = np.zeros((len(user_ids), FACTORS), dtype=np.float32)
+    if iterations is None:
+        iterations = WARM_ITERATIONS if previous else ITERATIONS
+
+    item_matrix = matrix.T.tocsr()
+    for _ in range(iterations):
+        user_factors = _solve(matrix, item_factors, REGULARIZATION)
+        item_factors = _solve(item_matrix, user_factors, REGULARIZATION)
+    return user_factors, item_factors
+
+
+def save_model(user_factors, item_factors, user_ids, listing_ids, artifact_dir=ARTIFACT_DIR, meta=None):
+    """Write the artifact atomically (temp file + os.replace)."""
+    os.makedirs(artifact_dir, exist_ok=True)
+    path = os.path.join(artifact_dir, MODEL_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            user_factors=user_factors.astype(np.float32),
+            item_factors=item_factors.astype(np.float32),
+            user_ids=np.asarray(user_ids, dtype=np.int64),
+            listing_ids=np.asarray(listing_ids, dtype=np.int64)
+        )
+    os.replace(tmp_path, path)
+
+    meta_path = os.path.join(artifact_dir, META_FILE)
+    with open(f"{meta_path}.tmp", "w") as f:
+        json.dump(meta or {}, f)
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+
+def _lock_training(artifact_dir):
+    """Open and exclusively lock the training lock file (None when another process holds it)."""
+    os.makedirs(artifact_dir, exist_ok=True)
+    lock = open(os.path.join(artifact_dir, LOCK_FILE), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return None
+    return lock
+
+
+def read_meta(artifact_dir=ARTIFACT_DIR):
+    try:
+        with open(os.path.join(artifact_dir, META_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def training_due(artifact_dir=ARTIFACT_DIR, interval=TRAIN_INTERVAL_SECONDS):
+    """Whether the saved model is missing or older than `interval` seconds."""
+    trained_at = read_meta(artifact_dir).get("trained_at")
+    return trained_at is None or time.time() - trained_at >= interval
+
+
+def run_training(cold=False, artifact_dir=ARTIFACT_DIR):
+    """
+    Load interactions, train (warm-started unless cold) and save.
+
+    Returns:
+        dict: The meta dict (None when another process is already training).
+    """
+    lock = _lock_training(artifact_dir)
+    if lock is None:
+        print("ALS training already running in another process, skipping")
+        return None
+    with lock:
+        return _train_and_save(cold, artifact_dir)
+
+
+def _train_and_save(cold, artifact_dir):
+    started = time.time()
+    matrix, user_ids, listing_ids = load_training_matrix()
+    previous = None if cold else ALSModel.load(artifact_dir)
+    user_factors, item_factors = train(matrix, user_ids, listing_ids, previous=previous)
+    meta = {
+        "trained_at": int(time.time()),
+        "users": int(len(user_ids)),
+        "listings": int(len(listing_ids)),
+        "interactions": int(matrix.nnz),
+        "factors": FACTORS,
+        "warm_start": previous is not None,
+        "seconds": round(time.time() - started, 1)
+    }
+    save_model(user_factors, item_factors, user_ids, listing_ids, artifact_dir, meta)
+    print(f"ALS model trained: {meta}")
+    return meta
+
+
+_training_process = None
+
+
+def start_background_training(cold=False, force=False, artifact_dir=ARTIFACT_DIR):
+    """
+    Spawn `python als_model.py train` when the model is due (see training_due) and
+    no training is running in any process. The child takes the lock itself;
+    probing it here only avoids spawning a process that would exit immediately.
+
+    Args:
+        force (bool): Train even when the current model is newer than the interval.
+
+    Returns:
+        bool: True when a new training process was started.
+    """
+    global _training_process
+    if _training_process is not None and _training_process.poll() is None:
+        print("ALS training still running, skipping")
+        return False
+    if not force and not training_due(artifact_dir):
+        return False
+    lock = _lock_training(artifact_dir)
+    if lock is None:
+        print("ALS training running in another process, skipping")
+        return False
+    lock.close()
+    args = [sys.executable, os.path.abspath(__file__), "train"]
+    if cold:
+        args.append("--cold")
+    _training_process = subprocess.Popen(args, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return True
+
+
+# --- serving ------------------------------------------------------------------
+
+class ALSModel:
+    """Trained factors with id -> row maps."""
+
+    def __init__(self, user_factors, item_factors, user_ids, listing_ids, mtime=0.0):
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        self.user_ids = user_ids
+        self.listing_ids = listing_ids
+        self.user_index = {int(uid): i for i, uid in enumerate(user_ids)}
+        self.listing_index = {int(lid): i for i, lid in enumerate(listing_ids)}
+        self.mtime = mtime
+
+    @classmethod
+    def load(cls, artifact_dir=ARTIFACT_DIR):
+        """Model from the artifact directory, or None when there is none yet."""
+        path = os.path.join(artifact_dir, MODEL_FILE)
+        if not os.path.exists(path):
+            return None
+        mtime = os.path.getmtime(path)
+        with np.load(path) as data:
+            return cls(
+                data["user_factors"], data["item_factors"],
+                data["user_ids"], data["listing_ids"], mtime
+            )
+
+    def recommend(self, user_id, n=10, exclude_ids=None):
+        """
+        Top-n listing ids for a user by predicted preference.
+
+        Args:
+            exclude_ids (iterable): Listing ids to leave out (e.g. already seen).
+
+        Returns:
+            list: Listing ids, best first; empty when the user is not in the model.
+        """
+        row = self.user_index.get(user_id)
+        if row is None or not len(self.listing_ids):
+            return []
+        scores = self.item_factors @ self.user_factors[row]
+        if exclude_ids:
+            cols = [self.listing_index[i] for i in exclude_ids if i in self.listing_index]
+            scores[cols] = -np.inf
+        k = min(n, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [int(self.listing_ids[i]) for i in top if np.isfinite(scores[i])]
+
+
+_model = None
+_model_checked = 0.0
+_model_lock = threading.Lock()
+
+
+def get_als_model(artifact_dir=ARTIFACT_DIR):
+    """
+    The latest trained model of this process (None until one exists).
+
+    Checks the artifact's mtime at most every RELOAD_SECONDS and reloads when
+    the background trainer has replaced it.
+    """
+    global _model, _model_checked
+    now = time.time()
+    if now - _model_checked < RELOAD_SECONDS:
+        return _model
+    with _model_lock:
+        if now - _model_checked < RELOAD_SECONDS:
+            return _model
+        _model_checked = now
+        path = os.path.join(artifact_dir, MODEL_FILE)
+        try:
+            if os.path.exists(path) and (_model is None or os.path.getmtime(path) != _model.mtime):
+                _model = ALSModel.load(artifact_dir)
+        except Exception as e:
+            print(f"ALS model load error: {e}")
+    return _model
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "train":
+        run_training(cold="--cold" in sys.argv)
+    else:
+        print("Usage: python als_model.py train [--cold]")
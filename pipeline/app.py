@@ -1,7 +1,8 @@
 from flask import Flask, request, render_template, redirect, url_for, flash, session, jsonify, make_response, send_from_directory, g
 from flask_cors import CORS, cross_origin
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func, case, distinct
+from sqlalchemy import func, case, distinct, and_, or_
+from sqlalchemy.orm import load_only
 from langchain_core.messages import HumanMessage
 from supabase_models import db, Agent, User, Listing, Interaction, Reel, CommunityPost, CommunityComment, CommunityLike, CommunityCommentLike, PropertyApplication, ViewingBooking, Unit, Admin, upsert_admin_from_onboarding, update_admin_last_login
 import os
@@ -12,17 +13,50 @@ import os
 import json
 import subprocess
 import mimetypes
+import hashlib
 import random
 import traceback
 from datetime import datetime, timedelta, timezone
 from recommender import Recommender
+from listing_neighbors import refresh_listing_neighbors
+from feature_store import publish_recommender_store
+from als_model import start_background_training
+from recommendation_jobs import (
+    get_recommended_ids, invalidate_user_recs, refresh_user_recommendations,
+    refresh_user_recommendations_if_due, popular_ids
+)
+from recommender_state import get_recommender_state, FULL_REBUILD_SECONDS
+from trending import record_interaction, get_trending_ids, rescale_trending, TRENDING_RESCALE_HOURS
+from user_profiles import get_profile, top_values, update_profile, interaction_time
+from reels_feed import global_reels, personalized_reels_for, refresh_listing_reels, refresh_reels_index
 from helpers import clear_user_memory
 from settings import settings
 import nest_asyncio
 import asyncio
 from sqlalchemy import create_engine
-from collections import Counter
+from collections import defaultdict
 from email_service import email_service
+from listing_serializer import (
+    eager_listing_options,
+    load_listings,
+    parse_image_paths,
+    parse_tags,
+    serialize_agent,
+    range_displays,
+    price_range_display,
+    serialize_listing_card,
+    serialize_listing_cards,
+    requested_fields,
+    wants,
+    serialize_listing_detail,
+    CARD_FIELDS,
+    VIEWS
+)
+from compression import init_compression
+from json_provider import FastJSONProvider
+from listing_fragments import get_listing_fragments, get_listing_detail_fragments, get_cached_ids, cache_ids
+from listing_stats import get_view_counts
+from pagination import page_size, paginate_keyset
 from redis_helper import (
     cache_response, 
     invalidate_cache_pattern, 
@@ -32,7 +66,9 @@ from redis_helper import (
     invalidate_all_agent_caches,
     invalidate_cache_by_prefix,
     get_cache_stats, 
-    clear_all_cache
+    clear_all_cache,
+    is_redis_available,
+    redis_client
 )
 from functools import wraps
 from jose import jwt
@@ -81,6 +117,8 @@ def require_supabase_authenticated(f):
 # Initialize Flask app
 def create_app():
     app = Flask(__name__)
+    # orjson-backed encoder for every jsonify() (shared with the Redis response cache)
+    app.json = FastJSONProvider(app)
     CORS(app, supports_credentials=True, resources={r"/*": {"origins": settings.cors_origins}})
     app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URI
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -90,6 +128,9 @@ def create_app():
     app.config['SESSION_COOKIE_SAMESITE'] = "Lax"  # Allow cross-origin requests in development
     app.config['SESSION_COOKIE_DOMAIN'] = None  # Let Flask handle it
     app.secret_key = settings.APP_SECRET_KEY
+
+    # gzip/brotli for large text/JSON responses (see compression.py for settings)
+    init_compression(app)
   
 
     # Initialize SQLAlchemy
@@ -115,6 +156,15 @@ def create_app():
     def index():
         return 'Welcome to Casalinger API'
 
+    # Upper bound on ids accepted by the batch listing endpoint
+    MAX_BATCH_LISTINGS = 100
+
+    # Default output fields of the feed and search endpoints (overridable with ?fields= / ?view=)
+    FEED_FIELDS = CARD_FIELDS + (
+        "description", "video_path", "tags", "is_featured", "is_promoted", "created_at", "updated_at", "is_favorite"
+    )
+    SEARCH_FIELDS = CARD_FIELDS + ("tags", "is_featured", "is_promoted", "created_at")
+
     def make_homepage_cache_key():
         user_id = request.args.get('user_id', 'anon')
         page = request.args.get('page', 1)
@@ -144,20 +194,12 @@ def create_app():
         page = request.args.get('page', 1, type=int)
         search_location = request.args.get('location', '', type=str).lower().strip()
 
+        # Only the ordered ids of the page are cached; listings come from the fragment cache
         cache_key = f"featured_properties:{user_id}:{page}:{search_location}"
         
-        @cache_response(expiry=300, key_prefix=cache_key)
         def inner():
             per_page = 16
-            saved_listing_ids = []
 
-            if user_id and user_id != 'anon':
-                saved_listing_ids = [
-                    interaction.listing_id
-                    for interaction in Interaction.query.filter_by(user_id=user_id, interaction_type="saved").all()
-                ]
-
-          
             from datetime import datetime, timedelta
             session_key = f'property_order_v5:{user_id}:{search_location or "global"}'
             session_time_key = f'{session_key}_ts'
@@ -182,28 +224,15 @@ def create_app():
                 # Get user preferences for personalization
                 user_preferences = {}
                 if user_id and user_id != 'anon':
-                    # Get user's saved listings to understand preferences
-                    saved_listings = Interaction.query.filter_by(
-                        user_id=user_id, 
-                        interaction_type="saved"
-                    ).all()
-                    
-                    # Extract preferences from saved listings
-                    preferred_locations = set()
-                    preferred_tags = set()
-                    for saved in saved_listings:
-                        if saved.state:
-                            preferred_locations.add(saved.state.lower())
-                        if saved.city:
-                            preferred_locations.add(saved.city.lower())
-                        if saved.tags:  # Now using the new tags field
-                            tags = [tag.strip().lower() for tag in saved.tags.split(',')]
-                            preferred_tags.update(tags)
-                    
-                    user_preferences = {
-                        'locations': list(preferred_locations),
-                        'tags': list(preferred_tags)
-                    }
+                    # Preferences from the user's decayed profile (see user_profiles.py)
+                    profile = get_profile(user_id)
+                    preferred_locations = top_values(profile, 'state', 3) + top_values(profile, 'city', 5)
+                    preferred_tags = top_values(profile, 'tag', 10)
+                    if preferred_locations or preferred_tags:
+                        user_preferences = {
+                            'locations': preferred_locations,
+                            'tags': preferred_tags
+                        }
 
                 # Separate properties by type
                 featured = [p for p in all_props if getattr(p, 'is_featured', False)]
@@ -376,71 +405,39 @@ def create_app():
             page_idx = max(0, min(page - 1, total_pages - 1))
             paginated_ids = pagewise_order[page_idx] if pagewise_order and page_idx < len(pagewise_order) else []
 
-            if paginated_ids:
-                id_to_listing = {l.id: l for l in Listing.query.filter(Listing.id.in_(paginated_ids)).all()}
-                paginated = [id_to_listing[pid] for pid in paginated_ids if pid in id_to_listing]
-            else:
-                paginated = []
-
-            def serialize_property(prop):
-                try:
-                    images = json.loads(prop.image_paths) if prop.image_paths else []
-                except Exception:
-                    images = []
-                images = [to_supabase_url(img, 'listings') for img in images if img]
-                video_path = to_supabase_url(prop.video_path, 'listing-videos') if prop.video_path else None
-                try:
-                    tags = [tag.strip() for tag in prop.tags.split(',')] if prop.tags else []
-                except Exception:
-                    tags = []
-                # --- Add units for complex listings ---
-                units = []
-                if getattr(prop, 'listing_type', None) == 'complex' and hasattr(prop, 'units') and prop.units:
-                    for unit in prop.units:
-                        units.append({
-                            'id': unit.id,
-                            'name': unit.name,
-                            'bedrooms': unit.bedrooms,
-                            'bathrooms': unit.bathrooms,
-                            'sqft': unit.sqft,
-                            'price_min': unit.price_min,
-                            'price_max': unit.price_max,
-                            'is_available': unit.is_available
-                        })
-                return {
-                    "id": prop.id,
-                    "title": prop.title,
-                    "description": prop.description,
-                    "price": prop.price,
-                    "state": prop.state,
-                    "city": prop.city,
-                    "area": prop.area,
-                    "bedrooms": prop.bedrooms,
-                    "bathrooms": prop.bathrooms,
-                    "listing_type": prop.listing_type,
-                    "rent_period": getattr(prop, 'rent_period', 'month'),
-                    "image_paths": images,
-                    "video_path": video_path,
-                    "tags": tags,
-                    "is_featured": getattr(prop, 'is_featured', False),
-                    "is_promoted": getattr(prop, 'is_promoted', False),
-                    "created_at": prop.created_at.isoformat() if prop.created_at else None,
-                    "updated_at": prop.updated_at.isoformat() if prop.updated_at else None,
-                    "is_favorite": prop.id in saved_listing_ids,
-                    "units": units if units else None
-                }
-
-            listings = [serialize_property(p) for p in final_page_props]
-
-            return jsonify({
-                "listings": listings,
-                "page": page,
-                "total_pages": total_pages,
-                "has_prev": page > 1,
-                "has_next": page < total_pages
-            })
+            return {"ids": paginated_ids, "total_pages": total_pages}
+
+        page_order = get_cached_ids(cache_key)
+        if page_order is None:
+            page_order = inner()
+            cache_ids(cache_key, page_order, expiry=300)
+        total_pages = page_order["total_pages"]
+
+        # Cards are assembled from per-listing fragments (one MGET, misses batch-loaded);
+        # ?fields= / ?view= restrict both the selected columns and the serialized keys
+        fields = requested_fields(request.args)
+        listings = get_listing_fragments(page_order["ids"], FEED_FIELDS, fields)
+
+        # Favorites are per user, so they are added on top of the shared fragments
+        saved_listing_ids = set()
+        if user_id and user_id != 'anon' and wants(fields, "is_favorite"):
+            saved_listing_ids = {
+                row.listing_id for row in
+                db.session.query(Interaction.listing_id).filter_by(user_id=user_id, interaction_type="saved").all()
+            }
+        for data in listings:
+            if "units" in data:
+                data["units"] = data["units"] or None
+            if wants(fields, "is_favorite"):
+                data["is_favorite"] = data["id"] in saved_listing_ids
 
-        return inner()
+        return jsonify({
+            "listings": listings,
+            "page": page,
+            "total_pages": total_pages,
+            "has_prev": page > 1,
+            "has_next": page < total_pages
+        })
 
     @app.route('/api/register', methods=['POST'])
     @cross_origin(origins=settings.cors_origins, supports_credentials=True)
@@ -652,7 +649,6 @@ def create_app():
 
     
     @app.route('/api/search-properties', methods=['GET'])
-    @cache_response(expiry=180, key_prefix="search_properties")
     def api_search_properties():
         search = request.args.get('search', '', type=str)
         area = request.args.get('search_area', '', type=str)
@@ -664,21 +660,47 @@ def create_app():
         tags = request.args.get('tags', '', type=str)
         locked_location = request.args.get('locked_location', '', type=str)
 
-        query = Listing.query
+        # ?fields= / ?view=card restrict the serialized keys of each card
+        fields = requested_fields(request.args)
+
+        # The mixed id order is cached per filter set; cards come from the fragment cache
+        filter_args = sorted((k, v) for k, v in request.args.items() if k not in ('fields', 'view'))
+        cache_key = "search_properties:" + hashlib.md5(repr(filter_args).encode()).hexdigest()
+        mixed_ids = get_cached_ids(cache_key)
+        if mixed_ids is not None:
+            return jsonify({"listings": get_listing_fragments(mixed_ids, SEARCH_FIELDS, fields)})
+
+        # Only the columns the round-robin mixing below relies on are selected
+        query = Listing.query.options(load_only(Listing.id, Listing.is_featured, Listing.is_promoted, Listing.created_at))
         if locked_location:
             query = query.filter((Listing.state.ilike(f"%{locked_location}%")) | (Listing.city.ilike(f"%{locked_location}%")))
         elif search:
             query = query.filter((Listing.state.ilike(f"%{search}%")) | (Listing.city.ilike(f"%{search}%")))
         if area:
             query = query.filter(Listing.area.ilike(f"%{area}%"))
+        # Complex listings match when any unit falls in the requested range,
+        # using the unit summaries stored on the listing row.
+        has_unit_prices = and_(Listing.listing_type == 'complex', Listing.unit_price_min.isnot(None))
         if price_min is not None:
-            query = query.filter(Listing.price >= price_min)
+            query = query.filter(or_(
+                and_(has_unit_prices, Listing.unit_price_max >= price_min),
+                and_(~has_unit_prices, Listing.price >= price_min)
+            ))
         if price_max is not None:
-            query = query.filter(Listing.price <= price_max)
+            query = query.filter(or_(
+                and_(has_unit_prices, Listing.unit_price_min <= price_max),
+                and_(~has_unit_prices, Listing.price <= price_max)
+            ))
         if bedrooms is not None:
-            query = query.filter(Listing.bedrooms == bedrooms)
+            query = query.filter(or_(
+                Listing.bedrooms == bedrooms,
+                and_(Listing.unit_bedrooms_min <= bedrooms, Listing.unit_bedrooms_max >= bedrooms)
+            ))
         if bathrooms is not None:
-            query = query.filter(Listing.bathrooms == bathrooms)
+            query = query.filter(or_(
+                Listing.bathrooms == bathrooms,
+                and_(Listing.unit_bathrooms_min <= bathrooms, Listing.unit_bathrooms_max >= bathrooms)
+            ))
         if tags:
             tag_list = [t.strip() for t in tags.split(',') if t.strip()]
             for tag in tag_list:
@@ -731,50 +753,9 @@ def create_app():
                     seen_ids.add(prop.id)
                 idx_old += 1
 
-        def serialize(prop):
-            try:
-                images = json.loads(prop.image_paths) if prop.image_paths else []
-            except Exception:
-                images = []
-            try:
-                tags = [tag.strip() for tag in prop.tags.split(',')] if prop.tags else []
-            except Exception:
-                tags = []
-            units_data = []
-            if prop.listing_type == 'complex':
-                units = Unit.query.filter_by(listing_id=prop.id).all()
-                units_data = [
-                    {
-                        "id": unit.id,
-                        "name": unit.name,
-                        "bedrooms": unit.bedrooms,
-                        "bathrooms": unit.bathrooms,
-                        "sqft": unit.sqft,
-                        "price_min": unit.price_min,
-                        "price_max": unit.price_max,
-                        "is_available": unit.is_available
-                    } for unit in units
-                ]
-            return {
-                "id": prop.id,
-                "title": prop.title,
-                "price": prop.price,
-                "city": prop.city,
-                "state": prop.state,
-                "area": prop.area,
-                "bedrooms": prop.bedrooms,
-                "bathrooms": prop.bathrooms,
-                "image_paths": images,
-                "tags": tags,
-                "listing_type": prop.listing_type,
-                "rent_period": prop.rent_period,
-                "units": units_data,
-                "is_featured": getattr(prop, 'is_featured', False),
-                "is_promoted": getattr(prop, 'is_promoted', False),
-                "created_at": prop.created_at.isoformat() if prop.created_at else None
-            }
-
-        return jsonify({"listings": [serialize(l) for l in mixed]})
+        mixed_ids = [l.id for l in mixed]
+        cache_ids(cache_key, mixed_ids, expiry=180)
+        return jsonify({"listings": get_listing_fragments(mixed_ids, SEARCH_FIELDS, fields)})
     
 
     @app.route('/api/upload-reel', methods=['POST'])
@@ -795,6 +776,7 @@ def create_app():
 
             # Invalidate cache after adding new reel
             invalidate_listing_cache(listing_id)
+            refresh_listing_reels(listing_id)
 
             return jsonify({
                 "message": "Reel uploaded successfully",
@@ -808,98 +790,8 @@ def create_app():
     @app.route('/api/user-reels', methods=['GET'])
     @cross_origin(origins=settings.cors_origins, supports_credentials=True)  # Cache for 10 minutes
     def get_user_reels():
-        # Always use last 50 interactions from all users (not the current user)
-        interactions = (
-            Interaction.query
-            .order_by(Interaction.created_at.desc())
-            .limit(50)
-            .all()
-        )
-        if not interactions:
-            return jsonify({"reels": []})
-
-        interacted_ids = [i.listing_id for i in interactions]
-        listings = Listing.query.filter(Listing.id.in_(interacted_ids)).all()
-
-        # Aggregate most common bedrooms, tags, city, state, area
-        bedroom_counter = Counter()
-        tag_counter = Counter()
-        city_counter = Counter()
-        state_counter = Counter()
-        area_counter = Counter()
-        for l in listings:
-            if l.bedrooms is not None:
-                bedroom_counter[l.bedrooms] += 1
-            if l.tags:
-                tag_counter.update([t.strip() for t in l.tags.split(',') if t.strip()])
-            if l.city:
-                city_counter[l.city] += 1
-            if l.state:
-                state_counter[l.state] += 1
-            if l.area:
-                area_counter[l.area] += 1
-
-        top_bedrooms = [b for b, _ in bedroom_counter.most_common(2)]
-        top_tags = [t for t, _ in tag_counter.most_common(2)]
-        top_cities = [c for c, _ in city_counter.most_common(2)]
-        top_states = [s for s, _ in state_counter.most_common(2)]
-        top_areas = [a for a, _ in area_counter.most_common(2)]
-
-        # Find listings with reels that match these attributes
-        query = Listing.query
-        filters = []
-        if top_bedrooms:
-            filters.append(Listing.bedrooms.in_(top_bedrooms))
-        if top_tags:
-            filters.append(db.or_(*[Listing.tags.ilike(f'%{tag}%') for tag in top_tags]))
-        if top_cities:
-            filters.append(Listing.city.in_(top_cities))
-        if top_states:
-            filters.append(Listing.state.in_(top_states))
-        if top_areas:
-            filters.append(Listing.area.in_(top_areas))
-        if filters:
-            query = query.filter(db.or_(*filters))
-        query = query.filter(Listing.reels.any())
-
-        listings_with_reels = query.order_by(Listing.id.desc()).limit(20).all()
-        reels = []
-        for l in listings_with_reels:
-            # Get units data for complex listings
-            units_data = []
-            min_bedrooms = None
-            max_bedrooms = None
-            if l.listing_type == 'complex':
-                units = Unit.query.filter_by(listing_id=l.id).all()
-                units_data = [
-                    {
-                        "id": unit.id,
-                        "name": unit.name,
-                        "bedrooms": unit.bedrooms,
-                        "bathrooms": unit.bathrooms,
-                        "sqft": unit.sqft,
-                        "price_min": unit.price_min,
-                        "price_max": unit.price_max,
-                        "is_available": unit.is_available
-                    }
-                    for unit in units
-                ]
-                if units_data:
-                    min_bedrooms = min(u["bedrooms"] for u in units_data)
-                    max_bedrooms = max(u["bedrooms"] for u in units_data)
-            for reel in l.reels:
-                reels.append({
-                    'listing_id': l.id,
-                    'video_url': reel.video_path,  # Now using Supabase Storage URL directly
-                    'title': l.title,
-                    'location': f'{l.area}, {l.city}, {l.state}',
-                    'tags': [t.strip() for t in l.tags.split(',')] if l.tags else [],
-                    'bedrooms': l.bedrooms,
-                    'listing_type': l.listing_type,
-                    'units': units_data,
-                    'bedroom_range': f"{min_bedrooms}-{max_bedrooms}" if min_bedrooms is not None and max_bedrooms is not None and min_bedrooms != max_bedrooms else (str(min_bedrooms) if min_bedrooms is not None else None)
-                })
-        return jsonify({'reels': reels})
+        # Global candidates ranked against all users' recent interests, refreshed on a timer (see reels_feed.py)
+        return jsonify({'reels': global_reels()})
 
 
     @app.route('/api/listing/<int:listing_id>', methods=['PUT'])
@@ -962,11 +854,9 @@ def create_app():
 
             # Handle units for complex listings
             if listing.listing_type == 'complex':
-                # First, delete existing units for this listing
-                Unit.query.filter_by(listing_id=listing.id).delete()
-                
                 units_data = data.get('units')
-                if units_data:
+                units_to_add = None
+                if units_data is not None:
                     try:
                         if isinstance(units_data, str):
                             floorplans = json.loads(units_data)
@@ -1001,11 +891,23 @@ def create_app():
                                     is_available=unit_data.get('availability', False)
                                 )
                                 units_to_add.append(child_unit)
-
-                        db.session.bulk_save_objects(units_to_add)
-                        db.session.commit()
                     except Exception as e:
                         print("Error parsing units data:", e)
+                        units_to_add = None
+
+                # Replace the units only when new ones were sent and parsed, in one commit
+                if units_to_add is not None:
+                    Unit.query.filter_by(listing_id=listing.id).delete()
+                    db.session.bulk_save_objects(units_to_add)
+                    listing.refresh_unit_summary(units_to_add)
+                    db.session.commit()
+            elif listing.unit_price_min is not None or listing.unit_bedrooms_min is not None:
+                # No longer a complex listing: drop the stale unit summary
+                listing.refresh_unit_summary([])
+                db.session.commit()
+
+            # Reels feed entries carry title, location, tags and units
+            refresh_listing_reels(listing_id)
             
             return jsonify({'message': 'Listing updated successfully'}), 200
         except Exception as e:
@@ -1016,56 +918,30 @@ def create_app():
     @app.route('/api/agent/<int:agent_id>/listings', methods=['GET'])
     @cache_response(expiry=300, key_prefix="agent_listings")  # Cache for 5 minutes
     def get_agent_listings(agent_id):
-        listings = Listing.query.filter_by(agent_id=agent_id).order_by(Listing.id.desc()).all()
+        # Reels for every listing are batch-loaded with one IN query
+        listings = (
+            Listing.query
+            .options(*eager_listing_options(units=False, reels=True))
+            .filter_by(agent_id=agent_id)
+            .order_by(Listing.id.desc())
+            .all()
+        )
         listing_data = []
 
+        # ✅ View counts for all listings in one query (counter table or GROUP BY)
+        view_counts = get_view_counts([listing.id for listing in listings])
+
         for listing in listings:
-            try:
-                images = json.loads(listing.image_paths) if listing.image_paths else []
-            except json.JSONDecodeError:
-                images = []
-            
-            # Count views for this specific listing
-            view_count = Interaction.query.filter_by(listing_id=listing.id, interaction_type='view').count()
+            images = parse_image_paths(listing)
+            view_count = view_counts.get(listing.id, 0)
 
-            try:
-                if listing.tags:
-                    tags = [tag.strip() for tag in listing.tags.split(',')]
-                else:
-                    tags = []
-            except Exception:
-                tags = []
+            tags = parse_tags(listing)
 
-            # ✅ Fetch all reel paths related to this listing
-            reels = Reel.query.filter_by(listing_id=listing.id).all()
-            reel_video_paths = [reel.video_path for reel in reels if reel.video_path]
+            # ✅ All reel paths related to this listing
+            reel_video_paths = [reel.video_path for reel in listing.reels if reel.video_path]
 
-            # Calculate price range for complex listings
-            price_display = listing.price
-            bed_display = listing.bedrooms
-            bath_display = listing.bathrooms
-            
-            if listing.listing_type == 'complex':
-                units = Unit.query.filter_by(listing_id=listing.id).all()
-                if units:
-                    prices = [unit.price_min for unit in units if unit.price_min > 0]
-                    beds = [unit.bedrooms for unit in units if unit.bedrooms > 0]
-                    baths = [unit.bathrooms for unit in units if unit.bathrooms > 0]
-                    
-                    if prices:
-                        min_price = min(prices)
-                        max_price = max(prices)
-                        price_display = f"{min_price}-{max_price}" if min_price != max_price else str(min_price)
-                    
-                    if beds:
-                        min_beds = min(beds)
-                        max_beds = max(beds)
-                        bed_display = f"{int(min_beds)}-{int(max_beds)}" if min_beds != max_beds else str(int(min_beds))
-                    
-                    if baths:
-                        min_baths = min(baths)
-                        max_baths = max(baths)
-                        bath_display = f"{int(min_baths)}-{int(max_baths)}" if min_baths != max_baths else str(int(min_baths))
+            # Price/bed/bath ranges come from the stored unit summaries
+            price_display, bed_display, bath_display = range_displays(listing)
 
             listing_data.append({
                 "id": listing.id,
@@ -1120,8 +996,11 @@ def create_app():
 
         if interaction:
             # Unsave the listing
+            saved_at = interaction_time(interaction.created_at)
             db.session.delete(interaction)
             db.session.commit()
+            invalidate_user_recs(user_id)
+            update_profile(user_id, "unsave", listing, at=saved_at)
             return jsonify({"success": True, "action": "unsaved"})
         else:
             # Save the listing
@@ -1137,6 +1016,9 @@ def create_app():
             )
             db.session.add(new_interaction)
             db.session.commit()
+            invalidate_user_recs(user_id)
+            record_interaction(listing_id, "saved", state=state, city=city)
+            update_profile(user_id, "saved", listing)
             return jsonify({"success": True, "action": "saved"})
 
     @app.route('/api/interaction', methods=['POST'])
@@ -1156,18 +1038,30 @@ def create_app():
         if not listing_id or not interaction_type or not user_id:
             return jsonify({"error": "Missing required fields"}), 400
 
+        # Listing attributes for the trending sets and the user's preference profile (one PK lookup)
+        listing_row = db.session.query(
+            Listing.state, Listing.city, Listing.area, Listing.tags, Listing.bedrooms
+        ).filter(Listing.id == listing_id).first()
+
         if interaction_type == 'unsave':
-            # 🔴 Remove 'saved' interaction
-            Interaction.query.filter_by(
+            # 🔴 Remove 'saved' interaction (keeping when it was saved for the profile)
+            saved_query = Interaction.query.filter_by(
                 user_id=user_id,
                 listing_id=listing_id,
                 interaction_type='saved'
-            ).delete()
+            )
+            saved_times = [row.created_at for row in saved_query.with_entities(Interaction.created_at)]
+            removed = saved_query.delete()
             db.session.commit()
             
             # Invalidate relevant caches
             invalidate_user_cache(user_id)
             invalidate_listing_cache(listing_id)
+            if removed:
+                # Only a save that actually existed is taken back out of the profile
+                invalidate_user_recs(user_id)
+                for created_at in saved_times:
+                    update_profile(user_id, "unsave", listing_row, at=interaction_time(created_at))
             
             return jsonify({"message": "Unsave successful"}), 200
 
@@ -1196,9 +1090,17 @@ def create_app():
         db.session.add(interaction)
         db.session.commit()
 
+        # 📈 Trending scores (location from the client, else from the listing row) and preference profile
+        if listing_row:
+            state, city = state or listing_row.state, city or listing_row.city
+        record_interaction(listing_id, interaction_type, state=state, city=city)
+        update_profile(user_id, interaction_type, listing_row)
+
         # Invalidate relevant caches
         invalidate_user_cache(user_id)
         invalidate_listing_cache(listing_id)
+        if interaction_type == 'saved':
+            invalidate_user_recs(user_id)
 
         return jsonify({"message": f"{interaction_type.capitalize()} interaction saved"}), 201
 
@@ -1217,7 +1119,7 @@ def create_app():
     @cross_origin(origins=settings.cors_origins, supports_credentials=True)
     @cache_response(expiry=300, key_prefix="listing_details")  # Cache for 5 minutes
     def get_listing_by_id(listing_id):
-        listing = Listing.query.get_or_404(listing_id)
+        listing = Listing.query.options(*eager_listing_options(units=True, agent=True)).get_or_404(listing_id)
         
         # Get user_id from query parameter to check if listing is saved
         user_id = request.args.get('user_id', type=int)
@@ -1230,248 +1132,137 @@ def create_app():
             ).first()
             is_favorite = saved_interaction is not None
 
-        try:
-            images = json.loads(listing.image_paths) if listing.image_paths else []
-        except json.JSONDecodeError:
-            images = []
+        # Recommendations are served separately by /api/listing/<id>/recommendations
+        data = serialize_listing_detail(listing)
+        # ✅ Favorite Status
+        data["is_favorite"] = is_favorite
+        return jsonify(data)
 
-        images = [to_supabase_url(img, 'listings') for img in images if img]
-        video_path = to_supabase_url(listing.video_path, 'listing-videos') if listing.video_path else None
+    @app.route('/api/listing/<int:listing_id>/recommendations')
+    @cross_origin(origins=settings.cors_origins, supports_credentials=True)
+    @cache_response(expiry=900, key_prefix="listing_recommendations")  # Cache for 15 minutes
+    def get_listing_recommendations(listing_id):
+        """
+        Recommendations shown under a listing, fetched after the detail payload.
 
-        try:
-            tags = [tag.strip() for tag in listing.tags.split(',')] if listing.tags else []
-        except Exception:
-            tags = []
+        Returns:
+            similar_properties: content-based neighbours of the listing
+            properties_you_may_like: user-based picks (only when user_id is given)
+        """
+        listing = Listing.query.options(load_only(Listing.id, Listing.city)).get_or_404(listing_id)
+        user_id = request.args.get('user_id', type=int)
 
-        # === RECOMMENDATIONS ===
-        # Initialize recommendation lists
         similar_properties = []
         properties_you_may_like = []
-        
+
         # Get content-based recommendations (similar properties near you)
         try:
             recommender = Recommender(user_id=user_id if user_id else 1)  # Use dummy user_id if not logged in
             content_based_recs = recommender.content_based(listing_id)
-            
-            # Format content-based recommendations
-            for rec in content_based_recs:
-                try:
-                    rec_images = json.loads(rec.image_paths) if rec.image_paths else []
-                except json.JSONDecodeError:
-                    rec_images = []
-                rec_images = [to_supabase_url(img, 'listings') for img in rec_images if img]
-                
-                # Get units data for complex listings
-                units_data = []
-                if rec.listing_type == 'complex':
-                    units = Unit.query.filter_by(listing_id=rec.id).all()
-                    units_data = [
-                        {
-                            "id": unit.id,
-                            "name": unit.name,
-                            "bedrooms": unit.bedrooms,
-                            "bathrooms": unit.bathrooms,
-                            "sqft": unit.sqft,
-                            "price_min": unit.price_min,
-                            "price_max": unit.price_max,
-                            "is_available": unit.is_available
-                        }
-                        for unit in units
-                    ]
-                
-                similar_properties.append({
-                    "id": rec.id,
-                    "title": rec.title,
-                    "price": rec.price,
-                    "city": rec.city,
-                    "state": rec.state,
-                    "area": rec.area,
-                    "bedrooms": rec.bedrooms,
-                    "bathrooms": rec.bathrooms,
-                    "image_paths": rec_images,
-                    "listing_type": rec.listing_type,
-                    "rent_period": rec.rent_period,
-                    "units": units_data
-                })
+            similar_properties = serialize_listing_cards(content_based_recs)
         except Exception as e:
             print(f"Error getting content-based recommendations: {e}")
             # Fallback to simple city-based recommendations
-            fallback_recs = Listing.query.filter(
+            fallback_recs = Listing.query.options(*eager_listing_options(units=True)).filter(
                 Listing.id != listing.id,
                 Listing.city == listing.city
             ).order_by(Listing.id.desc()).limit(4).all()
-            
-            for rec in fallback_recs:
-                try:
-                    rec_images = json.loads(rec.image_paths) if rec.image_paths else []
-                except json.JSONDecodeError:
-                    rec_images = []
-                rec_images = [to_supabase_url(img, 'listings') for img in rec_images if img]
-                
-                units_data = []
-                if rec.listing_type == 'complex':
-                    units = Unit.query.filter_by(listing_id=rec.id).all()
-                    units_data = [
-                        {
-                            "id": unit.id,
-                            "name": unit.name,
-                            "bedrooms": unit.bedrooms,
-                            "bathrooms": unit.bathrooms,
-                            "sqft": unit.sqft,
-                            "price_min": unit.price_min,
-                            "price_max": unit.price_max,
-                            "is_available": unit.is_available
-                        }
-                        for unit in units
-                    ]
-                
-                similar_properties.append({
-                    "id": rec.id,
-                    "title": rec.title,
-                    "price": rec.price,
-                    "city": rec.city,
-                    "state": rec.state,
-                    "area": rec.area,
-                    "bedrooms": rec.bedrooms,
-                    "bathrooms": rec.bathrooms,
-                    "image_paths": rec_images,
-                    "listing_type": rec.listing_type,
-                    "rent_period": rec.rent_period,
-                    "units": units_data
-                })
-        
+            similar_properties = [serialize_listing_card(rec) for rec in fallback_recs]
+
         # Get user-based recommendations (properties you may like) - only if user is logged in
         if user_id:
             try:
-                # Get user interactions to determine recommendation type
-                interactions = Interaction.query.filter_by(user_id=user_id).all()
-                
-                if not interactions:
-                    # If no interactions, use rank-based recommendations
-                    user_recs = recommender.rank_based()
-                else:
-                    # Use user-based collaborative filtering
-                    user_recs = recommender.user_rec()
-                
-                # Get IDs of content-based recommendations to avoid duplicates
+                # Precomputed by the recommendation job (popular listings for users without interactions)
+                rec_ids = get_recommended_ids(user_id, rec_num=10)
+
+                # Filter out duplicates of the content-based list, then limit to 5 recommendations
                 content_based_ids = {rec["id"] for rec in similar_properties}
-                
-                # Format user-based recommendations and filter out duplicates
-                for rec in user_recs:
-                    if rec.id not in content_based_ids:  # Ensure no overlap
-                        try:
-                            rec_images = json.loads(rec.image_paths) if rec.image_paths else []
-                        except json.JSONDecodeError:
-                            rec_images = []
-                        rec_images = [to_supabase_url(img, 'listings') for img in rec_images if img]
-                        
-                        # Get units data for complex listings
-                        units_data = []
-                        if rec.listing_type == 'complex':
-                            units = Unit.query.filter_by(listing_id=rec.id).all()
-                            units_data = [
-                                {
-                                    "id": unit.id,
-                                    "name": unit.name,
-                                    "bedrooms": unit.bedrooms,
-                                    "bathrooms": unit.bathrooms,
-                                    "sqft": unit.sqft,
-                                    "price_min": unit.price_min,
-                                    "price_max": unit.price_max,
-                                    "is_available": unit.is_available
-                                }
-                                for unit in units
-                            ]
-                        
-                        properties_you_may_like.append({
-                            "id": rec.id,
-                            "title": rec.title,
-                            "price": rec.price,
-                            "city": rec.city,
-                            "state": rec.state,
-                            "area": rec.area,
-                            "bedrooms": rec.bedrooms,
-                            "bathrooms": rec.bathrooms,
-                            "image_paths": rec_images,
-                            "listing_type": rec.listing_type,
-                            "rent_period": rec.rent_period,
-                            "units": units_data
-                        })
-                        
-                        # Limit to 4 recommendations
-                        if len(properties_you_may_like) >= 5:
-                            break
-                            
+                rec_ids = [i for i in rec_ids if i not in content_based_ids and i != listing_id][:5]
+                properties_you_may_like = serialize_listing_cards(load_listings(rec_ids, units=True))
+
             except Exception as e:
                 print(f"Error getting user-based recommendations: {e}")
 
-        # === Agent Info ===
-        agent_info = None
-        if listing.agent_id:
-            agent = Agent.query.get(listing.agent_id)
-            if agent:
-                agent_info = {
-                    "id": agent.id,
-                    "name": agent.name,
-                    "email": agent.email,
-                    "phone": getattr(agent, "phone", None),
-                    "agent_type": getattr(agent, "agent_type", None)
-                }
-
-        # === Units Data for Complex Listings ===
-        units_data = []
-        if listing.listing_type == 'complex':
-            units = Unit.query.filter_by(listing_id=listing.id).all()
-            units_data = [
-                {
-                    "id": unit.id,
-                    "name": unit.name,
-                    "bedrooms": unit.bedrooms,
-                    "bathrooms": unit.bathrooms,
-                    "sqft": unit.sqft,
-                    "price_min": unit.price_min,
-                    "price_max": unit.price_max,
-                    "is_available": unit.is_available
-                }
-                for unit in units
-            ]
-
         return jsonify({
-            "id": listing.id,
-            "title": listing.title,
-            "price": listing.price,
-            "city": listing.city,
-            "state": listing.state,
-            "area": listing.area,
-            "address": listing.address,
-            "bedrooms": listing.bedrooms,
-            "bathrooms": listing.bathrooms,
-            "description": listing.description,
-            "agent_id": listing.agent_id,
-            "image_paths": images,
-            "video_path": video_path,
-            "tags": tags,
+            "listing_id": listing_id,
             "similar_properties": similar_properties,
-            "properties_you_may_like": properties_you_may_like,
-            "listing_type": listing.listing_type,
-            "rent_period": listing.rent_period,
-            "units": units_data,
-            "created_at": listing.created_at.isoformat() if listing.created_at else None,
-            "updated_at": listing.updated_at.isoformat() if listing.updated_at else None,
-            "availability_date": listing.availability_date.isoformat() if listing.availability_date else None,
-            # ✅ New Optional Fields
-            "amenities": listing.amenities,
-            "interior_features": listing.interior_features,
-            "exterior_features": listing.exterior_features,
-            "leasing_terms": listing.leasing_terms,
-            "policy": listing.policy,
-            # ✅ Agent Full Details
-            "agent": agent_info,
-            # ✅ Favorite Status
-            "is_favorite": is_favorite
+            "properties_you_may_like": properties_you_may_like
         })
         
      
+    @app.route('/api/listings', methods=['GET'])
+    @cross_origin(origins=settings.cors_origins, supports_credentials=True)
+    def get_listings_batch():
+        """
+        Fetch many listings in one request: GET /api/listings?ids=1,2,3&view=card|detail
+
+        Used by saved lists, comparison views and reels overlays instead of one
+        /api/listing/<id> call per card. No recommendations are computed here.
+        Accepts ?fields= for a custom sparse fieldset and ?user_id= for is_favorite.
+        """
+        raw_ids = request.args.get('ids', '', type=str)
+        try:
+            listing_ids = list(dict.fromkeys(int(i) for i in raw_ids.split(',') if i.strip()))
+        except ValueError:
+            return jsonify({'error': 'ids must be a comma-separated list of integers'}), 400
+        if not listing_ids:
+            return jsonify({'error': 'ids is required'}), 400
+        if len(listing_ids) > MAX_BATCH_LISTINGS:
+            return jsonify({'error': f'At most {MAX_BATCH_LISTINGS} ids per request'}), 400
+
+        view = request.args.get('view', 'card', type=str).lower()
+        user_id = request.args.get('user_id', type=int)
+
+        if view == 'detail':
+            results = get_listing_detail_fragments(listing_ids)
+        else:
+            fields = requested_fields(request.args) or set(VIEWS['card'])
+            results = get_listing_fragments(listing_ids, CARD_FIELDS, fields)
+
+        # ✅ Favorite flags for the whole batch from one IN query
+        if user_id:
+            saved_ids = {
+                row.listing_id for row in
+                db.session.query(Interaction.listing_id).filter(
+                    Interaction.user_id == user_id,
+                    Interaction.interaction_type == 'saved',
+                    Interaction.listing_id.in_(listing_ids)
+                ).all()
+            }
+            for item in results:
+                item['is_favorite'] = item['id'] in saved_ids
+
+        found_ids = {item['id'] for item in results}
+        return jsonify({
+            'listings': results,
+            'missing_ids': [listing_id for listing_id in listing_ids if listing_id not in found_ids]
+        })
+
+    @app.route('/api/trending')
+    @cross_origin(origins=settings.cors_origins, supports_credentials=True)
+    def get_trending():
+        """
+        Trending listings with time decay: GET /api/trending?city=&state=&limit=&page=
+
+        Ranked by the city when given, else the state, else globally (see trending.py).
+        """
+        city = request.args.get('city', '', type=str).strip()
+        state = request.args.get('state', '', type=str).strip()
+        limit = page_size(request.args.get('limit', type=int), default=10)
+        page = max(request.args.get('page', 1, type=int), 1)
+
+        listing_ids = get_trending_ids(limit, state=state, city=city, offset=(page - 1) * limit)
+        if not listing_ids and not (city or state) and page == 1:
+            # No trending data yet (fresh Redis): all-time most interacted-with
+            listing_ids = popular_ids(get_recommender_state().current(), limit)
+
+        fields = requested_fields(request.args)
+        return jsonify({
+            'listings': get_listing_fragments(listing_ids, CARD_FIELDS, fields),
+            'scope': 'city' if city else 'state' if state else 'global',
+            'page': page
+        })
+
     @app.route('/user_profile')
     def user_profile():
         user_id = session.get('user_id')
@@ -1483,13 +1274,8 @@ def create_app():
         user = User.query.get_or_404(user_id)
         saved_listings = user.saved_listings
 
-        interactions = Interaction.query.filter_by(user_id=user_id).all()
-        recommender = Recommender(user_id=user_id)
-
-        if not interactions:
-            recommendations = recommender.rank_based()
-        else:
-            recommendations = recommender.user_rec()
+        # Precomputed by the recommendation job (popular listings for users without interactions)
+        recommendations = load_listings(get_recommended_ids(user_id), units=True)
 
         return render_template(
             'user_profile.html',
@@ -1503,100 +1289,17 @@ def create_app():
     def user_dashboard(user_id):
         user = User.query.get_or_404(user_id)
 
-        # Saved listings
+        # Saved listings (units batch-loaded)
         saved_interactions = Interaction.query.filter_by(user_id=user_id, interaction_type="saved").all()
         saved_listing_ids = [i.listing_id for i in saved_interactions]
-        saved_listings = Listing.query.filter(Listing.id.in_(saved_listing_ids)).all()
-
-        # Format saved
-        formatted_saved = []
-        for prop in saved_listings:
-            try:
-                images = json.loads(prop.image_paths) if prop.image_paths else []
-            except json.JSONDecodeError:
-                images = []
-
-            # Get units data for complex listings
-            units_data = []
-            if prop.listing_type == 'complex':
-                units = Unit.query.filter_by(listing_id=prop.id).all()
-                units_data = [
-                    {
-                        "id": unit.id,
-                        "name": unit.name,
-                        "bedrooms": unit.bedrooms,
-                        "bathrooms": unit.bathrooms,
-                        "sqft": unit.sqft,
-                        "price_min": unit.price_min,
-                        "price_max": unit.price_max,
-                        "is_available": unit.is_available
-                    }
-                    for unit in units
-                ]
-
-            formatted_saved.append({
-                "id": prop.id,
-                "title": prop.title,
-                "price": prop.price,
-                "city": prop.city,
-                "state": prop.state,
-                "area": prop.area,
-                "bedrooms": prop.bedrooms,
-                "bathrooms": prop.bathrooms,
-                "image_paths": images,
-                "listing_type": prop.listing_type,
-                "rent_period": prop.rent_period,
-                "units": units_data
-            })
+        saved_listings = load_listings(saved_listing_ids, units=True)
+        formatted_saved = [serialize_listing_card(prop) for prop in saved_listings]
 
         # Recommended listings
-        interactions = Interaction.query.filter_by(user_id=user_id).all()
-        recommender = Recommender(user_id=user_id)
+        # Precomputed by the recommendation job (popular listings for users without interactions)
+        recommended = load_listings(get_recommended_ids(user_id), units=True)
 
-        if not interactions:
-            recommended = recommender.rank_based()
-        else:
-            recommended = recommender.user_rec()
-
-        formatted_recs = []
-        for rec in recommended:
-            try:
-                images = json.loads(rec.image_paths) if rec.image_paths else []
-            except json.JSONDecodeError:
-                images = []
-
-            # Get units data for complex listings
-            units_data = []
-            if rec.listing_type == 'complex':
-                units = Unit.query.filter_by(listing_id=rec.id).all()
-                units_data = [
-                    {
-                        "id": unit.id,
-                        "name": unit.name,
-                        "bedrooms": unit.bedrooms,
-                        "bathrooms": unit.bathrooms,
-                        "sqft": unit.sqft,
-                        "price_min": unit.price_min,
-                        "price_max": unit.price_max,
-                        "is_available": unit.is_available
-                    }
-                    for unit in units
-                ]
-
-            formatted_recs.append({
-                "id": rec.id,
-                "title": rec.title,
-                "price": rec.price,
-                "city": rec.city,
-                "state": rec.state,
-                "area": rec.area,
-                "bedrooms": rec.bedrooms,
-                "bathrooms": rec.bathrooms,
-                "image_paths": images,
-                "listing_type": rec.listing_type,
-                "rent_period": rec.rent_period,
-                "units": units_data
-            })
+        formatted_recs = serialize_listing_cards(recommended)
 
         return jsonify({
             "user": {
@@ -1665,6 +1368,7 @@ def create_app():
             if reel:
                 db.session.delete(reel)
                 db.session.commit()
+                refresh_listing_reels(listing_id)
             return jsonify({"message": "Reel deleted successfully"}), 200
         except Exception as e:
             db.session.rollback()
@@ -1723,22 +1427,91 @@ def create_app():
         return False
 
     # --- Community API ---
-    def serialize_comment(comment, user_id=None):
+    def serialize_comment(comment, user_id=None, liked_ids=None, children=None):
+        """
+        Serialize a comment and its replies from pre-fetched page data.
+
+        Args:
+            liked_ids (set): Comment ids liked by user_id.
+            children (dict): parent_comment_id -> list of reply comments.
+        """
+        liked_ids = liked_ids or set()
+        children = children or {}
         return {
             'id': comment.id,
             'author': comment.author_name,
             'content': comment.content,
             'timestamp': comment.timestamp.isoformat(),
-            'likes': len(comment.likes),
-            'liked': user_id in [like.user_id for like in comment.likes] if user_id else False,
-            'replies': [serialize_comment(reply, user_id) for reply in comment.replies]
+            'likes': comment.like_count or 0,
+            'liked': comment.id in liked_ids if user_id else False,
+            'replies': [
+                serialize_comment(reply, user_id, liked_ids, children)
+                for reply in children.get(comment.id, [])
+            ]
         }
 
+    def load_comment_trees(post_ids, user_id=None):
+        """
+        Fetch every comment for a page of posts and arrange them into trees.
+
+        Replies carry the post_id of their thread, so all levels come back from one
+        IN query; the user's liked comment ids are one more query.
+
+        Returns:
+            tuple: (roots, children, liked_ids) where roots maps post_id -> top-level
+            comments and children maps comment_id -> replies.
+        """
+        roots, children = defaultdict(list), defaultdict(list)
+        if not post_ids:
+            return roots, children, set()
+
+        comments = CommunityComment.query.filter(
+            CommunityComment.post_id.in_(post_ids)
+        ).order_by(CommunityComment.timestamp, CommunityComment.id).all()
+        comment_ids = [c.id for c in comments]
+        for comment in comments:
+            if comment.parent_comment_id is None:
+                roots[comment.post_id].append(comment)
+            else:
+                children[comment.parent_comment_id].append(comment)
+
+        liked_ids = set()
+        if comment_ids and user_id:
+            liked_ids = {
+                row.comment_id for row in
+                db.session.query(CommunityCommentLike.comment_id).filter(
+                    CommunityCommentLike.user_id == user_id,
+                    CommunityCommentLike.comment_id.in_(comment_ids)
+                ).all()
+            }
+        return roots, children, liked_ids
+
     @app.route('/api/community', methods=['GET'])
     @cache_response(expiry=180, key_prefix="community_posts")  # Cache for 3 minutes
     def get_community_posts():
         user_id = request.args.get('user_id', type=int) # For checking 'liked' status
-        posts = CommunityPost.query.order_by(CommunityPost.timestamp.desc()).all()
+        limit = page_size(request.args.get('limit', type=int))
+        cursor = request.args.get('cursor')
+
+        # ✅ Newest posts first, one page at a time
+        posts, next_cursor = paginate_keyset(
+            CommunityPost.query, [CommunityPost.timestamp, CommunityPost.id], cursor, limit
+        )
+        post_ids = [post.id for post in posts]
+
+        # ✅ Counts come from the counter columns; liked flags from one IN query
+        liked_post_ids = set()
+        if post_ids and user_id:
+            liked_post_ids = {
+                row.post_id for row in
+                db.session.query(CommunityLike.post_id).filter(
+                    CommunityLike.user_id == user_id,
+                    CommunityLike.post_id.in_(post_ids)
+                ).all()
+            }
+
+        roots, children, liked_comment_ids = load_comment_trees(post_ids, user_id)
+
         return jsonify({
             'posts': [
                 {
@@ -1748,15 +1521,18 @@ def create_app():
                     'content': post.content,
                     'timestamp': post.timestamp.isoformat(),
                     'category': json.loads(post.category) if post.category else [],
-                    'comments': len(post.comments),
-                    'likes': len(post.likes),
-                    'liked': user_id in [like.user_id for like in post.likes] if user_id else False,
+                    'comments': post.comment_count or 0,
+                    'likes': post.like_count or 0,
+                    'liked': post.id in liked_post_ids if user_id else False,
                     'replies': [
-                        serialize_comment(c, user_id) for c in post.comments if c.parent_comment_id is None
+                        serialize_comment(c, user_id, liked_comment_ids, children)
+                        for c in roots.get(post.id, [])
                     ]
                 }
                 for post in posts
-            ]
+            ],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         })
 
     @app.route('/api/community/post', methods=['POST'])
@@ -1815,6 +1591,10 @@ def create_app():
         )
 
         db.session.add(comment)
+        # ✅ Atomic counter bump in the same transaction as the insert
+        CommunityPost.query.filter_by(id=post_id).update(
+            {CommunityPost.comment_count: CommunityPost.comment_count + 1}, synchronize_session=False
+        )
         db.session.commit()
 
         # Invalidate community cache after adding comment
@@ -1833,6 +1613,18 @@ def create_app():
             }
         })
 
+    def bump_counter(model, row_id, delta):
+        """
+        Atomically adjust the like_count of a post or comment in the current transaction.
+
+        Uses UPDATE ... SET like_count = like_count + delta so concurrent likes never
+        overwrite each other; decrements never go below zero.
+        """
+        query = model.query.filter(model.id == row_id)
+        if delta < 0:
+            query = query.filter(model.like_count >= -delta)
+        query.update({model.like_count: model.like_count + delta}, synchronize_session=False)
+
     @app.route('/api/community/comment/like', methods=['POST'])
     @cross_origin(origins=settings.cors_origins, supports_credentials=True)
     def like_community_comment():
@@ -1849,6 +1641,7 @@ def create_app():
 
         if like:
             db.session.delete(like)
+            bump_counter(CommunityComment, comment_id, -1)
             db.session.commit()
             # Invalidate community cache after removing like
             invalidate_cache_by_prefix("community_posts")
@@ -1856,6 +1649,7 @@ def create_app():
         else:
             new_like = CommunityCommentLike(user_id=user_id, comment_id=comment_id)
             db.session.add(new_like)
+            bump_counter(CommunityComment, comment_id, 1)
             db.session.commit()
             # Invalidate community cache after adding like
             invalidate_cache_by_prefix("community_posts")
@@ -1872,6 +1666,7 @@ def create_app():
         like = CommunityLike.query.filter_by(user_id=user_id, post_id=post_id).first()
         if like:
             db.session.delete(like)
+            bump_counter(CommunityPost, post_id, -1)
             db.session.commit()
             # Invalidate community cache after removing like
             invalidate_cache_by_prefix("community_posts")
@@ -1879,6 +1674,7 @@ def create_app():
         else:
             like = CommunityLike(user_id=user_id, post_id=post_id)
             db.session.add(like)
+            bump_counter(CommunityPost, post_id, 1)
             db.session.commit()
             # Invalidate community cache after adding like
             invalidate_cache_by_prefix("community_posts")
@@ -2405,7 +2201,7 @@ def create_app():
                     move_in_date=data['move_in_date'],
                     lease_duration=lease_duration,
                     additional_notes=data.get('additional_notes', ''),
-                    created_at=datetime.now().isoformat()
+                    created_at=datetime.utcnow()
                 )
             except (ValueError, TypeError) as e:
                 return jsonify({'error': f'Invalid data format: {str(e)}. Please check your input.'}), 400
@@ -2416,22 +2212,8 @@ def create_app():
             # Get agent information
             agent = Agent.query.get(listing.agent_id)
             
-            # --- Price range logic for complex listings ---
-            if listing.listing_type == 'complex':
-                units = Unit.query.filter_by(listing_id=listing.id).all()
-                prices = [unit.price_min for unit in units if isinstance(unit.price_min, (int, float)) and unit.price_min > 0]
-                prices += [unit.price_max for unit in units if isinstance(unit.price_max, (int, float)) and unit.price_max > 0]
-                if prices:
-                    min_price = min(prices)
-                    max_price = max(prices)
-                    if min_price == max_price:
-                        price_display = f"{int(min_price)}"
-                    else:
-                        price_display = f"{int(min_price)}-{int(max_price)}"
-                else:
-                    price_display = 'Price on request'
-            else:
-                price_display = str(int(listing.price)) if listing.price else 'Price on request'
+            # --- Price range (stored unit summary for complex listings) ---
+            price_display = price_range_display(listing)
             
             # Send email notification to agent (property application)
             if agent and agent.email:
@@ -2524,22 +2306,8 @@ def create_app():
             # Get agent information
             agent = Agent.query.get(listing.agent_id)
             
-            # --- Price range logic for complex listings ---
-            if listing.listing_type == 'complex':
-                units = Unit.query.filter_by(listing_id=listing.id).all()
-                prices = [unit.price_min for unit in units if isinstance(unit.price_min, (int, float)) and unit.price_min > 0]
-                prices += [unit.price_max for unit in units if isinstance(unit.price_max, (int, float)) and unit.price_max > 0]
-                if prices:
-                    min_price = min(prices)
-                    max_price = max(prices)
-                    if min_price == max_price:
-                        price_display = f"{int(min_price)}"
-                    else:
-                        price_display = f"{int(min_price)}-{int(max_price)}"
-                else:
-                    price_display = 'Price on request'
-            else:
-                price_display = str(int(listing.price)) if listing.price else 'Price on request'
+            # --- Price range (stored unit summary for complex listings) ---
+            price_display = price_range_display(listing)
             
             # Send email notification to agent
             if agent and agent.email:
@@ -2592,7 +2360,7 @@ def create_app():
                     'listing_id': app.listing_id,
                     'property_title': listing.title if listing else 'Unknown Property',
                     'status': app.status,
-                    'created_at': app.created_at,
+                    'created_at': app.created_at.isoformat() if app.created_at else None,
                     'applicant_name': app.applicant_name,
                     'monthly_income': app.monthly_income,
                     'employment_status': app.employment_status
@@ -2616,90 +2384,8 @@ def create_app():
         if not user_id:
             return jsonify({'reels': []})
 
-        # Get recent interactions
-        recent_interactions = (
-            Interaction.query
-            .filter_by(user_id=user_id)
-            .order_by(Interaction.created_at.desc())
-            .limit(20)
-            .all()
-        )
-        listing_ids = [i.listing_id for i in recent_interactions]
-
-        # Get tags and locations from those listings
-        listings = Listing.query.filter(Listing.id.in_(listing_ids)).all()
-        tag_counter = Counter()
-        city_counter = Counter()
-        state_counter = Counter()
-        area_counter = Counter()
-        for l in listings:
-            if l.tags:
-                tag_counter.update([t.strip() for t in l.tags.split(',') if t.strip()])
-            if l.city: city_counter[l.city] += 1
-            if l.state: state_counter[l.state] += 1
-            if l.area: area_counter[l.area] += 1
-
-        # Get top tags/locations
-        top_tags = [t for t, _ in tag_counter.most_common(5)]
-        top_cities = [c for c, _ in city_counter.most_common(2)]
-        top_states = [s for s, _ in state_counter.most_common(2)]
-        top_areas = [a for a, _ in area_counter.most_common(2)]
-
-        # Find listings with reels that match these tags/locations
-        query = Listing.query
-        filters = []
-        if top_tags:
-            filters.append(db.or_(*[Listing.tags.ilike(f'%{tag}%') for tag in top_tags]))
-        if top_cities:
-            filters.append(Listing.city.in_(top_cities))
-        if top_states:
-            filters.append(Listing.state.in_(top_states))
-        if top_areas:
-            filters.append(Listing.area.in_(top_areas))
-        if filters:
-            query = query.filter(db.or_(*filters))
-        # Only listings with reels
-        query = query.filter(Listing.reels.any())
-
-        # Get up to 20 reels
-        listings_with_reels = query.order_by(Listing.id.desc()).limit(20).all()
-        reels = []
-        for l in listings_with_reels:
-            # Get units data for complex listings
-            units_data = []
-            min_bedrooms = None
-            max_bedrooms = None
-            if l.listing_type == 'complex':
-                units = Unit.query.filter_by(listing_id=l.id).all()
-                units_data = [
-                    {
-                        "id": unit.id,
-                        "name": unit.name,
-                        "bedrooms": unit.bedrooms,
-                        "bathrooms": unit.bathrooms,
-                        "sqft": unit.sqft,
-                        "price_min": unit.price_min,
-                        "price_max": unit.price_max,
-                        "is_available": unit.is_available
-                    }
-                    for unit in units
-                ]
-                if units_data:
-                    min_bedrooms = min(u["bedrooms"] for u in units_data)
-                    max_bedrooms = max(u["bedrooms"] for u in units_data)
-            for reel in l.reels:
-                reels.append({
-                    'listing_id': l.id,
-                    'video_url': reel.video_path,  # Now using Supabase Storage URL directly
-                    'title': l.title,
-                    'location': f'{l.area}, {l.city}, {l.state}',
-                    'tags': [t.strip() for t in l.tags.split(',')] if l.tags else [],
-                    'bedrooms': l.bedrooms,
-                    'listing_type': l.listing_type,
-                    'units': units_data,
-                    'bedroom_range': f"{min_bedrooms}-{max_bedrooms}" if min_bedrooms is not None and max_bedrooms is not None and min_bedrooms != max_bedrooms else (str(min_bedrooms) if min_bedrooms is not None else None)
-                })
-        return jsonify({'reels': reels})
+        # Reels ranked in memory against the user's preference profile (see reels_feed.py)
+        return jsonify({'reels': personalized_reels_for(get_profile(user_id))})
 
     @app.route('/api/market/analytics')
     @cross_origin(origins=settings.cors_origins, supports_credentials=True)
@@ -3016,7 +2702,8 @@ def create_app():
             promoted_only = request.args.get('promoted_only', 'false').lower() == 'true'
             agent_filter = request.args.get('agent_id', type=int)
 
-            query = Listing.query
+            # Agents for the page are batch-loaded with one IN query
+            query = Listing.query.options(*eager_listing_options(units=False, agent=True))
 
             # Apply search filter
             if search:
@@ -3048,64 +2735,12 @@ def create_app():
             )
             property_list = []  
             for prop in properties.items:
-                try:
-                    images = json.loads(prop.image_paths) if prop.image_paths else []
-                except Exception:
-                    images = []
                 # Always use Supabase URLs for images
-                images = [to_supabase_url(img, 'listings') for img in images if img]
-
-                # Always fetch units from the Unit table for complex listings
-                units = []
-                if prop.listing_type == 'complex':
-                    units = Unit.query.filter_by(listing_id=prop.id).all()
-
-
-                # Price/bed/bath display logic using units
-                price_display = prop.price
-                bed_display = prop.bedrooms
-                bath_display = prop.bathrooms
-                if prop.listing_type == 'complex' and units:
-                    prices = [unit.price_min for unit in units if isinstance(unit.price_min, (int, float)) and unit.price_min > 0]
-                    prices += [unit.price_max for unit in units if isinstance(unit.price_max, (int, float)) and unit.price_max > 0]
-                    if prices:
-                        min_price = min(prices)
-                        max_price = max(prices)
-                        if min_price == max_price:
-                            price_display = f"{int(min_price)}"
-                        else:
-                            price_display = f"{int(min_price)}-{int(max_price)}"
-                    elif prop.price and prop.price > 0:
-                        price_display = str(int(prop.price))
-                    else:
-                        price_display = 'Price on request'
-
-                    beds = [unit.bedrooms for unit in units if isinstance(unit.bedrooms, (int, float)) and unit.bedrooms > 0]
-                    if beds:
-                        min_beds = min(beds)
-                        max_beds = max(beds)
-                        if min_beds == max_beds:
-                            bed_display = str(int(min_beds))
-                        else:
-                            bed_display = f"{int(min_beds)}-{int(max_beds)}"
-                    elif prop.bedrooms and prop.bedrooms > 0:
-                        bed_display = str(int(prop.bedrooms))
-                    else:
-                        bed_display = ''
-
-                    baths = [unit.bathrooms for unit in units if isinstance(unit.bathrooms, (int, float)) and unit.bathrooms > 0]
-                    if baths:
-                        min_baths = min(baths)
-                        max_baths = max(baths)
-                        if min_baths == max_baths:
-                            bath_display = str(int(min_baths))
-                        else:
-                            bath_display = f"{int(min_baths)}-{int(max_baths)}"
-                    elif prop.bathrooms and prop.bathrooms > 0:
-                        bath_display = str(int(prop.bathrooms))
-                    else:
-                        bath_display = ''
+                images = parse_image_paths(prop)
+
 
+                # Price/bed/bath display from the stored unit summaries
+                price_display, bed_display, bath_display = range_displays(prop)
 
                 # --- Promotion info ---
                 if getattr(prop, 'is_promoted', False):
@@ -3119,16 +2754,7 @@ def create_app():
                     promotion_info = None
 
                 # --- Agent info ---
-                agent_info = None
-                if getattr(prop, 'agent_id', None):
-                    agent = Agent.query.get(prop.agent_id)
-                    if agent:
-                        agent_info = {
-                            'id': agent.id,
-                            'name': agent.name,
-                            'email': agent.email,
-                            'agent_type': getattr(agent, 'agent_type', None)
-                        }
+                agent_info = serialize_agent(prop.agent, include_phone=False)
 
                 property_list.append({
                     'id': prop.id,
@@ -3277,23 +2903,20 @@ def create_app():
         
         """Get all featured properties for admin management"""
         try:
-            featured_properties = Listing.query.filter_by(is_featured=True).order_by(Listing.created_at.desc()).all()
+            featured_properties = (
+                Listing.query
+                .options(*eager_listing_options(units=False, agent=True))
+                .filter_by(is_featured=True)
+                .order_by(Listing.created_at.desc())
+                .all()
+            )
             
             property_list = []
             for prop in featured_properties:
-                try:
-                    images = json.loads(prop.image_paths) if prop.image_paths else []
-                except json.JSONDecodeError:
-                    images = []
+                images = parse_image_paths(prop)
 
                 # Get agent info
-                agent = Agent.query.get(prop.agent_id)
-                agent_info = {
-                    'id': agent.id,
-                    'name': agent.name,
-                    'email': agent.email,
-                    'agent_type': agent.agent_type
-                } if agent else None
+                agent_info = serialize_agent(prop.agent, include_phone=False)
 
                 property_list.append({
                     'id': prop.id,
@@ -3318,6 +2941,51 @@ def create_app():
             print(f"Admin get featured properties error: {str(e)}")
             return jsonify({'error': 'Failed to fetch featured properties'}), 500
 
+    def get_admin_agent_totals(search=''):
+        """
+        Directory totals for the admin agents page, cached until listings change.
+
+        Returns:
+            dict: total (agents matching search), listings, featured_listings, promoted_listings
+        """
+        cache_key = f"admin_agent_totals:{search.lower()}"
+        if is_redis_available():
+            try:
+                cached = redis_client.get(cache_key)
+                if cached:
+                    return json.loads(cached)
+            except Exception as e:
+                print(f"Admin agent totals cache read error: {e}")
+
+        agent_query = db.session.query(func.count(Agent.id))
+        if search:
+            agent_query = agent_query.filter(
+                db.or_(
+                    Agent.name.ilike(f'%{search}%'),
+                    Agent.email.ilike(f'%{search}%')
+                )
+            )
+        listing_totals = db.session.query(
+            func.count(Listing.id),
+            func.count(case((Listing.is_featured == True, 1))),
+            func.count(case((Listing.is_promoted == True, 1)))
+        ).one()
+
+        totals = {
+            'total': agent_query.scalar() or 0,
+            'listings': listing_totals[0] or 0,
+            'featured_listings': listing_totals[1] or 0,
+            'promoted_listings': listing_totals[2] or 0
+        }
+
+        if is_redis_available():
+            try:
+                # Short expiry so newly registered agents show up without explicit invalidation
+                redis_client.setex(cache_key, 600, json.dumps(totals))
+            except Exception as e:
+                print(f"Admin agent totals cache write error: {e}")
+        return totals
+
     @app.route('/api/admin/agents', methods=['GET'])
     @cross_origin(origins=settings.cors_origins, supports_credentials=True)
     @require_supabase_authenticated
@@ -3329,42 +2997,67 @@ def create_app():
         if not admin or not admin.is_active:
             return jsonify({'error': 'Admin privileges required'}), 403
         
-        """Get all agents with admin details"""
+        """Get agents with their listing counts (paginated, searchable by name/email)"""
         try:
-            agents = Agent.query.all()
-            agent_list = []
-            
-            for agent in agents:
-                # Get agent's listings count
-                listings_count = Listing.query.filter_by(agent_id=agent.id).count()
-                
-                # Get agent's featured listings count
-                featured_count = Listing.query.filter_by(agent_id=agent.id, is_featured=True).count()
-                
-                # Get agent's promoted listings count
-                promoted_count = Listing.query.filter_by(agent_id=agent.id, is_promoted=True).count()
-                
-                agent_list.append({
-                    'id': agent.id,
-                    'name': agent.name,
-                    'email': agent.email,
-                    'phone': agent.phone,
-                    'agent_type': agent.agent_type,
-                    #'company': agent.company,
-                    #'license_number': agent.license_number,
-                    'profile_image': agent.photo_url,
-                    #'bio': agent.bio,
-                    #'is_verified': agent.is_verified,
-                    #'is_active': agent.is_active,
-                    'created_at': agent.created_at.isoformat() if agent.created_at else None,
-                    'listings_count': listings_count,
-                    'featured_listings_count': featured_count,
-                    'promoted_listings_count': promoted_count
-                })
-            
+            page = max(request.args.get('page', 1, type=int), 1)
+            per_page = max(1, min(request.args.get('per_page', 20, type=int), 100))
+            search = request.args.get('search', '', type=str).strip()
+
+            # ✅ One grouped query: listing totals per agent via conditional aggregates
+            listings_count = func.count(Listing.id)
+            featured_count = func.count(case((Listing.is_featured == True, 1)))
+            promoted_count = func.count(case((Listing.is_promoted == True, 1)))
+
+            query = (
+                db.session.query(
+                    Agent.id, Agent.name, Agent.email, Agent.phone, Agent.agent_type,
+                    Agent.photo_url, Agent.created_at,
+                    listings_count.label('listings_count'),
+                    featured_count.label('featured_count'),
+                    promoted_count.label('promoted_count')
+                )
+                .outerjoin(Listing, Listing.agent_id == Agent.id)
+                .group_by(Agent.id)
+            )
+            if search:
+                query = query.filter(
+                    db.or_(
+                        Agent.name.ilike(f'%{search}%'),
+                        Agent.email.ilike(f'%{search}%')
+                    )
+                )
+
+            rows = (
+                query.order_by(Agent.created_at.desc(), Agent.id.desc())
+                .offset((page - 1) * per_page)
+                .limit(per_page)
+                .all()
+            )
+
+            agent_list = [{
+                'id': row.id,
+                'name': row.name,
+                'email': row.email,
+                'phone': row.phone,
+                'agent_type': row.agent_type,
+                'profile_image': row.photo_url,
+                'created_at': row.created_at.isoformat() if row.created_at else None,
+                'listings_count': row.listings_count,
+                'featured_listings_count': row.featured_count,
+                'promoted_listings_count': row.promoted_count
+            } for row in rows]
+
+            totals = get_admin_agent_totals(search)
+            pages = (totals['total'] + per_page - 1) // per_page
+
             return jsonify({
                 'agents': agent_list,
-                'total': len(agent_list)
+                'total': totals['total'],
+                'totals': totals,
+                'pages': pages,
+                'current_page': page,
+                'has_next': page < pages,
+                'has_prev': page > 1
             })
             
         except Exception as e:
@@ -3571,27 +3264,54 @@ def create_app():
     @app.route('/api/agent/<int:agent_id>/applications', methods=['GET'])
     @cross_origin()
     def get_agent_applications(agent_id):
-        """Get all property applications for an agent's listings"""
+        """
+        Property applications for an agent's listings, newest first.
+
+        Query params: status (pending/approved/rejected), limit, cursor (from next_cursor).
+        The first page also carries the total number of matching applications.
+        """
         try:
-            # Get all listings by this agent
-            agent_listings = Listing.query.filter_by(agent_id=agent_id).all()
-            listing_ids = [listing.id for listing in agent_listings]
-            
-            # Get applications for these listings
-            applications = PropertyApplication.query.filter(
-                PropertyApplication.listing_id.in_(listing_ids)
-            ).order_by(PropertyApplication.created_at.desc()).all()
+            status = request.args.get('status', '', type=str)
+            limit = page_size(request.args.get('limit', type=int), default=50)
+            cursor = request.args.get('cursor')
+
+            # ✅ One joined query with only the columns the dashboard shows
+            query = db.session.query(
+                PropertyApplication.id,
+                PropertyApplication.listing_id,
+                PropertyApplication.status,
+                PropertyApplication.created_at,
+                PropertyApplication.applicant_name,
+                PropertyApplication.applicant_email,
+                PropertyApplication.applicant_phone,
+                PropertyApplication.monthly_income,
+                PropertyApplication.employment_status,
+                PropertyApplication.move_in_date,
+                PropertyApplication.lease_duration,
+                PropertyApplication.additional_notes,
+                Listing.title.label('listing_title'),
+                Listing.area.label('listing_area'),
+                Listing.city.label('listing_city'),
+                Listing.state.label('listing_state')
+            ).join(Listing, Listing.id == PropertyApplication.listing_id).filter(Listing.agent_id == agent_id)
+            if status:
+                query = query.filter(PropertyApplication.status == status)
+
+            # Total only on the first page (the dashboard keeps it while loading more)
+            total = query.count() if not cursor else None
+            applications, next_cursor = paginate_keyset(
+                query, [PropertyApplication.created_at, PropertyApplication.id], cursor, limit
+            )
             
             app_list = []
             for app in applications:
-                listing = Listing.query.get(app.listing_id)
                 app_list.append({
                     'application_id': app.id,
                     'listing_id': app.listing_id,
-                    'property_title': listing.title if listing else 'Unknown Property',
-                    'property_location': f"{listing.area}, {listing.city}, {listing.state}" if listing else 'Unknown Location',
+                    'property_title': app.listing_title,
+                    'property_location': f"{app.listing_area}, {app.listing_city}, {app.listing_state}",
                     'status': app.status,
-                    'created_at': app.created_at,
+                    'created_at': app.created_at.isoformat() if app.created_at else None,
                     'applicant_name': app.applicant_name,
                     'applicant_email': app.applicant_email,
                     'applicant_phone': app.applicant_phone,
@@ -3605,7 +3325,10 @@ def create_app():
             return jsonify({
                 'success': True,
                 'applications': app_list,
-                'count': len(app_list)
+                'count': len(app_list),
+                'total': total,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }), 200
             
         except Exception as e:
@@ -3614,25 +3337,55 @@ def create_app():
     @app.route('/api/agent/<int:agent_id>/bookings', methods=['GET'])
     @cross_origin()
     def get_agent_bookings(agent_id):
-        """Get all viewing bookings for an agent's listings"""
+        """
+        Viewing bookings for an agent's listings, latest viewing date first.
+
+        Query params: status (pending/confirmed/cancelled), limit, cursor (from next_cursor).
+        The first page also carries the total number of matching bookings.
+        """
         try:
-            # Get all listings by this agent
-            agent_listings = Listing.query.filter_by(agent_id=agent_id).all()
-            listing_ids = [listing.id for listing in agent_listings]
-            
-            # Get bookings for these listings
-            bookings = ViewingBooking.query.filter(
-                ViewingBooking.listing_id.in_(listing_ids)
-            ).order_by(ViewingBooking.preferred_date.desc(), ViewingBooking.preferred_time.desc()).all()
+            status = request.args.get('status', '', type=str)
+            limit = page_size(request.args.get('limit', type=int), default=50)
+            cursor = request.args.get('cursor')
+
+            # ✅ One joined query with only the columns the dashboard shows
+            query = db.session.query(
+                ViewingBooking.id,
+                ViewingBooking.listing_id,
+                ViewingBooking.status,
+                ViewingBooking.created_at,
+                ViewingBooking.viewer_name,
+                ViewingBooking.viewer_email,
+                ViewingBooking.viewer_phone,
+                ViewingBooking.preferred_date,
+                ViewingBooking.preferred_time,
+                ViewingBooking.alternative_date,
+                ViewingBooking.alternative_time,
+                ViewingBooking.special_requirements,
+                Listing.title.label('listing_title'),
+                Listing.area.label('listing_area'),
+                Listing.city.label('listing_city'),
+                Listing.state.label('listing_state')
+            ).join(Listing, Listing.id == ViewingBooking.listing_id).filter(Listing.agent_id == agent_id)
+            if status:
+                query = query.filter(ViewingBooking.status == status)
+
+            # Total only on the first page (the dashboard keeps it while loading more)
+            total = query.count() if not cursor else None
+            bookings, next_cursor = paginate_keyset(
+                query,
+                [ViewingBooking.preferred_date, ViewingBooking.preferred_time, ViewingBooking.id],
+                cursor,
+                limit
+            )
             
             booking_list = []
             for booking in bookings:
-                listing = Listing.query.get(booking.listing_id)
                 booking_list.append({
                     'booking_id': booking.id,
                     'listing_id': booking.listing_id,
-                    'property_title': listing.title if listing else 'Unknown Property',
-                    'property_location': f"{listing.area}, {listing.city}, {listing.state}" if listing else 'Unknown Location',
+                    'property_title': booking.listing_title,
+                    'property_location': f"{booking.listing_area}, {booking.listing_city}, {booking.listing_state}",
                     'status': booking.status,
                     'created_at': booking.created_at,
                     'viewer_name': booking.viewer_name,
@@ -3648,7 +3401,10 @@ def create_app():
             return jsonify({
                 'success': True,
                 'bookings': booking_list,
-                'count': len(booking_list)
+                'count': len(booking_list),
+                'total': total,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }), 200
             
         except Exception as e:
@@ -3854,6 +3610,7 @@ def create_app():
             units_data = data.get('units')
             if units_data:
                 try:
+                    new_units = []
                     for unit in units_data:
                         new_unit = Unit(
                             listing_id=new_property.id,
@@ -3866,6 +3623,8 @@ def create_app():
                             is_available=unit.get('is_available', True)
                         )
                         db.session.add(new_unit)
+                        new_units.append(new_unit)
+                    new_property.refresh_unit_summary(new_units)
                     db.session.commit()
                 except Exception as e:
                     print("Error parsing units JSON data", e)
@@ -3896,22 +3655,98 @@ def expire_promotions():
         if expired:
             db.session.commit()
             print(f"Expired {len(expired)} promotions.")
-            
-# --- Ensure all image paths are Supabase URLs ---
-def to_supabase_url(path, bucket):
-    if not path:
-        return None
-    if path.startswith('http://') or path.startswith('https://'):
-        return path
-    # Assume public bucket
-    base_url = settings.SUPABASE_PUBLIC_URL
-    return f"{base_url}/{bucket}/{path}"
+
+def refresh_neighbors_job():
+    with app.app_context():
+        try:
+            refresh_listing_neighbors()
+        except Exception as e:
+            print(f"Listing neighbour job failed: {e}")
+
+def rebuild_recommender_state_job():
+    # Periodic full rebuild (picks up unsaves); requests keep the previous snapshot meanwhile
+    with app.app_context():
+        try:
+            get_recommender_state().refresh(force_full=True)
+        except Exception as e:
+            print(f"Recommender state rebuild job failed: {e}")
+
+def publish_recommender_store_job():
+    with app.app_context():
+        try:
+            publish_recommender_store()
+        except Exception as e:
+            print(f"Feature store publish job failed: {e}")
+
+def refresh_user_recommendations_job(full=False):
+    with app.app_context():
+        try:
+            # The full run only happens when the last one is older than USER_RECS_FULL_SECONDS
+            if full:
+                refresh_user_recommendations_if_due()
+            else:
+                refresh_user_recommendations()
+        except Exception as e:
+            print(f"User recommendation job failed: {e}")
+
+def refresh_reels_index_job():
+    with app.app_context():
+        try:
+            refresh_reels_index()
+        except Exception as e:
+            print(f"Reels index job failed: {e}")
+
+def rescale_trending_job():
+    try:
+        rescale_trending(min_age_hours=TRENDING_RESCALE_HOURS)
+    except Exception as e:
+        print(f"Trending rescale job failed: {e}")
+
+def train_als_job():
+    # Training runs in its own process; the model is picked up when the artifact changes
+    try:
+        start_background_training()
+    except Exception as e:
+        print(f"ALS training job failed to start: {e}")
 
 app = create_app()
 
 # Start APScheduler job (runs in both dev and prod)
 scheduler = BackgroundScheduler()
 scheduler.add_job(func=expire_promotions, trigger="interval", minutes=30)
+# Content-based neighbour table (first run shortly after startup)
+scheduler.add_job(
+    func=refresh_neighbors_job, trigger="interval", hours=1,
+    next_run_time=datetime.now() + timedelta(seconds=30)
+)
+# Full recommender state rebuild (incremental refreshes happen on request)
+scheduler.add_job(func=rebuild_recommender_state_job, trigger="interval", seconds=FULL_REBUILD_SECONDS)
+# Memory-mapped recommender artifacts shared by the workers (first version shortly after startup)
+scheduler.add_job(
+    func=publish_recommender_store_job, trigger="interval", minutes=5,
+    next_run_time=datetime.now() + timedelta(seconds=15)
+)
+# Precomputed user recommendations: incremental every 10 minutes; hourly check that starts
+# a full rebuild only when user_recs:meta says the last one is over 6 hours old
+scheduler.add_job(func=refresh_user_recommendations_job, trigger="interval", minutes=10)
+scheduler.add_job(func=refresh_user_recommendations_job, trigger="interval", hours=1, kwargs={"full": True})
+# Reels index and global reels candidates
+scheduler.add_job(
+    func=refresh_reels_index_job, trigger="interval", minutes=10,
+    next_run_time=datetime.now() + timedelta(seconds=45)
+)
+# Move the trending decay epoch forward (keeps scores small) and trim the sets. Checked
+# hourly so worker recycling cannot starve it; rescales once the epoch is TRENDING_RESCALE_HOURS old
+scheduler.add_job(
+    func=rescale_trending_job, trigger="interval", hours=1,
+    next_run_time=datetime.now() + timedelta(minutes=1)
+)
+# Implicit ALS factors (warm-started from the previous artifact). Hourly check: a run starts
+# only when the model is older than ALS_TRAIN_INTERVAL and no other process is training
+scheduler.add_job(
+    func=train_als_job, trigger="interval", hours=1,
+    next_run_time=datetime.now() + timedelta(minutes=2)
+)
 scheduler.start()
 
 # if __name__ == '__main__':
@@ -0,0 +1,8 @@
+"""
+Benchmarks for the recommender (synthetic data, latency/memory, offline accuracy).
+
+Run from the pipeline directory, e.g.:
+    python -m benchmarks.run generate --db sqlite:///bench.db --interactions 100000
+    python -m benchmarks.run latency  --db sqlite:///bench.db
+    python -m benchmarks.run evaluate --db sqlite:///bench.db --k 10
+"""
@@ -0,0 +1,122 @@
+"""
+Offline accuracy with a time split: hit-rate@K and NDCG@K.
+
+Interactions before the cutoff (the 1 - test_fraction quantile of created_at)
+train each method; a user's relevant set is the listings they interact with
+after the cutoff and had not touched before. Only users with history on both
+sides are scored.
+
+Methods:
+    popularity    most interacted-with listings in the training window
+    user_cf       helpers.sparse_user_user_recs on the training matrix
+    content       listing_neighbors scores for the user's latest training listing
+    als           als_model factors trained on the training matrix (optional)
+"""
+import numpy as np
+from sqlalchemy import select
+
+from helpers import (
+    INTERACTION_CODES, INTERACTION_DTYPES, interaction_code, read_sql_frame, sparse_user_user_recs
+)
+from listing_neighbors import neighbors_for
+from recommender_state import RecommenderState, build_snapshot
+from supabase_models import Interaction
+
+
+def load_interactions():
+    """All view/saved interactions as a DataFrame ordered by time."""
+    query = select(
+        Interaction.id, Interaction.user_id, Interaction.listing_id, Interaction.created_at,
+        interaction_code().label("interaction_type")
+    ).where(Interaction.interaction_type.in_(list(INTERACTION_CODES)))
+    df = read_sql_frame(query, dtype=INTERACTION_DTYPES)
+    df["weight"] = df["interaction_type"].astype(np.float32)
+    return df.sort_values(["created_at", "id"], kind="stable").reset_index(drop=True)
+
+
+def time_split(df, test_fraction=0.2):
+    cutoff = df["created_at"].quantile(1 - test_fraction)
+    return df[df["created_at"] < cutoff], df[df["created_at"] >= cutoff], cutoff
+
+
+def hit_rate_and_ndcg(recs, relevant, k):
+    recs = recs[:k]
+    gains = [1.0 if listing_id in relevant else 0.0 for listing_id in recs]
+    dcg = sum(gain / np.log2(rank + 2) for rank, gain in enumerate(gains))
+    ideal = sum(1.0 / np.log2(rank + 2) for rank in range(min(len(relevant), k)))
+    return float(any(gains)), (dcg / ideal if ideal else 0.0)
+
+
+def evaluate(k=10, test_fraction=0.2, max_users=2000, als=False, seed=3):
+    """
+    Score every method on a time split.
+
+    Returns:
+        dict: method -> {"hit_rate": ..., "ndcg": ..., "users": ...}, plus split info.
+    """
+    df = load_interactions()
+    train, test, cutoff = time_split(df, test_fraction)
+    listings = RecommenderState()._load_listings()
+    train = train.sort_values("id", kind="stable")
+    snapshot = build_snapshot(
+        train["id"].to_numpy(dtype=np.int64), train["user_id"].to_numpy(dtype=np.int64),
+        train["listing_id"].to_numpy(dtype=np.int64), train["weight"].to_numpy(dtype=np.float32),
+        listings
+    )
+
+    # Relevant = new listings after the cutoff, for users with training history
+    seen = train.groupby("user_id")["listing_id"].agg(set)
+    future = test.groupby("user_id")["listing_id"].agg(set)
+    users = [u for u in future.index if u in seen.index and future[u] - seen[u]]
+    rng = np.random.default_rng(seed)
+    if len(users) > max_users:
+        users = list(rng.choice(users, size=max_users, replace=False))
+
+    last_listing = train.groupby("user_id")["listing_id"].last()
+    neighbors = neighbors_for(
+        list(dict.fromkeys(int(last_listing[u]) for u in users)), listings, k + 50
+    )
+    popular = [int(snapshot.listing_ids[i]) for i in np.argsort(-snapshot.listing_counts, kind="stable")]
+
+    als_model = None
+    if als:
+        from als_model import ALSModel, train as train_als
+        user_factors, item_factors = train_als(snapshot.matrix, snapshot.user_ids, snapshot.listing_ids)
+        als_model = ALSModel(user_factors, item_factors, snapshot.user_ids, snapshot.listing_ids)
+
+    def recommend(method, user_id):
+        user_seen = seen[user_id]
+        if method == "popularity":
+            return [i for i in popular[:k + len(user_seen)] if i not in user_seen][:k]
+        if method == "user_cf":
+            cols = sparse_user_user_recs(
+                snapshot.user_index[user_id], k, snapshot.matrix,
+                snapshot.user_counts, snapshot.popularity_rank
+            )
+            return [int(snapshot.listing_ids[c]) for c in cols]
+        if method == "content":
+            pairs = neighbors.get(int(last_listing[user_id]), [])
+            return [i for i, _ in pairs if i not in user_seen][:k]
+        return als_model.recommend(user_id, k, exclude_ids=user_seen)
+
+    methods = ["popularity", "user_cf", "content"] + (["als"] if als else [])
+    results = {
+        "split": {
+            "cutoff": str(cutoff),
+            "train_interactions": int(len(train)),
+            "test_interactions": int(len(test)),
+            "users_scored": len(users),
+            "k": k
+        }
+    }
+    for method in methods:
+        hits, ndcgs = [], []
+        for user_id in users:
+            hit, ndcg = hit_rate_and_ndcg(recommend(method, int(user_id)), future[user_id] - seen[user_id], k)
+            hits.append(hit)
+            ndcgs.append(ndcg)
+        results[method] = {
+            "hit_rate": round(float(np.mean(hits)), 4) if hits else None,
+            "ndcg": round(float(np.mean(ndcgs)), 4) if ndcgs else None,
+        }
+    return results
@@ -0,0 +1,78 @@
+"""
+Latency and peak-memory measurements for the Recommender methods.
+
+Each method is called once per sampled user (content_based with a listing the
+user interacted with). The timing covers the whole method, including its final
+listings query. Peak memory is measured with tracemalloc, which also traces
+numpy allocations. Redis-backed paths (trending, neighbour tables, precomputed
+recs) are only used with run.py --use-redis; artifacts come from a temp directory.
+"""
+import time
+import tracemalloc
+
+import numpy as np
+
+from recommender import Recommender
+from recommender_state import RecommenderState
+
+
+def _summary(samples_ms, peak_bytes):
+    samples = np.asarray(samples_ms)
+    return {
+        "calls": int(len(samples)),
+        "mean_ms": round(float(samples.mean()), 3) if len(samples) else None,
+        "p50_ms": round(float(np.percentile(samples, 50)), 3) if len(samples) else None,
+        "p95_ms": round(float(np.percentile(samples, 95)), 3) if len(samples) else None,
+        "max_ms": round(float(samples.max()), 3) if len(samples) else None,
+        "peak_mb": round(peak_bytes / 2 ** 20, 2)
+    }
+
+
+def measure_state_build():
+    """Time and peak memory of a full recommender state build (from the database, not the feature store)."""
+    state = RecommenderState(refresh_seconds=10 ** 9, full_rebuild_seconds=10 ** 9, use_store=False)
+    tracemalloc.start()
+    started = time.perf_counter()
+    snapshot = state.refresh(force_full=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = _summary([elapsed], peak)
+    result.update({
+        "users": int(len(snapshot.user_ids)),
+        "listings": int(len(snapshot.listing_ids)),
+        "nnz": int(snapshot.matrix.nnz)
+    })
+    return state, result
+
+
+def measure_methods(state, samples=200, rec_num=5, seed=11):
+    """
+    Per-call latency and peak memory of rank_based, user_rec and content_based.
+
+    Args:
+        state (RecommenderState): A built state (see measure_state_build).
+        samples (int): Users sampled (with interactions).
+    """
+    snapshot = state.current()
+    rng = np.random.default_rng(seed)
+    users = rng.choice(snapshot.user_ids, size=min(samples, len(snapshot.user_ids)), replace=False)
+
+    results = {}
+    for method in ("rank_based", "user_rec", "content_based"):
+        timings = []
+        tracemalloc.start()
+        for user_id in users:
+            user_id = int(user_id)
+            recommender = Recommender(user_id, rec_num=rec_num, state=state)
+            started = time.perf_counter()
+            if method == "content_based":
+                seen = snapshot.user_listing_ids(user_id)
+                recommender.content_based(seen[-1] if seen else int(snapshot.listing_ids[0]))
+            else:
+                getattr(recommender, method)()
+            timings.append((time.perf_counter() - started) * 1000)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[method] = _summary(timings, peak)
+    return results
@@ -0,0 +1,120 @@
+"""
+Benchmark CLI. Uses its own minimal Flask app bound to --db, so it never reads
+settings or touches the production database unless pointed at it. The ALS,
+listing-embedding and feature-store artifact directories point at a fresh temp
+directory, and Redis (trending sets, neighbour tables, precomputed recs) is
+disabled unless --use-redis is passed, so production state cannot leak into the
+numbers.
+
+    python -m benchmarks.run generate --db sqlite:///bench.db --interactions 1000000
+    python -m benchmarks.run latency  --db postgresql://localhost/casalinger_bench --samples 500
+    python -m benchmarks.run evaluate --db sqlite:///bench.db --k 10 --als
+    python -m benchmarks.run all      --db sqlite:///bench.db --interactions 100000 --output results.json
+"""
+import argparse
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from flask import Flask
+
+from supabase_models import db, Interaction
+
+
+# Read by als_model, listing_embeddings and feature_store at import time
+ARTIFACT_DIR_ENVS = ("ALS_ARTIFACT_DIR", "LISTING_EMBEDDINGS_DIR", "RECOMMENDER_STORE_DIR")
+
+
+def isolate_artifacts(use_redis=False):
+    """
+    Point the artifact directories at a temp directory (removed at exit) and, unless
+    use_redis, disable Redis. Must run before the recommender modules are imported.
+    """
+    root = tempfile.mkdtemp(prefix="casalinger-bench-")
+    atexit.register(shutil.rmtree, root, ignore_errors=True)
+    for name in ARTIFACT_DIR_ENVS:
+        os.environ[name] = os.path.join(root, name.lower())
+    if not use_redis:
+        import redis_helper
+
+        # The recommender modules import redis_client by name and check availability through it
+        redis_helper.redis_client = None
+
+
+def make_app(db_url):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = db_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def cmd_generate(args):
+    from benchmarks.synthetic import generate
+
+    db.create_all()
+    if db.session.query(Interaction.id).first() is not None and not args.append:
+        raise SystemExit("Database already has interactions; use a fresh database or pass --append")
+    started = time.time()
+    counts = generate(
+        n_interactions=args.interactions, n_users=args.users, n_listings=args.listings,
+        days=args.days, seed=args.seed
+    )
+    counts["seconds"] = round(time.time() - started, 1)
+    return {"generate": counts}
+
+
+def cmd_latency(args):
+    from benchmarks.latency import measure_methods, measure_state_build
+
+    state, build = measure_state_build()
+    return {"state_build": build, "methods": measure_methods(state, samples=args.samples)}
+
+
+def cmd_evaluate(args):
+    from benchmarks.evaluate import evaluate
+
+    return {"evaluate": evaluate(k=args.k, test_fraction=args.test_fraction, max_users=args.max_users, als=args.als)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommender benchmarks")
+    parser.add_argument("command", choices=["generate", "latency", "evaluate", "all"])
+    parser.add_argument("--db", default="sqlite:///bench.db", help="SQLAlchemy URL (SQLite or Postgres)")
+    parser.add_argument("--interactions", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=None)
+    parser.add_argument("--listings", type=int, default=None)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--append", action="store_true", help="Allow generating into a non-empty database")
+    parser.add_argument("--samples", type=int, default=200, help="Users sampled for latency")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--max-users", type=int, default=2000)
+    parser.add_argument("--als", action="store_true", help="Also train and score the ALS model")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--use-redis", action="store_true", help="Use the configured Redis (shared with production)")
+    args = parser.parse_args()
+
+    isolate_artifacts(use_redis=args.use_redis)
+    app = make_app(args.db)
+    results = {}
+    with app.app_context():
+        if args.command in ("generate", "all"):
+            results.update(cmd_generate(args))
+        if args.command in ("latency", "all"):
+            results.update(cmd_latency(args))
+        if args.command in ("evaluate", "all"):
+            results.update(cmd_evaluate(args))
+
+    print(json.dumps(results, indent=2, default=str))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
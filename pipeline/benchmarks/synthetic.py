@@ -0,0 +1,214 @@
+"""
+Synthetic Lagos/Abuja-style marketplace data for the recommender benchmarks.
+
+Generates agents, users, listings (10% complex listings with units) and
+view/saved interactions spread over a time window. Users have a home state,
+one or two preferred cities and a budget, and listing popularity is heavy-tailed,
+so collaborative and content signals both exist.
+Everything is vectorized with numpy and inserted in chunks, so 10M
+interactions fit in a few hundred MB.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import insert
+
+from supabase_models import db, Agent, User, Listing, Unit, Interaction
+
+# state -> city -> (areas, price tier: yearly rent multiplier)
+LOCATIONS = {
+    "Lagos": {
+        "Ikeja": (["Allen", "Opebi", "Alausa", "Oregun", "GRA"], 1.0),
+        "Lekki": (["Phase 1", "Chevron", "Ajah", "Osapa", "Ikate"], 2.2),
+        "Yaba": (["Akoka", "Sabo", "Alagomeji", "Onike"], 0.8),
+        "Surulere": (["Bode Thomas", "Adeniran Ogunsanya", "Aguda"], 0.9),
+        "Victoria Island": (["Oniru", "Adeola Odeku", "Ligali"], 3.0),
+        "Ikorodu": (["Agric", "Ijede", "Odogunyan"], 0.5),
+    },
+    "Abuja": {
+        "Garki": (["Area 1", "Area 2", "Area 11"], 1.2),
+        "Wuse": (["Zone 4", "Zone 6", "Wuse 2"], 1.8),
+        "Maitama": (["Maitama", "Aso Drive"], 3.0),
+        "Gwarinpa": (["1st Avenue", "3rd Avenue", "6th Avenue"], 1.0),
+        "Kubwa": (["Phase 4", "Arab Road", "Byazhin"], 0.5),
+        "Jabi": (["Jabi", "Utako"], 1.5),
+    },
+}
+TAGS = [
+    "serviced", "furnished", "new build", "gated estate", "24/7 power", "pool",
+    "gym", "parking", "borehole", "pet friendly", "ensuite", "bq", "waterfront", "short let"
+]
+BASE_RENT = 1_200_000  # NGN per year for a 1-bedroom in a tier-1.0 city
+CHUNK = 50_000
+
+
+def _location_table():
+    rows = []
+    for state, cities in LOCATIONS.items():
+        for city, (areas, tier) in cities.items():
+            for area in areas:
+                rows.append((state, city, area, tier))
+    return rows
+
+
+def _insert(table, rows):
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(insert(table), rows[start:start + CHUNK])
+    db.session.commit()
+
+
+def generate(n_interactions=100_000, n_users=None, n_listings=None, n_agents=None,
+             days=180, save_rate=0.15, seed=7):
+    """
+    Insert a synthetic dataset into the current app's database.
+
+    Args:
+        n_interactions (int): Total interactions (10k to 10M are practical).
+        n_users / n_listings / n_agents (int): Defaults scale with n_interactions.
+        days (int): Interactions are spread over the last `days` days.
+        save_rate (float): Share of interactions that are saves.
+
+    Returns:
+        dict: Row counts per table.
+    """
+    rng = np.random.default_rng(seed)
+    n_users = n_users or max(200, n_interactions // 25)
+    n_listings = n_listings or max(300, n_interactions // 100)
+    n_agents = n_agents or max(20, n_listings // 40)
+    now = datetime.utcnow()
+    start_time = now - timedelta(days=days)
+
+    locations = _location_table()
+    loc_state = np.array([loc[0] for loc in locations])
+    loc_city = np.array([loc[1] for loc in locations])
+    loc_area = np.array([loc[2] for loc in locations])
+    loc_tier = np.array([loc[3] for loc in locations])
+    lagos = loc_state == "Lagos"
+
+    # --- agents and users ---
+    _insert(Agent.__table__, [
+        {"id": i + 1, "name": f"Agent {i + 1}", "email": f"agent{i + 1}@bench.casalinger",
+         "agent_type": "agent", "created_at": start_time, "onboarding_complete": True}
+        for i in range(n_agents)
+    ])
+    _insert(User.__table__, [
+        {"id": i + 1, "name": f"User {i + 1}", "email": f"user{i + 1}@bench.casalinger",
+         "created_at": start_time, "onboarding_complete": True}
+        for i in range(n_users)
+    ])
+
+    # --- listings (Lagos ~65% of supply) ---
+    loc_weights = np.where(lagos, 0.65 / lagos.sum(), 0.35 / (~lagos).sum())
+    listing_loc = rng.choice(len(locations), size=n_listings, p=loc_weights)
+    bedrooms = rng.choice([1, 2, 3, 4, 5], size=n_listings, p=[0.3, 0.32, 0.23, 0.1, 0.05])
+    bathrooms = bedrooms + rng.choice([0, 1], size=n_listings, p=[0.6, 0.4])
+    price = np.round(
+        BASE_RENT * loc_tier[listing_loc] * (0.6 + 0.5 * bedrooms) * rng.lognormal(0, 0.25, n_listings), -4
+    )
+    complex_mask = rng.random(n_listings) < 0.1
+    created = start_time - timedelta(days=90) + rng.random(n_listings) * timedelta(days=days + 90)
+    listing_tags = [
+        ", ".join(rng.choice(TAGS, size=rng.integers(1, 5), replace=False)) for _ in range(n_listings)
+    ]
+
+    listing_rows = []
+    unit_rows = []
+    unit_id = 1
+    for i in range(n_listings):
+        listing_id = i + 1
+        row = {
+            "id": listing_id,
+            "agent_id": int(rng.integers(1, n_agents + 1)),
+            "title": f"{int(bedrooms[i])} Bedroom {'Apartments' if complex_mask[i] else 'Flat'} in {loc_area[listing_loc[i]]}",
+            "description": "Synthetic benchmark listing",
+            "price": float(price[i]),
+            "bedrooms": int(bedrooms[i]),
+            "bathrooms": float(bathrooms[i]),
+            "state": str(loc_state[listing_loc[i]]),
+            "city": str(loc_city[listing_loc[i]]),
+            "area": str(loc_area[listing_loc[i]]),
+            "tags": listing_tags[i],
+            "created_at": created[i],
+            "listing_type": "individual",
+            "rent_period": "year",
+        }
+        if complex_mask[i]:
+            n_units = int(rng.integers(2, 5))
+            unit_beds = np.sort(rng.choice([1, 2, 3, 4], size=n_units))
+            unit_prices = np.round(price[i] * (0.6 + 0.3 * unit_beds) / (0.6 + 0.3 * bedrooms[i]), -4)
+            for beds, unit_price in zip(unit_beds, unit_prices):
+                unit_rows.append({
+                    "id": unit_id, "listing_id": listing_id, "name": f"{int(beds)} Bed Unit",
+                    "bedrooms": int(beds), "bathrooms": float(beds), "price_min": float(unit_price),
+                    "price_max": float(unit_price * 1.1), "is_available": True, "created_at": created[i]
+                })
+                unit_id += 1
+            row.update({
+                "listing_type": "complex", "bedrooms": 0, "bathrooms": 0, "price": 0,
+                "unit_price_min": float(unit_prices.min()), "unit_price_max": float(unit_prices.max() * 1.1),
+                "unit_bedrooms_min": int(unit_beds.min()), "unit_bedrooms_max": int(unit_beds.max()),
+                "unit_bathrooms_min": float(unit_beds.min()), "unit_bathrooms_max": float(unit_beds.max()),
+            })
+        listing_rows.append(row)
+    _insert(Listing.__table__, listing_rows)
+    _insert(Unit.__table__, unit_rows)
+
+    # --- interactions ---
+    # Heavy-tailed popularity, users prefer their own cities and budget
+    popularity = rng.zipf(1.6, n_listings).astype(np.float64)
+    popularity = np.minimum(popularity, 500) / 500
+    listing_city = loc_city[listing_loc]
+    cities = np.unique(loc_city)
+    city_code = np.searchsorted(cities, listing_city)
+    by_city = [np.flatnonzero(city_code == c) for c in range(len(cities))]
+    city_pop = [popularity[idx] / popularity[idx].sum() for idx in by_city]
+    user_city = rng.integers(0, len(cities), size=n_users)
+    user_city2 = rng.integers(0, len(cities), size=n_users)
+    # A few very active users, many casual ones
+    activity = rng.pareto(1.5, n_users) + 1
+    activity /= activity.sum()
+
+    interaction_id = 1
+    remaining = n_interactions
+    while remaining > 0:
+        size = min(CHUNK, remaining)
+        users = rng.choice(n_users, size=size, p=activity)
+        pick_city = np.where(rng.random(size) < 0.75, user_city[users], user_city2[users])
+        explore = rng.random(size) < 0.15
+        pick_city[explore] = rng.integers(0, len(cities), size=explore.sum())
+        listing_idx = np.empty(size, dtype=np.int64)
+        for c in range(len(cities)):
+            mask = pick_city == c
+            if mask.any():
+                listing_idx[mask] = rng.choice(by_city[c], size=mask.sum(), p=city_pop[c])
+        # Interest grows over the window (more recent activity)
+        offsets = (rng.random(size) ** 0.7) * days * 86400
+        saved = rng.random(size) < save_rate
+
+        rows = []
+        for j in range(size):
+            li = listing_idx[j]
+            rows.append({
+                "id": interaction_id,
+                "user_id": int(users[j]) + 1,
+                "listing_id": int(li) + 1,
+                "interaction_type": "saved" if saved[j] else "view",
+                "title": listing_rows[li]["title"],
+                "state": listing_rows[li]["state"],
+                "city": listing_rows[li]["city"],
+                "area": listing_rows[li]["area"],
+                "tags": listing_rows[li]["tags"],
+                "created_at": start_time + timedelta(seconds=float(offsets[j])),
+            })
+            interaction_id += 1
+        _insert(Interaction.__table__, rows)
+        remaining -= size
+        print(f"  interactions: {n_interactions - remaining}/{n_interactions}")
+
+    return {
+        "agents": n_agents,
+        "users": n_users,
+        "listings": n_listings,
+        "units": len(unit_rows),
+        "interactions": n_interactions
+    }
@@ -0,0 +1,110 @@
+"""
+Response compression for the Flask app (gzip, and brotli when installed).
+
+Configured through app.config, with defaults taken from the environment:
+    COMPRESS_ENABLED      "true" / "false"                 (default true)
+    COMPRESS_ALGORITHMS   preference order, comma separated (default "br,gzip")
+    COMPRESS_MIN_SIZE     smallest body in bytes to compress (default 500)
+    COMPRESS_MIMETYPES    content-type allowlist, comma separated
+    COMPRESS_LEVEL        gzip level 1-9                    (default 6)
+    COMPRESS_BR_LEVEL     brotli quality 0-11               (default 4)
+"""
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'application/json',
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/javascript',
+    'application/javascript',
+    'text/csv',
+)
+
+
+def _env_list(name, default):
+    value = os.getenv(name)
+    if not value:
+        return list(default)
+    return [item.strip().lower() for item in value.split(',') if item.strip()]
+
+
+def _choose_encoding(algorithms):
+    """Pick the first configured algorithm the client accepts."""
+    accepted = request.accept_encodings
+    for algorithm in algorithms:
+        if algorithm == 'br' and brotli is None:
+            continue
+        if accepted[algorithm] > 0:
+            return algorithm
+    return None
+
+
+def _should_compress(response, min_size, mimetypes):
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    # Never re-compress bodies that already carry an encoding (or are partial)
+    if 'Content-Encoding' in response.headers or 'Content-Range' in response.headers:
+        return False
+    if response.mimetype not in mimetypes:
+        return False
+    return response.content_length is None or response.content_length >= min_size
+
+
+def init_compression(app):
+    """
+    Register an after_request hook that compresses eligible responses.
+
+    Args:
+        app (Flask): The application created in create_app.
+    """
+    app.config.setdefault('COMPRESS_ENABLED', os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true')
+    app.config.setdefault('COMPRESS_ALGORITHMS', _env_list('COMPRESS_ALGORITHMS', ('br', 'gzip')))
+    app.config.setdefault('COMPRESS_MIN_SIZE', int(os.getenv('COMPRESS_MIN_SIZE', 500)))
+    app.config.setdefault('COMPRESS_MIMETYPES', _env_list('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES))
+    app.config.setdefault('COMPRESS_LEVEL', int(os.getenv('COMPRESS_LEVEL', 6)))
+    app.config.setdefault('COMPRESS_BR_LEVEL', int(os.getenv('COMPRESS_BR_LEVEL', 4)))
+
+    @app.after_request
+    def compress_response(response):
+        config = app.config
+        if not config['COMPRESS_ENABLED']:
+            return response
+        if not _should_compress(response, config['COMPRESS_MIN_SIZE'], config['COMPRESS_MIMETYPES']):
+            return response
+
+        # Responses vary by Accept-Encoding whether or not this one is compressed
+        response.vary.add('Accept-Encoding')
+
+        encoding = _choose_encoding(config['COMPRESS_ALGORITHMS'])
+        if encoding is None:
+            return response
+
+        body = response.get_data()
+        if len(body) < config['COMPRESS_MIN_SIZE']:
+            return response
+
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=config['COMPRESS_BR_LEVEL'])
+        else:
+            compressed = gzip.compress(body, compresslevel=config['COMPRESS_LEVEL'])
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        response.headers['Content-Length'] = str(len(compressed))
+        # A strong ETag would now describe the wrong bytes
+        if response.get_etag()[0] and not response.get_etag()[1]:
+            response.set_etag(response.get_etag()[0], weak=True)
+        return response
+
+    return app
@@ -0,0 +1,31 @@
+-- Unit range summaries for complex listings (Supabase / Postgres)
+-- Maintained by create_listing / update_listing via Listing.refresh_unit_summary
+
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS unit_price_min DOUBLE PRECISION;
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS unit_price_max DOUBLE PRECISION;
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS unit_bedrooms_min INTEGER;
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS unit_bedrooms_max INTEGER;
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS unit_bathrooms_min DOUBLE PRECISION;
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS unit_bathrooms_max DOUBLE PRECISION;
+
+-- Backfill existing complex listings from their units
+UPDATE listings l
+SET unit_price_min = s.price_lo,
+    unit_price_max = s.price_hi,
+    unit_bedrooms_min = s.beds_lo,
+    unit_bedrooms_max = s.beds_hi,
+    unit_bathrooms_min = s.baths_lo,
+    unit_bathrooms_max = s.baths_hi
+FROM (
+    SELECT listing_id,
+           LEAST(MIN(price_min) FILTER (WHERE price_min > 0), MIN(price_max) FILTER (WHERE price_max > 0)) AS price_lo,
+           GREATEST(MAX(price_min) FILTER (WHERE price_min > 0), MAX(price_max) FILTER (WHERE price_max > 0)) AS price_hi,
+           MIN(bedrooms) FILTER (WHERE bedrooms > 0) AS beds_lo,
+           MAX(bedrooms) FILTER (WHERE bedrooms > 0) AS beds_hi,
+           MIN(bathrooms) FILTER (WHERE bathrooms > 0) AS baths_lo,
+           MAX(bathrooms) FILTER (WHERE bathrooms > 0) AS baths_hi
+    FROM units
+    GROUP BY listing_id
+) s
+WHERE l.id = s.listing_id
+  AND l.listing_type = 'complex';
@@ -0,0 +1,65 @@
+-- Pre-aggregated interaction counters per listing (Supabase / Postgres)
+-- Read by get_agent_listings via listing_stats.get_view_counts; the app falls back
+-- to a GROUP BY over interactions until this table exists.
+
+CREATE TABLE IF NOT EXISTS listing_stats (
+    listing_id INTEGER PRIMARY KEY REFERENCES listings(id) ON DELETE CASCADE,
+    view_count INTEGER NOT NULL DEFAULT 0,
+    save_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'utc')
+);
+
+CREATE INDEX IF NOT EXISTS idx_interactions_listing_type
+    ON interactions (listing_id, interaction_type);
+
+-- Keep the counters in step with every insert/delete on interactions
+CREATE OR REPLACE FUNCTION bump_listing_stats() RETURNS TRIGGER AS $$
+DECLARE
+    target_listing INTEGER;
+    target_type TEXT;
+    delta INTEGER;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        target_listing := NEW.listing_id;
+        target_type := NEW.interaction_type;
+        delta := 1;
+    ELSE
+        target_listing := OLD.listing_id;
+        target_type := OLD.interaction_type;
+        delta := -1;
+    END IF;
+
+    IF target_type NOT IN ('view', 'saved') THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO listing_stats AS s (listing_id, view_count, save_count, updated_at)
+    VALUES (
+        target_listing,
+        GREATEST(CASE WHEN target_type = 'view' THEN delta ELSE 0 END, 0),
+        GREATEST(CASE WHEN target_type = 'saved' THEN delta ELSE 0 END, 0),
+        NOW() AT TIME ZONE 'utc'
+    )
+    ON CONFLICT (listing_id) DO UPDATE SET
+        view_count = GREATEST(s.view_count + CASE WHEN target_type = 'view' THEN delta ELSE 0 END, 0),
+        save_count = GREATEST(s.save_count + CASE WHEN target_type = 'saved' THEN delta ELSE 0 END, 0),
+        updated_at = NOW() AT TIME ZONE 'utc';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_interactions_listing_stats ON interactions;
+CREATE TRIGGER trg_interactions_listing_stats
+    AFTER INSERT OR DELETE ON interactions
+    FOR EACH ROW EXECUTE FUNCTION bump_listing_stats();
+
+-- Backfill from existing interactions
+INSERT INTO listing_stats (listing_id, view_count, save_count)
+SELECT listing_id,
+       COUNT(*) FILTER (WHERE interaction_type = 'view'),
+       COUNT(*) FILTER (WHERE interaction_type = 'saved')
+FROM interactions
+GROUP BY listing_id
+ON CONFLICT (listing_id) DO UPDATE SET
+    view_count = EXCLUDED.view_count,
+    save_count = EXCLUDED.save_count;
@@ -0,0 +1,17 @@
+-- property_applications.created_at: ISO string -> indexed timestamp (Supabase / Postgres)
+-- Agent dashboards page applications by (created_at, id) and bookings by
+-- (preferred_date, preferred_time, id) joined through listings.agent_id.
+
+ALTER TABLE property_applications
+    ALTER COLUMN created_at TYPE TIMESTAMP USING created_at::timestamp;
+ALTER TABLE property_applications
+    ALTER COLUMN created_at SET DEFAULT (NOW() AT TIME ZONE 'utc');
+
+CREATE INDEX IF NOT EXISTS idx_property_applications_listing_created
+    ON property_applications (listing_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_property_applications_created_at
+    ON property_applications (created_at);
+CREATE INDEX IF NOT EXISTS idx_viewing_bookings_listing_date
+    ON viewing_bookings (listing_id, preferred_date DESC, preferred_time DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_listings_agent_id
+    ON listings (agent_id);
@@ -0,0 +1,12 @@
+-- Indexes for the paginated community feed (Supabase / Postgres)
+-- Posts are paged by (timestamp, id); comments, likes and comment likes are
+-- fetched per page with post_id / comment_id IN (...) queries.
+
+CREATE INDEX IF NOT EXISTS idx_community_posts_timestamp_id
+    ON community_posts (timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_community_comments_post_id
+    ON community_comments (post_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_community_likes_post_id
+    ON community_likes (post_id);
+CREATE INDEX IF NOT EXISTS idx_community_comment_likes_comment_id
+    ON community_comment_likes (comment_id);
@@ -0,0 +1,14 @@
+-- Denormalized like/comment counters for the community feed (Supabase / Postgres)
+-- Kept current by like_community_post, like_community_comment and add_comment.
+
+ALTER TABLE community_posts ADD COLUMN IF NOT EXISTS like_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE community_posts ADD COLUMN IF NOT EXISTS comment_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE community_comments ADD COLUMN IF NOT EXISTS like_count INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill from existing rows
+UPDATE community_posts p
+SET like_count = COALESCE((SELECT COUNT(*) FROM community_likes l WHERE l.post_id = p.id), 0),
+    comment_count = COALESCE((SELECT COUNT(*) FROM community_comments c WHERE c.post_id = p.id), 0);
+
+UPDATE community_comments c
+SET like_count = COALESCE((SELECT COUNT(*) FROM community_comment_likes l WHERE l.comment_id = c.id), 0);
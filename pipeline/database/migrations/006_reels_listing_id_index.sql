@@ -0,0 +1,6 @@
+-- Index for the reels feed (Supabase / Postgres)
+-- The reels index is built from listings with `id IN (SELECT DISTINCT listing_id FROM reels)`
+-- and reels are batch-loaded with `listing_id IN (...)`; both need this index.
+
+CREATE INDEX IF NOT EXISTS idx_reels_listing_id
+    ON reels (listing_id);
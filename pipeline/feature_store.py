@@ -0,0 +1,321 @@
+"""
+Versioned, memory-mapped recommender artifacts shared by all workers.
+
+A background job publishes the recommender snapshot as plain .npy files in a
+new version directory and then points CURRENT at it:
+
+    {RECOMMENDER_STORE_DIR}/CURRENT                   name of the live version, e.g. v00000042
+    {RECOMMENDER_STORE_DIR}/v00000042/manifest.json   watermark, shapes, location categories
+    {RECOMMENDER_STORE_DIR}/v00000042/*.npy           CSR arrays, id maps, counts, interactions,
+                                                      listing columns, normalized listing features,
+                                                      neighbour table
+
+A version directory is complete before it gets its final name (os.rename) and
+CURRENT is swapped with os.replace, so readers see the old or the new version,
+never a partial one. Workers np.load(mmap_mode="r") the arrays: the pages live
+once in the OS page cache instead of each gunicorn worker holding its own
+pandas/scipy copies. A worker hot-swaps by replacing its snapshot reference;
+requests still holding the previous snapshot keep reading its files, which stay
+valid after the publisher prunes old versions.
+
+Run manually with:  python feature_store.py [--full]
+"""
+import fcntl
+import json
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from helpers import LOCATION_COLUMNS
+from listing_neighbors import listing_features
+
+STORE_DIR = os.getenv(
+    "RECOMMENDER_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts", "recommender")
+)
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = "publish.lock"
+FORMAT = 1
+# Published versions kept on disk (the live one included)
+KEEP_VERSIONS = int(os.getenv("RECOMMENDER_STORE_KEEP_VERSIONS", 3))
+# Workers build from the database instead when the publisher has not confirmed the live version for this long
+MAX_AGE_SECONDS = int(os.getenv("RECOMMENDER_STORE_MAX_AGE", 30 * 60))
+
+NEIGHBOR_ARRAYS = ("neighbors_ids", "neighbors_top", "neighbors_scores")
+LISTING_NUMERIC_COLUMNS = ("id", "bedrooms", "bathrooms", "price")
+VERSION_PATTERN = re.compile(r"^v\d{8}$")
+
+
+def _version_name(version):
+    return f"v{version:08d}"
+
+
+def current_version(store_dir=STORE_DIR):
+    """Name of the live version (None when nothing has been published)."""
+    try:
+        with open(os.path.join(store_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(name, store_dir=STORE_DIR):
+    with open(os.path.join(store_dir, name, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def _write_manifest(version_dir, manifest):
+    tmp_path = os.path.join(version_dir, f"{MANIFEST_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(version_dir, MANIFEST_FILE))
+
+
+def is_fresh(name, store_dir=STORE_DIR, max_age=MAX_AGE_SECONDS):
+    """Whether a version was confirmed current by the publisher less than max_age seconds ago."""
+    return time.time() - read_manifest(name, store_dir)["checked_at"] <= max_age
+
+
+# --- writing ------------------------------------------------------------------
+
+def _save(version_dir, name, array):
+    np.save(os.path.join(version_dir, f"{name}.npy"), np.ascontiguousarray(array))
+
+
+def _link_or_copy(src_dir, dst_dir, name):
+    src = os.path.join(src_dir, f"{name}.npy")
+    dst = os.path.join(dst_dir, f"{name}.npy")
+    try:
+        os.link(src, dst)  # versions are immutable, so unchanged arrays can share an inode
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _write_arrays(version_dir, snapshot):
+    """Snapshot arrays and the manifest fields describing them."""
+    matrix = snapshot.matrix
+    if not matrix.has_canonical_format:
+        matrix = matrix.copy()
+        matrix.sum_duplicates()
+    # int32 indices when they fit, so scipy wraps the mapped arrays without converting them
+    index_dtype = np.int32 if max(matrix.nnz, matrix.shape[1]) < 2 ** 31 else np.int64
+    _save(version_dir, "matrix_indptr", matrix.indptr.astype(index_dtype, copy=False))
+    _save(version_dir, "matrix_indices", matrix.indices.astype(index_dtype, copy=False))
+    _save(version_dir, "matrix_data", matrix.data.astype(np.float32, copy=False))
+
+    for prefix, ids in (("user", snapshot.user_ids), ("listing", snapshot.listing_ids)):
+        ids = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        _save(version_dir, f"{prefix}_ids", ids)
+        _save(version_dir, f"{prefix}_order", order)
+        _save(version_dir, f"{prefix}_sorted_ids", ids[order])
+    _save(version_dir, "listing_counts", snapshot.listing_counts)
+    _save(version_dir, "user_counts", snapshot.user_counts)
+
+    for column in ("user_id", "listing_id", "interaction_type"):
+        _save(version_dir, f"interactions_{column}", snapshot.interactions[column].to_numpy())
+
+    listings = snapshot.listings.reset_index(drop=True)
+    for column in LISTING_NUMERIC_COLUMNS:
+        _save(version_dir, f"listings_{column}", listings[column].to_numpy())
+    categories = {}
+    for column in LOCATION_COLUMNS:
+        values = listings[column].astype("category")
+        _save(version_dir, f"listings_{column}_codes", values.cat.codes.to_numpy())
+        categories[column] = [str(c) for c in values.cat.categories]
+    _save(version_dir, "features_unit", listing_features(listings)[0])
+
+    return {
+        "matrix_shape": list(matrix.shape),
+        "watermark": int(snapshot.watermark),
+        "users": int(len(snapshot.user_ids)),
+        "listings": int(len(listings)),
+        "nnz": int(matrix.nnz),
+        "categories": categories
+    }
+
+
+def _write_neighbors(version_dir, neighbors):
+    ids, top, scores = neighbors
+    order = np.argsort(ids, kind="stable")  # rows sorted by id for the searchsorted lookup
+    _save(version_dir, "neighbors_ids", np.asarray(ids, dtype=np.int64)[order])
+    _save(version_dir, "neighbors_top", np.asarray(top, dtype=np.int64)[order])
+    _save(version_dir, "neighbors_scores", np.asarray(scores, dtype=np.float32)[order])
+
+
+def _prune(store_dir, live):
+    versions = sorted(name for name in os.listdir(store_dir) if VERSION_PATTERN.match(name))
+    for name in versions[:-KEEP_VERSIONS]:
+        if name != live:
+            shutil.rmtree(os.path.join(store_dir, name), ignore_errors=True)
+
+
+def publish_recommender_store(neighbors=None, full=False, wait=False, store_dir=STORE_DIR):
+    """
+    Build the next version from the live one and make it live. Needs an app context.
+
+    The snapshot is updated incrementally from the live version (or fully rebuilt
+    from the database when there is none, `full` is set or the last full build is
+    older than RECOMMENDER_FULL_REBUILD_SECONDS). Nothing is written when no
+    interaction or listing changed and no neighbour table is given.
+
+    Args:
+        neighbors (tuple): (ids, neighbor_ids, scores) from listing_neighbors.neighbor_table;
+            when omitted the live version's table is carried over.
+        full (bool): Force a full rebuild.
+        wait (bool): Wait for a publish running in another process instead of skipping.
+
+    Returns:
+        str: The live version name (None when skipped because another process is publishing).
+    """
+    from recommender_state import RecommenderState
+
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, LOCK_FILE), "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print("Feature store publish already running in another process, skipping")
+            return None
+
+        started = time.time()
+        live = current_version(store_dir)
+        manifest = read_manifest(live, store_dir) if live else None
+        # A version in an older format is not reused; the next one is a full build
+        base = load_snapshot(store_dir, live) if manifest and manifest.get("format") == FORMAT else None
+        builder = RecommenderState(use_store=False)
+        full = full or base is None or started - manifest["full_built_at"] > builder.full_rebuild_seconds
+        version = manifest["version"] + 1 if manifest else 1
+        snapshot = builder.build_next(base, version, full=full)
+
+        if (not full and neighbors is None and snapshot.matrix is base.matrix
+                and snapshot.listings.equals(base.listings)):
+            # Nothing changed: keep the live version and mark it as still current
+            manifest["checked_at"] = time.time()
+            _write_manifest(os.path.join(store_dir, live), manifest)
+            return live
+
+        name = _version_name(version)
+        tmp_dir = os.path.join(store_dir, f".{name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            meta = _write_arrays(tmp_dir, snapshot)
+            if neighbors is not None:
+                _write_neighbors(tmp_dir, neighbors)
+                neighbors_built_at = started
+            elif manifest and manifest.get("neighbors_built_at"):
+                for array in NEIGHBOR_ARRAYS:
+                    _link_or_copy(os.path.join(store_dir, live), tmp_dir, array)
+                neighbors_built_at = manifest["neighbors_built_at"]
+            else:
+                neighbors_built_at = None
+            meta.update({
+                "format": FORMAT,
+                "version": version,
+                "built_at": time.time(),
+                "checked_at": time.time(),
+                "full_built_at": started if full else manifest["full_built_at"],
+                "neighbors_built_at": neighbors_built_at
+            })
+            _write_manifest(tmp_dir, meta)
+            os.rename(tmp_dir, os.path.join(store_dir, name))
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        pointer_tmp = os.path.join(store_dir, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+        with open(pointer_tmp, "w") as f:
+            f.write(name)
+        os.replace(pointer_tmp, os.path.join(store_dir, CURRENT_FILE))
+        _prune(store_dir, name)
+        print(f"Feature store {name} published ({'full' if full else 'incremental'}, "
+              f"{meta['users']} users, {meta['nnz']} interactions) in {time.time() - started:.1f}s")
+        return name
+
+
+# --- reading ------------------------------------------------------------------
+
+def _load(version_dir, name):
+    path = os.path.join(version_dir, f"{name}.npy")
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:  # zero-length arrays cannot be mapped on every numpy version
+        return np.load(path)
+
+
+def load_snapshot(store_dir=STORE_DIR, name=None):
+    """
+    RecommenderSnapshot backed by the memory-mapped arrays of a version.
+
+    Args:
+        name (str): Version to load (default: the live one).
+
+    Returns:
+        RecommenderSnapshot, or None when nothing has been published.
+    """
+    from recommender_state import ArrayIndex, RecommenderSnapshot
+
+    name = name or current_version(store_dir)
+    if name is None:
+        return None
+    version_dir = os.path.join(store_dir, name)
+    manifest = read_manifest(name, store_dir)
+    if manifest.get("format") != FORMAT:
+        raise ValueError(f"feature store version {name} has format {manifest.get('format')}, expected {FORMAT}")
+
+    # copy=False keeps the mapped arrays as the matrix buffers
+    matrix = csr_matrix(
+        (_load(version_dir, "matrix_data"), _load(version_dir, "matrix_indices"), _load(version_dir, "matrix_indptr")),
+        shape=tuple(manifest["matrix_shape"]), copy=False
+    )
+    matrix.has_sorted_indices = True
+    matrix.has_canonical_format = True
+
+    user_ids = _load(version_dir, "user_ids")
+    listing_ids = _load(version_dir, "listing_ids")
+    user_index = ArrayIndex(user_ids, _load(version_dir, "user_order"), _load(version_dir, "user_sorted_ids"))
+    listing_index = ArrayIndex(
+        listing_ids, _load(version_dir, "listing_order"), _load(version_dir, "listing_sorted_ids")
+    )
+
+    interactions = pd.DataFrame({
+        column: _load(version_dir, f"interactions_{column}")
+        for column in ("user_id", "listing_id", "interaction_type")
+    }, copy=False)
+    columns = {column: _load(version_dir, f"listings_{column}") for column in LISTING_NUMERIC_COLUMNS}
+    for column in LOCATION_COLUMNS:
+        columns[column] = pd.Categorical.from_codes(
+            _load(version_dir, f"listings_{column}_codes"), manifest["categories"][column]
+        )
+    listings = pd.DataFrame(columns, copy=False)[list(LISTING_NUMERIC_COLUMNS) + list(LOCATION_COLUMNS)]
+    features = (
+        _load(version_dir, "features_unit"),
+        listings["area"].cat.codes.to_numpy(),
+        listings["city"].cat.codes.to_numpy()
+    )
+    neighbors = tuple(
+        _load(version_dir, array) for array in NEIGHBOR_ARRAYS
+    ) if manifest.get("neighbors_built_at") else None
+
+    return RecommenderSnapshot(
+        matrix, user_ids, listing_ids, _load(version_dir, "listing_counts"), _load(version_dir, "user_counts"),
+        interactions, listings, manifest["watermark"], manifest["version"],
+        user_index=user_index, listing_index=listing_index, listing_features=features,
+        neighbors=neighbors, store_version=name
+    )
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app import app
+
+    with app.app_context():
+        publish_recommender_store(full="--full" in sys.argv)
@@ -1,53 +1,116 @@
 import pandas as pd
 import numpy as np
 import sqlite3
+from pandas.api.types import union_categoricals
 from scipy.sparse import csr_matrix
+from sqlalchemy import case, func, select
 from supabase_models import db, Interaction, Listing
 
+# Numeric codes (also the user-item weights) of the interaction types used by the recommenders
+INTERACTION_CODES = {
+    "view": 1,
+    "saved": 2
+}
+# Rows fetched per round trip by read_sql_frame
+READ_CHUNKSIZE = 200_000
+
+INTERACTION_DTYPES = {"id": "int64", "user_id": "int32", "listing_id": "int32", "interaction_type": "int8"}
+LISTING_DTYPES = {"id": "int32", "bedrooms": "float32", "bathrooms": "float32", "price": "float64"}
+LOCATION_COLUMNS = ("area", "city", "state")
+
+
+def interaction_code():
+    """SQL CASE mapping interaction_type to its numeric code (computed by the database)."""
+    return case(
+        *[(Interaction.interaction_type == name, code) for name, code in INTERACTION_CODES.items()],
+        else_=0
+    )
+
+
+def interactions_query(after_id=0, with_id=False):
+    """SELECT of view/saved interactions (id > after_id) with numeric codes, ordered by id."""
+    columns = [Interaction.id] if with_id else []
+    columns += [Interaction.user_id, Interaction.listing_id, interaction_code().label("interaction_type")]
+    return select(*columns).where(
+        Interaction.id > after_id,
+        Interaction.interaction_type.in_(list(INTERACTION_CODES))
+    ).order_by(Interaction.id)
+
+
+def listings_query():
+    return select(
+        Listing.id, Listing.bedrooms, Listing.bathrooms, Listing.price,
+        Listing.area, Listing.city, Listing.state
+    ).order_by(Listing.id)
+
+
+def listings_watermark():
+    """(max id, max updated_at, row count) of listings; changes whenever a listing is added, edited or deleted."""
+    return tuple(db.session.query(
+        func.max(Listing.id), func.max(Listing.updated_at), func.count(Listing.id)
+    ).one())
+
+
+def read_sql_frame(query, dtype=None, categories=(), chunksize=READ_CHUNKSIZE, connection=None):
+    """
+    Read a SELECT straight into columnar pandas chunks (no ORM objects or row dicts).
+
+    Args:
+        query: SQLAlchemy Select.
+        dtype (dict): Column dtypes applied per chunk (e.g. int32 ids); entries for
+            columns the query does not select are ignored.
+        categories (iterable): Columns stored as categoricals (chunks are unioned).
+        chunksize (int): Rows per chunk.
+        connection: SQLAlchemy connection (default: the Flask-SQLAlchemy session's).
+
+    Returns:
+        pd.DataFrame
+    """
+    connection = connection if connection is not None else db.session.connection()
+    columns = [column.name for column in query.selected_columns]
+    # pd.read_sql raises on dtype keys that are not in the result (e.g. "id" for id-less queries)
+    dtype = {column: kind for column, kind in (dtype or {}).items() if column in columns} or None
+    frames = []
+    for chunk in pd.read_sql(query, connection, chunksize=chunksize, dtype=dtype):
+        for column in categories:
+            chunk[column] = chunk[column].astype("category")
+        frames.append(chunk)
+
+    if not frames:
+        return pd.DataFrame({
+            column: pd.Series(dtype="category" if column in categories else (dtype or {}).get(column, "object"))
+            for column in columns
+        })
+    if len(frames) == 1:
+        return frames[0]
+    return pd.DataFrame({
+        column: (
+            pd.Series(union_categoricals([frame[column] for frame in frames], ignore_order=True))
+            if column in categories
+            else pd.concat([frame[column] for frame in frames], ignore_index=True)
+        )
+        for column in columns
+    })
+
 
 def load_datasets(filepath=None):
     """
     OUTPUT:
     df - (pandas dataframe) a DataFrame with processed interactions
     Description:
-    Reads the interactions table from Supabase/Postgres and maps interaction types to numerical values.
-    """
-    # Query all interactions from the database
-    interactions = Interaction.query.all()
-    # Convert to DataFrame
-    df = pd.DataFrame([
-        {
-            "user_id": i.user_id,
-            "listing_id": i.listing_id,
-            "interaction_type": i.interaction_type
-        }
-        for i in interactions
-    ])
-    # Map interaction types to numeric values
-    interaction_mapping = {
-        "view": 1,
-        "saved": 2
-    }
-    if not df.empty:
-        df["interaction_type"] = df["interaction_type"].map(interaction_mapping)
-    return df
+    Reads the view/saved interactions from Supabase/Postgres with interaction types already
+    mapped to numerical values by the database (int32 ids, int8 codes).
+    """
+    return read_sql_frame(interactions_query(), dtype=INTERACTION_DTYPES)
+
 
 def load_listing_data(filepath=None):
-    # Query all listings from the database
-    listings = Listing.query.all()
-    df = pd.DataFrame([
-        {
-            "id": l.id,
-            "bedrooms": l.bedrooms,
-            "bathrooms": l.bathrooms,
-            "price": l.price,
-            "area": l.area,
-            "city": l.city,
-            "state": l.state
-        }
-        for l in listings
-    ])
-    return df
+    """
+    OUTPUT:
+    df - (pandas dataframe) listing features (id, bedrooms, bathrooms, price, area, city, state)
+    with compact numeric dtypes and categorical location columns.
+    """
+    return read_sql_frame(listings_query(), dtype=LISTING_DTYPES, categories=LOCATION_COLUMNS)
 
 
 def get_top_listing_ids(n, df):
@@ -144,20 +207,13 @@ def get_top_sorted_lists(user_id, df, user_item):
     OUTPUT:
     sorted_articles - (list) list of top sorted article_ids viewed by the user
     '''
-    rec = dict()
-    sorted_lists = []
+    # Popularity position of every listing, computed once instead of an np.where per listing
+    popularity = df.groupby("listing_id")["user_id"].count().sort_values(ascending=False)
+    position = pd.Series(np.arange(len(popularity)), index=popularity.index)
 
-    user_list_inter = pd.DataFrame(df.groupby("listing_id")["user_id"].count().sort_values(ascending=False))
     list_ids = get_user_listings(user_id, user_item)
+    sorted_lists = sorted(list_ids, key=lambda list_id: position[list_id])
 
-    for list_id in list_ids:
-        list_idx = np.where(user_list_inter.index==list_id)[0][0]
-        rec[list_id] = list_idx
-        
-    sorted_recs = sorted(rec.items(), key=lambda item: item[1])
-    for i in sorted_recs:
-        sorted_lists.append(i[0])
-    
     return sorted_lists
 
 def get_top_sorted_users(user_id, df, user_item):
@@ -230,6 +286,117 @@ def user_user_recs(user_id, rec_num, df, user_item, exclude_listings=None):
     return recs[:rec_num]
 
 
+# --- Sparse collaborative filtering ---------------------------------------------
+# The functions below work on the CSR user-item matrix of a RecommenderSnapshot
+# (rows = users, columns = listings) and return row/column indices, so a
+# recommendation is one sparse mat-vec plus a few slices instead of DataFrame
+# pivots, merges and per-listing lookups.
+
+def item_popularity_ranks(listing_counts):
+    """
+    Popularity rank of every listing column (0 = most interactions).
+
+    Args:
+    - listing_counts: Interaction count per listing column.
+
+    Returns:
+    - np.ndarray of ranks, same length as listing_counts.
+    """
+    order = np.argsort(-np.asarray(listing_counts), kind="stable")
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order))
+    return ranks
+
+
+def sparse_top_sorted_users(user_idx, matrix, user_counts):
+    """
+    Users most similar to user_idx, by weighted dot product then number of interactions.
+
+    Args:
+    - user_idx: Row of the user in the matrix.
+    - matrix: CSR user-item matrix.
+    - user_counts: Interaction count per user row.
+
+    Returns:
+    - (neighbors, similarities): row indices of users with similarity > 0 in order,
+      and their similarity scores. The user itself is excluded.
+    """
+    sims = (matrix @ matrix.getrow(user_idx).T).toarray().ravel()
+    sims[user_idx] = 0
+    neighbors = np.flatnonzero(sims > 0)
+    order = np.lexsort((-user_counts[neighbors], -sims[neighbors]))
+    neighbors = neighbors[order]
+    return neighbors, sims[neighbors]
+
+
+def sparse_top_sorted_lists(user_idx, matrix, popularity_rank):
+    """
+    Listing columns a user interacted with, most popular first.
+
+    Args:
+    - user_idx: Row of the user in the matrix.
+    - matrix: CSR user-item matrix.
+    - popularity_rank: Output of item_popularity_ranks.
+
+    Returns:
+    - np.ndarray of listing column indices.
+    """
+    start, stop = matrix.indptr[user_idx], matrix.indptr[user_idx + 1]
+    cols = matrix.indices[start:stop][matrix.data[start:stop] > 0]
+    return cols[np.argsort(popularity_rank[cols], kind="stable")]
+
+
+def sparse_user_user_recs(user_idx, rec_num, matrix, user_counts, popularity_rank, exclude_cols=None):
+    """
+    User-user collaborative filtering on the sparse matrix.
+
+    Walks the similar users in order and takes their listings (most popular first)
+    that the user has not interacted with. When similar users run out, the most
+    active remaining users fill the list, as the DataFrame version did.
+
+    Args:
+    - user_idx: Row of the user in the matrix.
+    - rec_num: The number of recommendations to generate.
+    - matrix: CSR user-item matrix.
+    - user_counts: Interaction count per user row.
+    - popularity_rank: Output of item_popularity_ranks.
+    - exclude_cols: Optional listing column indices to exclude.
+
+    Returns:
+    - List of recommended listing column indices.
+    """
+    blocked = np.zeros(matrix.shape[1], dtype=bool)
+    blocked[sparse_top_sorted_lists(user_idx, matrix, popularity_rank)] = True
+    if exclude_cols is not None and len(exclude_cols):
+        blocked[np.asarray(exclude_cols, dtype=np.int64)] = True
+
+    recs = []
+
+    def take_from(neighbors):
+        for neighbor in neighbors:
+            cols = sparse_top_sorted_lists(neighbor, matrix, popularity_rank)
+            cols = cols[~blocked[cols]]
+            if not len(cols):
+                continue
+            cols = cols[:rec_num - len(recs)]
+            blocked[cols] = True
+            recs.extend(int(col) for col in cols)
+            if len(recs) >= rec_num:
+                return True
+        return False
+
+    neighbors, _ = sparse_top_sorted_users(user_idx, matrix, user_counts)
+    if not take_from(neighbors):
+        # Unrelated users (similarity 0), most active first
+        rest = np.ones(matrix.shape[0], dtype=bool)
+        rest[neighbors] = False
+        rest[user_idx] = False
+        rest = np.flatnonzero(rest)
+        take_from(rest[np.argsort(-user_counts[rest], kind="stable")])
+
+    return recs
+
+
 def clear_user_memory(db_path: str, thread_id: int):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
@@ -0,0 +1,85 @@
+"""
+Fast JSON encoding shared by Flask responses and the Redis cache.
+
+orjson serializes datetime/date (ISO 8601, same as .isoformat()), UUIDs,
+dataclasses and numpy arrays natively; anything else goes through `_default`.
+If orjson is not installed, the stdlib json module is used with the same rules.
+"""
+import json
+import decimal
+import uuid
+from datetime import date, datetime, time
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is pinned in requirements.txt
+    orjson = None
+
+
+def _default(obj):
+    """Fallback for types neither encoder handles natively."""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    # numpy scalars (e.g. recommender scores) expose .item()
+    if hasattr(obj, 'item'):
+        return obj.item()
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps_bytes(obj, indent=False):
+        """Serialize obj to UTF-8 JSON bytes."""
+        option = _OPTIONS | orjson.OPT_INDENT_2 if indent else _OPTIONS
+        return orjson.dumps(obj, default=_default, option=option)
+
+    def loads(data):
+        """Parse JSON from str or bytes."""
+        return orjson.loads(data)
+else:
+    def dumps_bytes(obj, indent=False):
+        """Serialize obj to UTF-8 JSON bytes."""
+        return json.dumps(
+            obj, default=_default, ensure_ascii=False,
+            indent=2 if indent else None, separators=None if indent else (',', ':')
+        ).encode('utf-8')
+
+    def loads(data):
+        """Parse JSON from str or bytes."""
+        return json.loads(data)
+
+
+def dumps(obj):
+    """Serialize obj to a JSON string (for Redis values and other text sinks)."""
+    return dumps_bytes(obj).decode('utf-8')
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+
+    Usage:
+        app.json = FastJSONProvider(app)
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = dumps_bytes(obj, indent=self._app.debug)
+        return self._app.response_class(body, mimetype='application/json')
@@ -0,0 +1,199 @@
+"""
+Local store of listing text embeddings for similar-listing queries.
+
+vector_search.database_vectorize computes a MiniLM embedding per listing; it
+also hands them to save_listing_embeddings(), which writes them here:
+
+    {LISTING_EMBEDDINGS_DIR}/embeddings.npy   float32, L2-normalized, one row per listing
+    {LISTING_EMBEDDINGS_DIR}/ids.npy          int64 listing ids (row order)
+    {LISTING_EMBEDDINGS_DIR}/index.faiss      inner-product FAISS index over the rows
+
+Every file is written to a temp path and moved into place with os.replace.
+Serving processes memory-map the embeddings, load the index, and reload both
+when the files change. A query finds the nearest listings by cosine similarity,
+then re-ranks them so the same area comes first, then the same city, then
+elsewhere (the same priority listing_neighbors.py applies).
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import faiss
+except ImportError:  # pragma: no cover - faiss-cpu is pinned in requirements.txt
+    faiss = None
+
+EMBEDDINGS_DIR = os.getenv(
+    "LISTING_EMBEDDINGS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts", "embeddings")
+)
+EMBEDDINGS_FILE = "embeddings.npy"
+IDS_FILE = "ids.npy"
+INDEX_FILE = "index.faiss"
+# Exact search is fast enough below this many listings; HNSW above it
+HNSW_MIN_LISTINGS = int(os.getenv("LISTING_EMBEDDINGS_HNSW_MIN", 50000))
+# Nearest neighbours fetched per requested result before the area/city re-rank
+CANDIDATE_FACTOR = int(os.getenv("LISTING_EMBEDDINGS_CANDIDATE_FACTOR", 5))
+RELOAD_SECONDS = int(os.getenv("LISTING_EMBEDDINGS_RELOAD_SECONDS", 60))
+
+
+def _atomic_save(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _build_index(vectors):
+    if faiss is None:
+        return None
+    dim = vectors.shape[1]
+    if len(vectors) >= HNSW_MIN_LISTINGS:
+        index = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+    else:
+        index = faiss.IndexFlatIP(dim)
+    index.add(vectors)
+    return index
+
+
+def save_listing_embeddings(listing_ids, embeddings, embeddings_dir=EMBEDDINGS_DIR):
+    """
+    Persist listing embeddings and their FAISS index.
+
+    Args:
+        listing_ids (array-like): Listing ids, one per embedding.
+        embeddings (array-like): n x d embedding matrix.
+
+    Returns:
+        int: Number of listings written.
+    """
+    ids = np.asarray(listing_ids, dtype=np.int64)
+    vectors = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors = vectors / norms
+
+    os.makedirs(embeddings_dir, exist_ok=True)
+
+    def write_npy(array):
+        def write(path):
+            with open(path, "wb") as f:
+                np.save(f, array)
+        return write
+
+    # The index is written last: readers reload when it changes
+    _atomic_save(os.path.join(embeddings_dir, EMBEDDINGS_FILE), write_npy(vectors))
+    _atomic_save(os.path.join(embeddings_dir, IDS_FILE), write_npy(ids))
+    index = _build_index(vectors)
+    if index is not None:
+        _atomic_save(os.path.join(embeddings_dir, INDEX_FILE), lambda path: faiss.write_index(index, path))
+    print(f"Saved {len(ids)} listing embeddings to {embeddings_dir}")
+    return len(ids)
+
+
+class ListingEmbeddings:
+    """Memory-mapped embeddings with their FAISS index (numpy search when faiss is missing)."""
+
+    def __init__(self, embeddings_dir=EMBEDDINGS_DIR):
+        self.vectors = np.load(os.path.join(embeddings_dir, EMBEDDINGS_FILE), mmap_mode="r")
+        self.ids = np.load(os.path.join(embeddings_dir, IDS_FILE))
+        if len(self.ids) != len(self.vectors):
+            # Caught mid-write; the next reload check picks up the finished files
+            raise ValueError("listing embeddings and ids are out of sync")
+        self.row_index = {int(lid): i for i, lid in enumerate(self.ids)}
+        index_path = os.path.join(embeddings_dir, INDEX_FILE)
+        self.index = faiss.read_index(index_path) if faiss is not None and os.path.exists(index_path) else None
+        self.mtime = _artifact_mtime(embeddings_dir)
+
+    def nearest(self, listing_id, k):
+        """(ids, similarities) of the k nearest listings, excluding the listing itself."""
+        row = self.row_index.get(listing_id)
+        if row is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = np.asarray(self.vectors[row:row + 1], dtype=np.float32)
+        k = min(k + 1, len(self.ids))
+        if self.index is not None:
+            sims, rows = self.index.search(query, k)
+            sims, rows = sims[0], rows[0]
+            valid = rows >= 0
+            sims, rows = sims[valid], rows[valid]
+        else:
+            scores = np.asarray(self.vectors @ query[0])
+            rows = np.argpartition(-scores, k - 1)[:k]
+            rows = rows[np.argsort(-scores[rows], kind="stable")]
+            sims = scores[rows]
+        keep = rows != row
+        return self.ids[rows[keep]], sims[keep]
+
+
+def _artifact_mtime(embeddings_dir):
+    paths = [os.path.join(embeddings_dir, name) for name in (EMBEDDINGS_FILE, IDS_FILE, INDEX_FILE)]
+    return max((os.path.getmtime(path) for path in paths if os.path.exists(path)), default=0.0)
+
+
+_store = None
+_store_checked = 0.0
+_store_lock = threading.Lock()
+
+
+def get_listing_embeddings(embeddings_dir=EMBEDDINGS_DIR):
+    """The embeddings store of this process, reloaded when the files change (None if absent)."""
+    global _store, _store_checked
+    now = time.time()
+    if now - _store_checked < RELOAD_SECONDS:
+        return _store
+    with _store_lock:
+        if now - _store_checked < RELOAD_SECONDS:
+            return _store
+        _store_checked = now
+        try:
+            if not os.path.exists(os.path.join(embeddings_dir, EMBEDDINGS_FILE)):
+                return _store
+            if _store is None or _artifact_mtime(embeddings_dir) != _store.mtime:
+                _store = ListingEmbeddings(embeddings_dir)
+        except Exception as e:
+            print(f"Listing embeddings load error: {e}")
+    return _store
+
+
+def similar_listing_ids(listing_id, k, listings):
+    """
+    Listings most similar to `listing_id` by text embedding, same area first, then same city.
+
+    Args:
+        listing_id (int): The listing being viewed.
+        k (int): Number of ids to return.
+        listings (pd.DataFrame): id, area, city columns sorted by id (the recommender state's frame).
+
+    Returns:
+        list: Listing ids in display order; empty when the listing has no embedding yet.
+    """
+    store = get_listing_embeddings()
+    if store is None:
+        return []
+    candidate_ids, sims = store.nearest(listing_id, k * CANDIDATE_FACTOR)
+    if not len(candidate_ids):
+        return []
+    if listings is None or listings.empty:
+        return [int(i) for i in candidate_ids[:k]]
+
+    # Look up area/city of the listing and its candidates (listings are sorted by id)
+    frame_ids = listings["id"].to_numpy(dtype=np.int64)
+    pos = np.searchsorted(frame_ids, np.concatenate([[listing_id], candidate_ids]))
+    pos[pos >= len(frame_ids)] = 0
+    found = frame_ids[pos] == np.concatenate([[listing_id], candidate_ids])
+    if not found[0]:
+        return [int(i) for i in candidate_ids[found[1:]][:k]]
+
+    areas = listings["area"].to_numpy()[pos]
+    cities = listings["city"].to_numpy()[pos]
+    same_area = (areas[1:] == areas[0]) & pd.notna(areas[0])
+    same_city = (cities[1:] == cities[0]) & pd.notna(cities[0])
+    tier = np.where(same_area, 0, np.where(same_city, 1, 2))
+
+    # Drop listings that no longer exist, then order by tier and similarity
+    candidate_ids, sims, tier = candidate_ids[found[1:]], sims[found[1:]], tier[found[1:]]
+    order = np.lexsort((-sims, tier))
+    return [int(i) for i in candidate_ids[order][:k]]
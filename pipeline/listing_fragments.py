@@ -0,0 +1,160 @@
+"""
+Per-listing JSON fragment cache.
+
+Each serialized listing is stored under its own Redis key:
+    listing_fragment:{shape}:{listing_id}:{version}
+where `shape` identifies the set of output fields (or "detail" for the full
+listing payload) and `version` is the listing's updated_at timestamp. Editing a listing bumps updated_at (onupdate), so only that
+listing's fragment goes stale; list endpoints cache ordered id lists and assemble
+pages from fragments with one MGET.
+"""
+import hashlib
+
+from json_provider import dumps as json_dumps, loads as json_loads
+from listing_serializer import load_listings, serialize_listing_detail, serialize_listing_fields, wants
+from redis_helper import redis_client, is_redis_available
+from supabase_models import db, Listing
+
+FRAGMENT_PREFIX = "listing_fragment"
+FRAGMENT_TTL = 6 * 60 * 60  # Old versions simply age out
+# Shape key of full detail payloads (card shapes are field hashes)
+DETAIL_SHAPE = "detail"
+ID_LIST_PREFIX = "listing_ids"
+
+
+def fragment_shape(names, fields=None):
+    """
+    Stable short id for the output fields a fragment contains.
+
+    Args:
+        names (iterable): Default output fields of the endpoint.
+        fields (set): Sparse fieldset from requested_fields(), or None.
+    """
+    selected = list(names) if fields is None else sorted(set(fields))
+    return hashlib.md5(",".join(selected).encode()).hexdigest()[:10]
+
+
+def listing_versions(listing_ids):
+    """
+    Current fragment version of each listing (one indexed id/updated_at query).
+
+    Returns:
+        dict: listing_id -> version; ids that no longer exist are absent.
+    """
+    if not listing_ids:
+        return {}
+    rows = db.session.query(Listing.id, Listing.updated_at, Listing.created_at).filter(
+        Listing.id.in_(listing_ids)
+    ).all()
+    versions = {}
+    for listing_id, updated_at, created_at in rows:
+        stamp = updated_at or created_at
+        versions[listing_id] = int(stamp.timestamp() * 1000) if stamp else 0
+    return versions
+
+
+def fragment_key(shape, listing_id, version):
+    return f"{FRAGMENT_PREFIX}:{shape}:{listing_id}:{version}"
+
+
+def _cached_fragments(listing_ids, shape, build):
+    """
+    Payloads for `listing_ids` from the fragment cache, building misses with `build`.
+
+    Args:
+        listing_ids (list): Ids in display order.
+        shape (str): Fragment shape key.
+        build (callable): list of missing ids -> {listing_id: payload}.
+    """
+    if not listing_ids:
+        return []
+
+    versions = listing_versions(listing_ids)
+    present = [listing_id for listing_id in listing_ids if listing_id in versions]
+    redis_ok = is_redis_available()
+
+    payloads = {}
+    if redis_ok and present:
+        try:
+            keys = [fragment_key(shape, listing_id, versions[listing_id]) for listing_id in present]
+            for listing_id, raw in zip(present, redis_client.mget(keys)):
+                if raw:
+                    payloads[listing_id] = json_loads(raw)
+        except Exception as e:
+            print(f"Listing fragment read error: {e}")
+
+    missing = [listing_id for listing_id in present if listing_id not in payloads]
+    if missing:
+        built = build(missing)
+        payloads.update(built)
+
+        if redis_ok and built:
+            try:
+                pipe = redis_client.pipeline(transaction=False)
+                for listing_id, payload in built.items():
+                    pipe.setex(fragment_key(shape, listing_id, versions[listing_id]), FRAGMENT_TTL, json_dumps(payload))
+                pipe.execute()
+            except Exception as e:
+                print(f"Listing fragment write error: {e}")
+
+    return [payloads[listing_id] for listing_id in present if listing_id in payloads]
+
+
+def get_listing_fragments(listing_ids, names, fields=None):
+    """
+    Serialized listings for `listing_ids`, served from the fragment cache where possible.
+
+    Cache misses are loaded with one batched query (units included only when
+    requested), serialized, and written back in a single pipeline.
+
+    Args:
+        listing_ids (list): Ids in display order.
+        names (iterable): Default output fields (e.g. CARD_FIELDS).
+        fields (set): Optional sparse fieldset.
+
+    Returns:
+        list: Payload dicts in the order of listing_ids (missing listings skipped).
+    """
+    def build(missing):
+        listings = load_listings(missing, units=wants(fields, "units"), fields=fields)
+        return {listing.id: serialize_listing_fields(listing, names, fields) for listing in listings}
+
+    return _cached_fragments(listing_ids, fragment_shape(names, fields), build)
+
+
+def get_listing_detail_fragments(listing_ids):
+    """
+    Full detail payloads (serialize_listing_detail) for `listing_ids`, cached per listing
+    under the "detail" shape. Agent details inside a fragment refresh when the listing
+    changes or the fragment expires.
+
+    Returns:
+        list: Payload dicts in the order of listing_ids (missing listings skipped).
+    """
+    def build(missing):
+        listings = load_listings(missing, units=True, agent=True)
+        return {listing.id: serialize_listing_detail(listing) for listing in listings}
+
+    return _cached_fragments(listing_ids, DETAIL_SHAPE, build)
+
+
+def get_cached_ids(key):
+    """Cached ordered id list (or any small JSON value) stored by cache_ids, else None."""
+    if not is_redis_available():
+        return None
+    try:
+        raw = redis_client.get(f"{ID_LIST_PREFIX}:{key}")
+        return json_loads(raw) if raw else None
+    except Exception as e:
+        print(f"Listing id list read error: {e}")
+        return None
+
+
+def cache_ids(key, value, expiry=300):
+    """Cache an ordered id list (or a small JSON value holding one) for a list endpoint."""
+    if not is_redis_available():
+        return
+    try:
+        redis_client.setex(f"{ID_LIST_PREFIX}:{key}", expiry, json_dumps(value))
+    except Exception as e:
+        print(f"Listing id list write error: {e}")
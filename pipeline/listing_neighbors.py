@@ -0,0 +1,257 @@
+"""
+Precomputed item-item neighbours for content-based recommendations.
+
+A background job scores every listing against every other one on normalized
+bedrooms / bathrooms / price (cosine similarity, as Recommender.content_based did),
+applies the area/city priority up front and keeps the best K per listing in a Redis
+sorted set:
+
+    listing_neighbors:{listing_id}  ->  {neighbor_id: score}
+
+score = tier + (1 - similarity) / 2, with tier 0 = same area, 1 = same city,
+2 = elsewhere, so ZRANGE returns neighbours already in display order.
+Requests then read K ids instead of building an N x N similarity matrix.
+The same table is published to the memory-mapped feature store
+(feature_store.py), where workers read it without a Redis round trip.
+
+Run manually with:  python listing_neighbors.py
+"""
+import os
+import time
+
+import numpy as np
+
+from redis_helper import redis_client, is_redis_available
+
+NEIGHBORS_PREFIX = "listing_neighbors"
+NEIGHBORS_META_KEY = f"{NEIGHBORS_PREFIX}:meta"
+NEIGHBORS_K = int(os.getenv("LISTING_NEIGHBORS_K", 20))
+NEIGHBORS_TTL = int(os.getenv("LISTING_NEIGHBORS_TTL", 2 * 24 * 60 * 60))
+# Cells scored per block (rows x listings). Peak memory per block is roughly 20 bytes
+# per cell (float32 similarities and scores, bool masks, int64 argpartition result),
+# i.e. about 80 MB at 1 << 22
+BLOCK_CELLS = 1 << 22
+
+FEATURE_COLUMNS = ["bedrooms", "bathrooms", "price"]
+
+
+def neighbors_key(listing_id):
+    return f"{NEIGHBORS_PREFIX}:{listing_id}"
+
+
+def _feature_matrix(listings):
+    """Z-score normalized features scaled to unit length (so dot product == cosine)."""
+    features = listings[FEATURE_COLUMNS].astype(float)
+    features = (features - features.mean()) / features.std()
+    matrix = features.fillna(0.0).to_numpy(dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _location_codes(listings):
+    """Integer codes for area and city (missing values never match anything)."""
+    area_codes = listings["area"].astype("category").cat.codes.to_numpy()
+    city_codes = listings["city"].astype("category").cat.codes.to_numpy()
+    return area_codes, city_codes
+
+
+def listing_features(listings):
+    """(unit feature matrix, area codes, city codes) of a listings frame, rows in frame order."""
+    area_codes, city_codes = _location_codes(listings)
+    return _feature_matrix(listings), area_codes, city_codes
+
+
+def _block_neighbors(start, stop, unit, area_codes, city_codes, k):
+    """Top-k (index, score) per row for rows [start, stop)."""
+    sims = unit[start:stop] @ unit.T
+    block_area = area_codes[start:stop, None]
+    block_city = city_codes[start:stop, None]
+    same_area = (block_area == area_codes[None, :]) & (block_area >= 0)
+    same_city = (block_city == city_codes[None, :]) & (block_city >= 0)
+    # Built in place in float32 (no float64 temporaries): 2 elsewhere, 1 same city, 0 same area
+    scores = np.full(sims.shape, 2.0, dtype=np.float32)
+    scores[same_city] = 1.0
+    scores[same_area] = 0.0
+    sims = sims.astype(np.float32, copy=False)
+    sims *= -0.5
+    sims += 0.5
+    scores += sims  # tier + (1 - similarity) / 2
+
+    # A listing is never its own neighbour
+    rows = np.arange(stop - start)
+    scores[rows, rows + start] = np.inf
+
+    kk = min(k, scores.shape[1] - 1)
+    if kk <= 0:
+        return np.empty((stop - start, 0), dtype=np.int64), np.empty((stop - start, 0), dtype=np.float32)
+    top = np.argpartition(scores, kk - 1, axis=1)[:, :kk]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def neighbor_table(listings, k=NEIGHBORS_K, features=None):
+    """
+    Top-k neighbours of every listing as arrays.
+
+    Args:
+        listings (pd.DataFrame): id, bedrooms, bathrooms, price, area, city columns.
+        k (int): Neighbours kept per listing.
+        features (tuple): Precomputed listing_features(listings), if available.
+
+    Returns:
+        tuple: (ids, neighbor_ids, scores); row i holds the neighbours of ids[i] in
+        display order, padded with -1 / inf when there are fewer than k other listings.
+    """
+    listings = listings.reset_index(drop=True)
+    ids = listings["id"].to_numpy(dtype=np.int64)
+    neighbor_ids = np.full((len(ids), k), -1, dtype=np.int64)
+    scores = np.full((len(ids), k), np.inf, dtype=np.float32)
+    if listings.empty:
+        return ids, neighbor_ids, scores
+    unit, area_codes, city_codes = features if features is not None else listing_features(listings)
+
+    block_size = max(1, BLOCK_CELLS // len(ids))
+    for start in range(0, len(ids), block_size):
+        stop = min(start + block_size, len(ids))
+        top, top_scores = _block_neighbors(start, stop, unit, area_codes, city_codes, k)
+        neighbor_ids[start:stop, :top.shape[1]] = ids[top]
+        scores[start:stop, :top.shape[1]] = top_scores
+    return ids, neighbor_ids, scores
+
+
+def compute_neighbors(listings, k=NEIGHBORS_K, table=None):
+    """
+    Yield (listing_id, [(neighbor_id, score), ...]) for every listing.
+
+    Args:
+        listings (pd.DataFrame): id, bedrooms, bathrooms, price, area, city columns.
+        k (int): Neighbours kept per listing.
+        table (tuple): A neighbor_table() result to iterate instead of recomputing.
+    """
+    ids, neighbor_ids, scores = table if table is not None else neighbor_table(listings, k)
+    for listing_id, row_ids, row_scores in zip(ids, neighbor_ids, scores):
+        keep = row_ids >= 0
+        yield int(listing_id), [
+            (int(neighbor_id), float(score)) for neighbor_id, score in zip(row_ids[keep], row_scores[keep])
+        ]
+
+
+def neighbors_for(listing_ids, listings, k=NEIGHBORS_K, features=None):
+    """
+    Score only the given listings against all others (no Redis involved).
+
+    Args:
+        features (tuple): Precomputed listing_features(listings), if available.
+
+    Returns:
+        dict: listing_id -> [(neighbor_id, score), ...] for ids present in `listings`.
+    """
+    if listings.empty:
+        return {}
+    listings = listings.reset_index(drop=True)
+    ids = listings["id"].to_numpy(dtype=np.int64)
+    row_of = {int(listing_id): i for i, listing_id in enumerate(ids)}
+    unit, area_codes, city_codes = features if features is not None else listing_features(listings)
+
+    result = {}
+    for listing_id in listing_ids:
+        row = row_of.get(int(listing_id))
+        if row is None:
+            continue
+        top, top_scores = _block_neighbors(row, row + 1, unit, area_codes, city_codes, k)
+        result[listing_id] = [(int(ids[j]), float(score)) for j, score in zip(top[0], top_scores[0])]
+    return result
+
+
+def store_neighbors(neighbors):
+    """Write (listing_id, [(neighbor_id, score)]) pairs to Redis sorted sets."""
+    pipe = redis_client.pipeline(transaction=False)
+    written = 0
+    for listing_id, pairs in neighbors:
+        key = neighbors_key(listing_id)
+        pipe.delete(key)
+        if pairs:
+            pipe.zadd(key, {str(neighbor_id): score for neighbor_id, score in pairs})
+            pipe.expire(key, NEIGHBORS_TTL)
+        written += 1
+        if written % 500 == 0:
+            pipe.execute()
+    pipe.execute()
+    return written
+
+
+def refresh_listing_neighbors(listings=None, k=NEIGHBORS_K):
+    """
+    Recompute the neighbour table for all listings, store it in Redis and publish
+    it to the feature store.
+
+    Args:
+        listings (pd.DataFrame): Listing features; defaults to the recommender state's frame.
+
+    Returns:
+        int: Number of listings written to Redis (0 when Redis is unavailable).
+    """
+    from feature_store import publish_recommender_store
+
+    if listings is None:
+        from recommender_state import get_recommender_state
+        listings = get_recommender_state().current().listings
+
+    started = time.time()
+    table = neighbor_table(listings, k)
+    written = 0
+    if is_redis_available():
+        written = store_neighbors(compute_neighbors(listings, k, table=table))
+        redis_client.hset(NEIGHBORS_META_KEY, mapping={
+            "built_at": int(time.time()),
+            "listings": written,
+            "k": k
+        })
+    else:
+        print("Redis not available, listing neighbours only go to the feature store")
+    # Waits for a running publish so the new table is not dropped
+    publish_recommender_store(neighbors=table, wait=True)
+    print(f"Listing neighbours refreshed for {len(table[0])} listings in {time.time() - started:.1f}s")
+    return written
+
+
+def get_neighbor_ids(listing_id, k=NEIGHBORS_K, listings=None, features=None):
+    """
+    Neighbour ids of a listing in display order (same area, then city, then elsewhere).
+
+    Falls back to scoring the one listing against all others when its entry is
+    missing (e.g. a listing created after the last job run) and stores the result.
+
+    Args:
+        listings (pd.DataFrame): Listing features used for the fallback.
+        features (tuple): Precomputed listing_features(listings) for the fallback.
+    """
+    if is_redis_available():
+        try:
+            ids = redis_client.zrange(neighbors_key(listing_id), 0, k - 1)
+            if ids:
+                return [int(i) for i in ids]
+        except Exception as e:
+            print(f"Listing neighbour read error: {e}")
+
+    if listings is None or listings.empty:
+        return []
+    pairs = neighbors_for([listing_id], listings, max(k, NEIGHBORS_K), features).get(listing_id)
+    if pairs is None:
+        return []
+
+    if is_redis_available():
+        try:
+            store_neighbors([(listing_id, pairs)])
+        except Exception as e:
+            print(f"Listing neighbour write error: {e}")
+    return [neighbor_id for neighbor_id, _ in pairs[:k]]
+
+
+if __name__ == "__main__":
+    from app import app
+
+    with app.app_context():
+        refresh_listing_neighbors()
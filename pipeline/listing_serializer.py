@@ -0,0 +1,402 @@
+import json
+from collections import defaultdict
+from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from settings import settings
+from supabase_models import Agent, Listing, Reel, Unit
+
+
+# --- Ensure all image paths are Supabase URLs ---
+def to_supabase_url(path, bucket):
+    if not path:
+        return None
+    if path.startswith('http://') or path.startswith('https://'):
+        return path
+    # Assume public bucket
+    base_url = settings.SUPABASE_PUBLIC_URL
+    return f"{base_url}/{bucket}/{path}"
+
+
+# --- Sparse fieldsets ---
+# Listing columns each output field is computed from (drives the SQL projection)
+FIELD_COLUMNS = {
+    "id": ("id",),
+    "title": ("title",),
+    "description": ("description",),
+    "price": ("price",),
+    "price_display": ("price", "listing_type", "unit_price_min", "unit_price_max"),
+    "city": ("city",),
+    "state": ("state",),
+    "area": ("area",),
+    "bedrooms": ("bedrooms",),
+    "bathrooms": ("bathrooms",),
+    "bed_display": ("bedrooms", "listing_type", "unit_bedrooms_min", "unit_bedrooms_max"),
+    "bath_display": ("bathrooms", "listing_type", "unit_bathrooms_min", "unit_bathrooms_max"),
+    "image_paths": ("image_paths",),
+    "thumbnail": ("image_paths",),
+    "video_path": ("video_path",),
+    "listing_type": ("listing_type",),
+    "rent_period": ("rent_period",),
+    "units": ("listing_type",),
+    "tags": ("tags",),
+    "amenities": ("amenities",),
+    "is_featured": ("is_featured",),
+    "is_promoted": ("is_promoted",),
+    "created_at": ("created_at",),
+    "updated_at": ("updated_at",),
+    "agent_id": ("agent_id",),
+}
+
+# Named views for ?view=; detail (None) means every field the endpoint produces
+VIEWS = {
+    "card": (
+        "id", "title", "price", "price_display", "city", "state", "area",
+        "bedrooms", "bathrooms", "listing_type", "rent_period", "thumbnail",
+        "is_featured", "is_promoted",
+    ),
+    "detail": None,
+}
+
+
+def requested_fields(args):
+    """
+    Resolve the sparse fieldset of a request from ?fields=a,b,c or ?view=card|detail.
+
+    Args:
+        args: request.args (or any mapping).
+
+    Returns:
+        set or None: Requested output fields (always including "id"), or None for all fields.
+    """
+    fields = args.get("fields", "") or ""
+    if fields:
+        selected = {f.strip() for f in fields.split(",") if f.strip()}
+        return selected | {"id"}
+    view = (args.get("view", "") or "").lower()
+    if VIEWS.get(view):
+        return set(VIEWS[view])
+    return None
+
+
+def wants(fields, name):
+    """True when `name` should be included for the requested fieldset."""
+    return fields is None or name in fields
+
+
+def projection_options(fields, extra_columns=()):
+    """
+    load_only() option restricting the SELECT to the columns behind `fields`.
+
+    Args:
+        fields (set or None): Requested output fields (None loads every column).
+        extra_columns (iterable): Columns the endpoint needs for its own logic (ordering, filters ...).
+
+    Returns:
+        list: Loader options (empty when every column is needed).
+    """
+    if fields is None:
+        return []
+    columns = {"id", *extra_columns}
+    for field in fields:
+        columns.update(FIELD_COLUMNS.get(field, ()))
+    return [load_only(*[getattr(Listing, column) for column in sorted(columns)])]
+
+
+def eager_listing_options(units=True, reels=False, agent=False):
+    """
+    Loader options that fetch listing relations with one SELECT ... IN per relation.
+
+    Usage:
+        Listing.query.options(*eager_listing_options(reels=True)).filter(...)
+    """
+    options = []
+    if units:
+        options.append(selectinload(Listing.units))
+    if reels:
+        options.append(selectinload(Listing.reels))
+    if agent:
+        options.append(selectinload(Listing.agent))
+    return options
+
+
+def load_listings(listing_ids, units=True, reels=False, agent=False, fields=None):
+    """
+    Fetch listings by id with their relations batch-loaded.
+
+    Args:
+        listing_ids (list): Listing ids in the order they should be returned.
+        fields (set): Optional sparse fieldset; restricts the selected columns and
+            skips loading units when they are not requested.
+
+    Returns:
+        list: Listing objects in the same order as listing_ids (missing ids are skipped).
+    """
+    if not listing_ids:
+        return []
+    units = units and wants(fields, "units")
+    rows = (
+        Listing.query
+        .options(*eager_listing_options(units=units, reels=reels, agent=agent))
+        .options(*projection_options(fields))
+        .filter(Listing.id.in_(listing_ids))
+        .all()
+    )
+    id_to_listing = {listing.id: listing for listing in rows}
+    return [id_to_listing[listing_id] for listing_id in listing_ids if listing_id in id_to_listing]
+
+
+def preload_relations(listings, units=True, reels=False, agent=False):
+    """
+    Batch-load relations for listings that were already fetched without eager options
+    (e.g. recommender results), so serializing them does not trigger a lazy load per row.
+    """
+    listings = [listing for listing in listings if listing is not None]
+    if not listings:
+        return listings
+    listing_ids = [listing.id for listing in listings]
+
+    if units:
+        grouped = defaultdict(list)
+        for unit in Unit.query.filter(Unit.listing_id.in_(listing_ids)).all():
+            grouped[unit.listing_id].append(unit)
+        for listing in listings:
+            set_committed_value(listing, 'units', grouped.get(listing.id, []))
+
+    if reels:
+        grouped = defaultdict(list)
+        for reel in Reel.query.filter(Reel.listing_id.in_(listing_ids)).all():
+            grouped[reel.listing_id].append(reel)
+        for listing in listings:
+            set_committed_value(listing, 'reels', grouped.get(listing.id, []))
+
+    if agent:
+        agent_ids = {listing.agent_id for listing in listings if listing.agent_id}
+        agents = {a.id: a for a in Agent.query.filter(Agent.id.in_(agent_ids)).all()} if agent_ids else {}
+        for listing in listings:
+            set_committed_value(listing, 'agent', agents.get(listing.agent_id))
+
+    return listings
+
+
+def parse_image_paths(listing):
+    """Decode the JSON image list of a listing into Supabase URLs."""
+    try:
+        images = json.loads(listing.image_paths) if listing.image_paths else []
+    except (TypeError, json.JSONDecodeError):
+        images = []
+    return [to_supabase_url(img, 'listings') for img in images if img]
+
+
+def parse_tags(listing):
+    """Split the comma-separated tags of a listing into a list."""
+    try:
+        return [tag.strip() for tag in listing.tags.split(',')] if listing.tags else []
+    except Exception:
+        return []
+
+
+def serialize_unit(unit):
+    return {
+        "id": unit.id,
+        "name": unit.name,
+        "bedrooms": unit.bedrooms,
+        "bathrooms": unit.bathrooms,
+        "sqft": unit.sqft,
+        "price_min": unit.price_min,
+        "price_max": unit.price_max,
+        "is_available": unit.is_available
+    }
+
+
+def serialize_units(listing):
+    """Units of a complex listing (empty for individual listings)."""
+    if listing.listing_type != 'complex':
+        return []
+    return [serialize_unit(unit) for unit in listing.units]
+
+
+def bedroom_range(units_data):
+    """Format the bedroom span of serialized units, e.g. "1-3" or "2"."""
+    if not units_data:
+        return None
+    min_bedrooms = min(u["bedrooms"] for u in units_data)
+    max_bedrooms = max(u["bedrooms"] for u in units_data)
+    if min_bedrooms != max_bedrooms:
+        return f"{min_bedrooms}-{max_bedrooms}"
+    return str(min_bedrooms)
+
+
+def format_range(min_val, max_val):
+    """Format a numeric span as "min-max", or a single value when both ends match."""
+    if min_val is None or max_val is None:
+        return None
+    if min_val == max_val:
+        return str(int(min_val))
+    return f"{int(min_val)}-{int(max_val)}"
+
+
+def price_range_display(listing):
+    """Price label for notifications: the unit span for complex listings, else the listing price."""
+    if listing.listing_type == 'complex':
+        return format_range(listing.unit_price_min, listing.unit_price_max) or 'Price on request'
+    return str(int(listing.price)) if listing.price else 'Price on request'
+
+
+def range_displays(listing):
+    """
+    Price, bedroom and bathroom display values read from the stored unit summaries.
+
+    Returns:
+        tuple: (price_display, bed_display, bath_display). Individual listings, and
+        complex listings without unit data, fall back to the listing's own values.
+    """
+    price_display = listing.price
+    bed_display = listing.bedrooms
+    bath_display = listing.bathrooms
+    if listing.listing_type == 'complex':
+        price_display = format_range(listing.unit_price_min, listing.unit_price_max) or price_display
+        bed_display = format_range(listing.unit_bedrooms_min, listing.unit_bedrooms_max) or bed_display
+        bath_display = format_range(listing.unit_bathrooms_min, listing.unit_bathrooms_max) or bath_display
+    return price_display, bed_display, bath_display
+
+
+def serialize_agent(agent, include_phone=True):
+    if not agent:
+        return None
+    agent_info = {
+        "id": agent.id,
+        "name": agent.name,
+        "email": agent.email,
+        "agent_type": getattr(agent, "agent_type", None)
+    }
+    if include_phone:
+        agent_info["phone"] = getattr(agent, "phone", None)
+    return agent_info
+
+
+# Output fields every card carries unless a sparse fieldset is requested
+CARD_FIELDS = (
+    "id", "title", "price", "city", "state", "area", "bedrooms", "bathrooms",
+    "image_paths", "listing_type", "rent_period", "units",
+)
+
+_FIELD_SERIALIZERS = {
+    "id": lambda l: l.id,
+    "title": lambda l: l.title,
+    "description": lambda l: l.description,
+    "price": lambda l: l.price,
+    "price_display": lambda l: range_displays(l)[0],
+    "city": lambda l: l.city,
+    "state": lambda l: l.state,
+    "area": lambda l: l.area,
+    "bedrooms": lambda l: l.bedrooms,
+    "bathrooms": lambda l: l.bathrooms,
+    "bed_display": lambda l: range_displays(l)[1],
+    "bath_display": lambda l: range_displays(l)[2],
+    "image_paths": parse_image_paths,
+    "thumbnail": lambda l: next(iter(parse_image_paths(l)), None),
+    "video_path": lambda l: to_supabase_url(l.video_path, 'listing-videos') if l.video_path else None,
+    "listing_type": lambda l: l.listing_type,
+    "rent_period": lambda l: l.rent_period,
+    "units": serialize_units,
+    "tags": parse_tags,
+    "amenities": lambda l: l.amenities,
+    "is_featured": lambda l: bool(getattr(l, 'is_featured', False)),
+    "is_promoted": lambda l: bool(getattr(l, 'is_promoted', False)),
+    "created_at": lambda l: l.created_at.isoformat() if l.created_at else None,
+    "updated_at": lambda l: l.updated_at.isoformat() if l.updated_at else None,
+    "agent_id": lambda l: l.agent_id,
+}
+
+
+def serialize_listing_fields(listing, names, fields=None):
+    """
+    Serialize the given output fields of a listing, limited to the requested fieldset.
+
+    Args:
+        names (iterable): Fields the endpoint produces by default, in output order.
+        fields (set): Sparse fieldset from requested_fields(); None keeps `names`.
+            Requested fields outside `names` are added when a serializer exists for them.
+    """
+    if fields is None:
+        selected = list(names)
+    else:
+        selected = [name for name in names if name in fields]
+        selected += sorted(f for f in fields if f not in names and f in _FIELD_SERIALIZERS)
+    return {name: _FIELD_SERIALIZERS[name](listing) for name in selected if name in _FIELD_SERIALIZERS}
+
+
+def serialize_listing_card(listing, fields=None):
+    """
+    Card payload shared by feeds, search, dashboards and recommendations.
+
+    Endpoints add their own extra keys (tags, promotion flags, favorites ...) on top,
+    or pass a sparse fieldset to get only the requested keys.
+    """
+    return serialize_listing_fields(listing, CARD_FIELDS, fields)
+
+
+def serialize_listing_cards(listings, fields=None):
+    """Serialize listings as cards, batch-loading their units first (when requested)."""
+    if wants(fields, "units"):
+        preload_relations(listings, units=True)
+    return [serialize_listing_card(listing, fields) for listing in listings]
+
+
+def serialize_listing_detail(listing):
+    """
+    Full listing payload used by the listing page and the batch endpoint.
+
+    Expects units and agent to be loaded (see eager_listing_options / load_listings);
+    recommendations and favorite status are added by the caller.
+    """
+    return {
+        "id": listing.id,
+        "title": listing.title,
+        "price": listing.price,
+        "city": listing.city,
+        "state": listing.state,
+        "area": listing.area,
+        "address": listing.address,
+        "bedrooms": listing.bedrooms,
+        "bathrooms": listing.bathrooms,
+        "description": listing.description,
+        "agent_id": listing.agent_id,
+        "image_paths": parse_image_paths(listing),
+        "video_path": to_supabase_url(listing.video_path, 'listing-videos') if listing.video_path else None,
+        "tags": parse_tags(listing),
+        "listing_type": listing.listing_type,
+        "rent_period": listing.rent_period,
+        "units": serialize_units(listing),
+        "created_at": listing.created_at.isoformat() if listing.created_at else None,
+        "updated_at": listing.updated_at.isoformat() if listing.updated_at else None,
+        "availability_date": listing.availability_date.isoformat() if listing.availability_date else None,
+        # ✅ New Optional Fields
+        "amenities": listing.amenities,
+        "interior_features": listing.interior_features,
+        "exterior_features": listing.exterior_features,
+        "leasing_terms": listing.leasing_terms,
+        "policy": listing.policy,
+        # ✅ Agent Full Details
+        "agent": serialize_agent(listing.agent)
+    }
+
+
+def serialize_listing_reels(listing):
+    """One reel-feed entry per reel attached to the listing."""
+    units_data = serialize_units(listing)
+    tags = [t.strip() for t in listing.tags.split(',')] if listing.tags else []
+    return [
+        {
+            'listing_id': listing.id,
+            'video_url': reel.video_path,  # Supabase Storage URL
+            'title': listing.title,
+            'location': f'{listing.area}, {listing.city}, {listing.state}',
+            'tags': tags,
+            'bedrooms': listing.bedrooms,
+            'listing_type': listing.listing_type,
+            'units': units_data,
+            'bedroom_range': bedroom_range(units_data)
+        }
+        for reel in listing.reels
+    ]
@@ -0,0 +1,46 @@
+from sqlalchemy import func, inspect
+from supabase_models import db, Interaction, ListingStats
+
+# Whether the listing_stats counter table exists (checked once per process)
+_stats_table_available = None
+
+
+def stats_table_available():
+    """Return True when the pre-aggregated listing_stats table has been migrated."""
+    global _stats_table_available
+    if _stats_table_available is None:
+        try:
+            _stats_table_available = inspect(db.engine).has_table(ListingStats.__tablename__)
+        except Exception as e:
+            print(f"Could not inspect listing_stats table: {e}")
+            _stats_table_available = False
+    return _stats_table_available
+
+
+def get_view_counts(listing_ids):
+    """
+    View counts for many listings in a single query.
+
+    Reads the listing_stats counters when available, otherwise falls back to
+    one GROUP BY listing_id over interactions.
+
+    Args:
+        listing_ids (list): Listing ids to count views for.
+
+    Returns:
+        dict: listing_id -> view count (listings without views are omitted).
+    """
+    if not listing_ids:
+        return {}
+
+    if stats_table_available():
+        rows = db.session.query(ListingStats.listing_id, ListingStats.view_count).filter(
+            ListingStats.listing_id.in_(listing_ids)
+        ).all()
+    else:
+        rows = db.session.query(Interaction.listing_id, func.count(Interaction.id)).filter(
+            Interaction.listing_id.in_(listing_ids),
+            Interaction.interaction_type == 'view'
+        ).group_by(Interaction.listing_id).all()
+
+    return {listing_id: count for listing_id, count in rows}
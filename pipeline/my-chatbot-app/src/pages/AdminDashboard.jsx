@@ -76,18 +76,28 @@ const AdminDashboard = () => {
             const { data: sessionData } = await supabase.auth.getSession();
             const session = sessionData?.session;
             const token = session?.access_token;
-            const res = await fetch(API_ENDPOINTS.ADMIN_AGENTS, {
-                headers: {
-                    'Authorization': `Bearer ${token}`,
-                    'Content-Type': 'application/json',
+            // Agents are paginated server-side; the filter dropdown needs all of them
+            const allAgents = [];
+            let page = 1;
+            let pages = 1;
+            do {
+                const params = new URLSearchParams({ page, per_page: 100 });
+                const res = await fetch(`${API_ENDPOINTS.ADMIN_AGENTS}?${params}`, {
+                    headers: {
+                        'Authorization': `Bearer ${token}`,
+                        'Content-Type': 'application/json',
+                    }
+                });
+                if (!res.ok) {
+                    console.error('Failed to fetch agents');
+                    break;
                 }
-            });
-            if (res.ok) {
                 const data = await res.json();
-                setAgents(data.agents);
-            } else {
-                console.error('Failed to fetch agents');
-            }
+                allAgents.push(...(data.agents || []));
+                pages = data.pages || 1;
+                page += 1;
+            } while (page <= pages);
+            setAgents(allAgents);
         } catch (error) {
             console.error('Error fetching agents:', error);
         }
@@ -15,6 +15,11 @@ const AgentDashboard = () => {
     const [listings, setListings] = useState([]);
     const [applications, setApplications] = useState([]);
     const [bookings, setBookings] = useState([]);
+    // Applications and bookings are paginated by the backend (next_cursor); totals come with the first page
+    const [applicationsCursor, setApplicationsCursor] = useState(null);
+    const [applicationsTotal, setApplicationsTotal] = useState(null);
+    const [bookingsCursor, setBookingsCursor] = useState(null);
+    const [bookingsTotal, setBookingsTotal] = useState(null);
     const [loading, setLoading] = useState(true);
     const [applicationsLoading, setApplicationsLoading] = useState(true);
     const [bookingsLoading, setBookingsLoading] = useState(true);
@@ -29,8 +34,44 @@ const AgentDashboard = () => {
     const totalListings = listings.length;
     const totalViews = listings.reduce((sum, listing) => sum + (listing.views || 0), 0);
     const totalReels = listings.reduce((sum, listing) => sum + (listing.reels?.length || 0), 0);
-    const totalApplications = applications.length;
-    const totalBookings = bookings.length;
+    const totalApplications = applicationsTotal ?? applications.length;
+    const totalBookings = bookingsTotal ?? bookings.length;
+
+    // One page of applications or bookings (null on failure)
+    const fetchAgentPage = async (endpoint, cursor, token) => {
+        const url = cursor ? `${endpoint}?cursor=${encodeURIComponent(cursor)}` : endpoint;
+        const res = await fetch(url, {
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+        if (!res.ok) return null;
+        const data = await res.json();
+        return data.success ? data : null;
+    };
+
+    const getToken = async () => {
+        const { data: sessionData } = await supabase.auth.getSession();
+        return sessionData?.session?.access_token;
+    };
+
+    const loadMoreApplications = async () => {
+        const token = await getToken();
+        if (!token || !applicationsCursor) return;
+        const data = await fetchAgentPage(API_ENDPOINTS.AGENT_APPLICATIONS(currentUser.id), applicationsCursor, token);
+        if (data) {
+            setApplications(prev => [...prev, ...(data.applications || [])]);
+            setApplicationsCursor(data.next_cursor || null);
+        }
+    };
+
+    const loadMoreBookings = async () => {
+        const token = await getToken();
+        if (!token || !bookingsCursor) return;
+        const data = await fetchAgentPage(API_ENDPOINTS.AGENT_BOOKINGS(currentUser.id), bookingsCursor, token);
+        if (data) {
+            setBookings(prev => [...prev, ...(data.bookings || [])]);
+            setBookingsCursor(data.next_cursor || null);
+        }
+    };
 
     useEffect(() => {
         const fetchAgentData = async () => {
@@ -57,26 +98,20 @@ const AgentDashboard = () => {
                     setListings(data.listings || []);
                 }
                 setLoading(false);
-                // Fetch applications
-                const appsRes = await fetch(API_ENDPOINTS.AGENT_APPLICATIONS(currentUser.id), {
-                    headers: { 'Authorization': `Bearer ${token}` }
-                });
-                if (appsRes.ok) {
-                    const data = await appsRes.json();
-                    if (data.success) {
-                        setApplications(data.applications || []);
-                    }
+                // Fetch the first page of applications
+                const appsData = await fetchAgentPage(API_ENDPOINTS.AGENT_APPLICATIONS(currentUser.id), null, token);
+                if (appsData) {
+                    setApplications(appsData.applications || []);
+                    setApplicationsCursor(appsData.next_cursor || null);
+                    setApplicationsTotal(appsData.total ?? null);
                 }
                 setApplicationsLoading(false);
-                // Fetch bookings
-                const bookingsRes = await fetch(API_ENDPOINTS.AGENT_BOOKINGS(currentUser.id), {
-                    headers: { 'Authorization': `Bearer ${token}` }
-                });
-                if (bookingsRes.ok) {
-                    const data = await bookingsRes.json();
-                    if (data.success) {
-                        setBookings(data.bookings || []);
-                    }
+                // Fetch the first page of bookings
+                const bookingsData = await fetchAgentPage(API_ENDPOINTS.AGENT_BOOKINGS(currentUser.id), null, token);
+                if (bookingsData) {
+                    setBookings(bookingsData.bookings || []);
+                    setBookingsCursor(bookingsData.next_cursor || null);
+                    setBookingsTotal(bookingsData.total ?? null);
                 }
                 setBookingsLoading(false);
             } catch (err) {
@@ -805,6 +840,16 @@ const AgentDashboard = () => {
                                     </tbody>
                                 </table>
                             </div>
+                            {applicationsCursor && (
+                                <div className="text-center py-4 border-t border-gray-200">
+                                    <button
+                                        onClick={loadMoreApplications}
+                                        className="text-sm text-blue-600 hover:underline"
+                                    >
+                                        Load more applications
+                                    </button>
+                                </div>
+                            )}
                         </div>
                     )}
                 </div>
@@ -921,6 +966,16 @@ const AgentDashboard = () => {
                                     </tbody>
                                 </table>
                             </div>
+                            {bookingsCursor && (
+                                <div className="text-center py-4 border-t border-gray-200">
+                                    <button
+                                        onClick={loadMoreBookings}
+                                        className="text-sm text-blue-600 hover:underline"
+                                    >
+                                        Load more bookings
+                                    </button>
+                                </div>
+                            )}
                         </div>
                     )}
                 </div>
@@ -118,6 +118,7 @@ const Community = () => {
   const [filter, setFilter] = useState('all');
   const [allPosts, setAllPosts] = useState([]); // Full data from backend
   const [posts, setPosts] = useState([]); // What's shown on screen
+  const [nextCursor, setNextCursor] = useState(null); // Cursor for the next page of posts
   const [likeLoading, setLikeLoading] = useState(null);
   const [commentText, setCommentText] = useState({});
   const [showPostForm, setShowPostForm] = useState(false);
@@ -130,16 +131,23 @@ const Community = () => {
   const [editContent, setEditContent] = useState('');
   const [editCategories, setEditCategories] = useState([]);
 
-  const fetchPosts = () => {
-    const url = `${API_ENDPOINTS.COMMUNITY_POSTS}${currentUser ? `?user_id=${currentUser.id}` : ''}`;
+  const fetchPosts = (cursor = null) => {
+    const params = new URLSearchParams();
+    if (currentUser) params.set('user_id', currentUser.id);
+    if (cursor) params.set('cursor', cursor);
+    const query = params.toString();
+    const url = `${API_ENDPOINTS.COMMUNITY_POSTS}${query ? `?${query}` : ''}`;
     fetch(url)
       .then(res => {
         if (!res.ok) throw new Error('Failed to fetch community posts');
         return res.json();
       })
       .then(data => {
-        setAllPosts(data.posts);
-        setPosts(data.posts);
+        // Later pages are appended to what is already loaded
+        const merged = cursor ? [...allPosts, ...data.posts] : data.posts;
+        setAllPosts(merged);
+        setPosts(merged);
+        setNextCursor(data.next_cursor || null);
       })
       .catch(err => {
         console.error("❌ Failed to load community posts:", err);
@@ -303,10 +311,7 @@ const Community = () => {
       });
 
       // Re-fetch real posts
-      const res = await fetch(API_ENDPOINTS.COMMUNITY);
-      const data = await res.json();
-      setAllPosts(data.posts);
-      setPosts(data.posts);
+      fetchPosts();
     } catch (err) {
       console.error("❌ Failed to post:", err);
     } finally {
@@ -592,6 +597,16 @@ const Community = () => {
           )) : (
             <p className="text-center text-gray-500">No discussions yet.</p>
           )}
+          {nextCursor && (
+            <div className="text-center">
+              <button
+                onClick={() => fetchPosts(nextCursor)}
+                className="text-sm text-blue-600 hover:underline"
+              >
+                Load more discussions
+              </button>
+            </div>
+          )}
         </div>
       </div>
     </div>
@@ -34,6 +34,7 @@ const ListingDetails = () => {
     const { id } = useParams();
     const navigate = useNavigate();
     const [listing, setListing] = useState(null);
+    const [recommendations, setRecommendations] = useState({ similar_properties: [], properties_you_may_like: [] });
     const [currentTab, setCurrentTab] = useState('description');
     const [thumbsSwiper, setThumbsSwiper] = useState(null);
     const { currentUser } = useContext(AuthContext);
@@ -235,6 +236,28 @@ const ListingDetails = () => {
         fetchListing();
     }, [id, currentUser]);
 
+    // Recommendations load separately so the listing renders without waiting for them
+    useEffect(() => {
+        const controller = new AbortController();
+        const fetchRecommendations = async () => {
+            try {
+                const url = `${API_ENDPOINTS.LISTING_RECOMMENDATIONS(id)}${currentUser?.id ? `?user_id=${currentUser.id}` : ''}`;
+                const res = await fetch(url, { signal: controller.signal });
+                if (!res.ok) throw new Error('Failed to fetch recommendations');
+                const data = await res.json();
+                setRecommendations({
+                    similar_properties: data.similar_properties || [],
+                    properties_you_may_like: data.properties_you_may_like || []
+                });
+            } catch (err) {
+                if (err.name !== 'AbortError') console.error('❌ Recommendations error:', err);
+            }
+        };
+        setRecommendations({ similar_properties: [], properties_you_may_like: [] });
+        fetchRecommendations();
+        return () => controller.abort();
+    }, [id, currentUser]);
+
     const handleFavorite = async () => {
         if (!currentUser) {
             alert('Please login to save listings');
@@ -374,7 +397,8 @@ const ListingDetails = () => {
     if (error) return <div className="text-center py-10 text-red-500">{error}</div>;
     if (!listing) return <div className="text-center py-10">Listing not found</div>;
 
-    const { image_paths = [], video_path, similar_properties = [], properties_you_may_like = [], lat, lng } = listing;
+    const { image_paths = [], video_path, lat, lng } = listing;
+    const { similar_properties = [], properties_you_may_like = [] } = recommendations;
     const mediaSlides = [
         ...image_paths.map((img) => ({ type: 'image', src: img })),
         ...(video_path ? [{ type: 'video', src: video_path }] : []),
@@ -70,6 +70,9 @@ const API_ENDPOINTS = {
   FEATURED_PROPERTIES: `${API_BASE_URL}/api/featured-properties`,
   SEARCH_PROPERTIES: `${API_BASE_URL}/api/search-properties`,
   LISTING_DETAILS: (id) => `${API_BASE_URL}/api/listing/${id}`,
+  LISTING_RECOMMENDATIONS: (id) => `${API_BASE_URL}/api/listing/${id}/recommendations`,
+  LISTINGS_BATCH: (ids, view = 'card') => `${API_BASE_URL}/api/listings?ids=${ids.join(',')}&view=${view}`,
+  TRENDING_PROPERTIES: `${API_BASE_URL}/api/trending`,
   UPDATE_LISTING: (id) => `${API_BASE_URL}/api/listing/${id}`,
   CREATE_LISTING: `${API_BASE_URL}/api/listings`,
   PROMOTE_LISTING: (id) => `${API_BASE_URL}/api/listing/${id}/promote`,
@@ -0,0 +1,92 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Clamp a requested page size to [1, MAX_PAGE_SIZE]."""
+    if not value:
+        return default
+    return max(1, min(int(value), MAX_PAGE_SIZE))
+
+
+def encode_cursor(values):
+    """
+    Encode the sort-key values of the last row on a page into an opaque cursor.
+
+    Datetimes are stored as ISO strings and restored by decode_cursor.
+    """
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        list: The sort-key values, or None if the cursor is missing or malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(payload, list):
+        return None
+    return [
+        datetime.fromisoformat(value["dt"]) if isinstance(value, dict) and "dt" in value else value
+        for value in payload
+    ]
+
+
+def after_cursor(columns, values):
+    """
+    Keyset condition selecting rows that come after `values` when ordering by
+    `columns` descending, e.g. (a < x) OR (a = x AND b < y).
+
+    Args:
+        columns (list): Ordered columns, most significant first (last one should be unique, e.g. id).
+        values (list): Cursor values for those columns.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equals = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equals, column < values[i]))
+    return or_(*clauses)
+
+
+def paginate_keyset(query, columns, cursor, limit):
+    """
+    Apply a descending keyset page to a query.
+
+    Args:
+        query: SQLAlchemy query already filtered and selecting rows exposing `columns` keys.
+        columns (list): Sort columns, most significant first, ending with a unique column.
+        cursor (str): Cursor from a previous page (or None for the first page).
+        limit (int): Page size.
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page.
+    """
+    values = decode_cursor(cursor)
+    if values and len(values) == len(columns):
+        query = query.filter(after_cursor(columns, values))
+
+    rows = query.order_by(*[column.desc() for column in columns]).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return rows, next_cursor
@@ -0,0 +1,219 @@
+"""
+Precomputed per-user recommendations.
+
+A batch job computes the top-N listing ids for every user in the recommender
+state and stores them in Redis:
+
+    user_recs:{user_id}   ->  {"ids": [...], "model": MODEL_VERSION, "built_at": ts}
+    user_recs:popular     ->  same shape, for users without interactions
+    user_recs:meta        ->  hash with model, watermark (Interaction.id), built_at,
+                             full_built_at (last full run)
+
+The full run covers every user; the incremental run only recomputes users with
+interactions newer than the stored watermark. The scheduler starts a full run
+only when the last one is older than USER_RECS_FULL_SECONDS (worker restarts do
+not trigger one); cron can run the CLI below instead. Read endpoints call
+get_recommended_ids(), which is one GET on a hit and computes (and stores) a
+single user's list on a miss.
+
+Run manually with:  python recommendation_jobs.py [--full]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+from als_model import get_als_model
+from helpers import sparse_user_user_recs
+from json_provider import dumps as json_dumps, loads as json_loads
+from recommender_state import get_recommender_state
+from redis_helper import redis_client, is_redis_available
+from supabase_models import db, Interaction
+from trending import get_trending_ids
+
+USER_RECS_PREFIX = "user_recs"
+USER_RECS_META_KEY = f"{USER_RECS_PREFIX}:meta"
+POPULAR_RECS_KEY = f"{USER_RECS_PREFIX}:popular"
+# Bump when the recommendation logic changes so stale entries are recomputed
+MODEL_VERSION = os.getenv("USER_RECS_MODEL_VERSION", "als-usercf-2")
+USER_RECS_N = int(os.getenv("USER_RECS_N", 20))
+USER_RECS_TTL = int(os.getenv("USER_RECS_TTL", 2 * 24 * 60 * 60))
+USER_RECS_FULL_SECONDS = int(os.getenv("USER_RECS_FULL_SECONDS", 6 * 60 * 60))
+
+
+def user_recs_key(user_id):
+    return f"{USER_RECS_PREFIX}:{user_id}"
+
+
+def _entry(ids):
+    return json_dumps({"ids": ids, "model": MODEL_VERSION, "built_at": int(time.time())})
+
+
+def popular_ids(snapshot, n=USER_RECS_N):
+    """Trending listing ids, or the snapshot's all-time most interacted-with when there is no trending data."""
+    ids = get_trending_ids(n)
+    if ids:
+        return ids
+    top_idx = np.argsort(-snapshot.listing_counts, kind="stable")[:n]
+    return [int(snapshot.listing_ids[i]) for i in top_idx if snapshot.listing_counts[i] > 0]
+
+
+def compute_user_recs(snapshot, user_id, n=USER_RECS_N):
+    """
+    Top-n listing ids for one user: ALS factors when the user is in the trained
+    model, user-user CF otherwise, popular listings when the user has no interactions.
+
+    Args:
+        snapshot (RecommenderSnapshot): Current recommender data.
+        user_id (int): The user.
+        n (int): Number of ids to compute.
+    """
+    user_idx = snapshot.user_index.get(user_id)
+    if user_idx is None:
+        return popular_ids(snapshot, n)
+    model = get_als_model()
+    if model is not None:
+        ids = model.recommend(user_id, n, exclude_ids=snapshot.user_listing_ids(user_id))
+        if ids:
+            return ids
+    cols = sparse_user_user_recs(
+        user_idx, n, snapshot.matrix, snapshot.user_counts, snapshot.popularity_rank
+    )
+    return [int(snapshot.listing_ids[col]) for col in cols]
+
+
+def store_user_recs(recs):
+    """Write (user_id, ids) pairs to Redis in batched pipelines."""
+    pipe = redis_client.pipeline(transaction=False)
+    written = 0
+    for user_id, ids in recs:
+        pipe.setex(user_recs_key(user_id), USER_RECS_TTL, _entry(ids))
+        written += 1
+        if written % 500 == 0:
+            pipe.execute()
+    pipe.execute()
+    return written
+
+
+def _changed_user_ids(watermark):
+    """Users with interactions newer than the watermark."""
+    rows = db.session.query(Interaction.user_id).filter(
+        Interaction.id > watermark
+    ).distinct().all()
+    return [row[0] for row in rows]
+
+
+def refresh_user_recommendations(full=False, n=USER_RECS_N):
+    """
+    Recompute and store precomputed recommendations.
+
+    Args:
+        full (bool): Recompute every user; otherwise only users whose interactions
+            changed since the last run (falls back to full when there is no previous
+            run or the model version changed).
+        n (int): Recommendations kept per user.
+
+    Returns:
+        int: Number of users written (0 when Redis is unavailable).
+    """
+    if not is_redis_available():
+        print("Redis not available, skipping user recommendation refresh")
+        return 0
+
+    started = time.time()
+    snapshot = get_recommender_state().refresh(force_full=full)
+
+    meta = redis_client.hgetall(USER_RECS_META_KEY) or {}
+    if meta.get("model") != MODEL_VERSION or "watermark" not in meta:
+        full = True
+
+    if full:
+        user_ids = [int(uid) for uid in snapshot.user_ids]
+    else:
+        user_ids = _changed_user_ids(int(meta["watermark"]))
+
+    written = store_user_recs((user_id, compute_user_recs(snapshot, user_id, n)) for user_id in user_ids)
+    redis_client.setex(POPULAR_RECS_KEY, USER_RECS_TTL, _entry(popular_ids(snapshot, n)))
+    meta_update = {
+        "model": MODEL_VERSION,
+        "watermark": snapshot.watermark,
+        "built_at": int(time.time()),
+        "users": written
+    }
+    if full:
+        meta_update["full_built_at"] = int(time.time())
+    redis_client.hset(USER_RECS_META_KEY, mapping=meta_update)
+    print(f"User recommendations refreshed ({'full' if full else 'incremental'}) "
+          f"for {written} users in {time.time() - started:.1f}s")
+    return written
+
+
+def full_refresh_due():
+    """Whether the last full run is missing, for another model version, or older than USER_RECS_FULL_SECONDS."""
+    meta = redis_client.hgetall(USER_RECS_META_KEY) or {}
+    if meta.get("model") != MODEL_VERSION or "full_built_at" not in meta:
+        return True
+    return time.time() - int(meta["full_built_at"]) > USER_RECS_FULL_SECONDS
+
+
+def refresh_user_recommendations_if_due(n=USER_RECS_N):
+    """Full refresh when full_refresh_due(), else nothing. Returns users written."""
+    if not is_redis_available() or not full_refresh_due():
+        return 0
+    return refresh_user_recommendations(full=True, n=n)
+
+
+def _read_entry(key):
+    raw = redis_client.get(key)
+    if not raw:
+        return None
+    entry = json_loads(raw)
+    return entry["ids"] if entry.get("model") == MODEL_VERSION else None
+
+
+def get_recommended_ids(user_id, rec_num=5):
+    """
+    Precomputed recommendation ids of a user, best first.
+
+    One Redis GET when the batch job has run; otherwise the user's list is
+    computed from the recommender state and stored for the next request.
+
+    Args:
+        user_id (int): The user (None for anonymous visitors).
+        rec_num (int): Number of ids to return.
+    """
+    redis_ok = is_redis_available()
+    if redis_ok:
+        try:
+            ids = _read_entry(user_recs_key(user_id) if user_id else POPULAR_RECS_KEY)
+            if ids is not None:
+                return ids[:rec_num]
+        except Exception as e:
+            print(f"User recommendation read error: {e}")
+
+    snapshot = get_recommender_state().current()
+    ids = compute_user_recs(snapshot, user_id, max(rec_num, USER_RECS_N)) if user_id else popular_ids(snapshot)
+    if redis_ok and user_id and user_id in snapshot.user_index:
+        try:
+            store_user_recs([(user_id, ids)])
+        except Exception as e:
+            print(f"User recommendation write error: {e}")
+    return ids[:rec_num]
+
+
+def invalidate_user_recs(user_id):
+    """Drop a user's precomputed list after a save or unsave (so saved listings are not recommended)."""
+    if not is_redis_available():
+        return
+    try:
+        redis_client.delete(user_recs_key(user_id))
+    except Exception as e:
+        print(f"User recommendation invalidate error: {e}")
+
+
+if __name__ == "__main__":
+    from app import app
+
+    with app.app_context():
+        refresh_user_recommendations(full="--full" in sys.argv)
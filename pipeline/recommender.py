@@ -1,141 +1,112 @@
 from helpers import *
 from supabase_models import Listing
+from recommender_state import get_recommender_state
+from listing_neighbors import get_neighbor_ids
+from listing_embeddings import similar_listing_ids
+from als_model import get_als_model
+from trending import get_trending_ids
 import numpy as np
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
 
 
 class Recommender():
-    def __init__(self, user_id, rec_num=5) -> None:
+    def __init__(self, user_id, rec_num=5, state=None) -> None:
         self.user_id = user_id
         self.rec_num = rec_num
-        self.data = load_datasets()
-        self.listing_data = load_listing_data()
-        self.user_item_mat = create_user_item_matrix(self.data)
+        # Shared, incrementally refreshed data of this worker (see recommender_state.py)
+        self.state = (state or get_recommender_state()).current()
+        self.data = self.state.interactions
+        self.listing_data = self.state.listings
+
+    @property
+    def user_item_mat(self):
+        # DataFrame view for the pandas helpers; the hot paths use self.state.matrix directly
+        return self.state.user_item_frame()
 
     def rank_based(self):
-        top_listing_ids = get_top_listing_ids(self.rec_num, self.data)
-        # Fetch the listings from the database
-        top_listings = Listing.query.filter(Listing.id.in_(top_listing_ids)).all()
-        return top_listings
+        # Trending listings (time-decayed, see trending.py)
+        top_listing_ids = get_trending_ids(self.rec_num)
+        if not top_listing_ids:
+            # No trending data yet: most interacted-with listings from the precomputed counts
+            top_idx = np.argsort(-self.state.listing_counts, kind="stable")[:self.rec_num]
+            top_listing_ids = [int(self.state.listing_ids[i]) for i in top_idx if self.state.listing_counts[i] > 0]
+        # Fetch the listings from the database, keeping the ranking order
+        listings_by_id = {
+            listing.id: listing
+            for listing in Listing.query.filter(Listing.id.in_(top_listing_ids)).all()
+        } if top_listing_ids else {}
+        return [listings_by_id[i] for i in top_listing_ids if i in listings_by_id]
 
     def user_rec(self):
         """
-        Generate personalized recommendations based on saved listings' area and city.
-        
+        Generate personalized recommendations.
+
+        Uses the background-trained ALS factors when the user is in the model (one
+        dot product plus argpartition, see als_model.py). Otherwise similarity is one
+        sparse mat-vec over the shared user-item matrix and each neighbour's listings
+        are ordered by precomputed popularity ranks (see helpers.sparse_user_user_recs).
+
         Returns:
         - A list of recommended listing objects.
         """
-        recs = []
-
-        # Get the user's saved listing IDs and their associated areas/cities
-        saved_listings = get_user_listings(self.user_id, self.user_item_mat)
-        saved_areas = self.listing_data[self.listing_data['id'].isin(saved_listings)]['area'].unique()
-        saved_cities = self.listing_data[self.listing_data['id'].isin(saved_listings)]['city'].unique()
-
-        # Get the neighbors (similar users)
-        neighbors_df = get_top_sorted_users(self.user_id, self.data, self.user_item_mat)
-
-        for neighbor in neighbors_df['neighbor_id']:
-            neighbor_listings = get_top_sorted_lists(neighbor, self.data, self.user_item_mat)
-
-            # Prioritize by area and city
-            for listing_id in neighbor_listings:
-                listing = self.listing_data[self.listing_data['id'] == listing_id].iloc[0]
-                if listing_id not in saved_listings:  # Exclude already saved listings
-                    if listing['area'] in saved_areas:
-                        recs.append(listing_id)
-                    elif listing['city'] in saved_cities and listing['area'] not in saved_areas:
-                        recs.append(listing_id)
-                    else:
-                        recs.append(listing_id)
-                    if len(recs) >= self.rec_num:
-                        break
-            if len(recs) >= self.rec_num:
-                break
-
-        # Fetch listings from the database
-        recommended_listings = Listing.query.filter(Listing.id.in_(recs[:self.rec_num])).all()
-
-        return recommended_listings
+        user_idx = self.state.user_index.get(self.user_id)
+        if user_idx is None:
+            # Interactions newer than the snapshot: popular listings until the next refresh
+            return self.rank_based()
+
+        model = get_als_model()
+        recs = model.recommend(
+            self.user_id, self.rec_num, exclude_ids=self.state.user_listing_ids(self.user_id)
+        ) if model is not None else []
+        if not recs:
+            rec_cols = sparse_user_user_recs(
+                user_idx, self.rec_num, self.state.matrix,
+                self.state.user_counts, self.state.popularity_rank
+            )
+            recs = [int(self.state.listing_ids[col]) for col in rec_cols]
+
+        # Fetch listings from the database, keeping the recommendation order
+        listings_by_id = {
+            listing.id: listing
+            for listing in Listing.query.filter(Listing.id.in_(recs)).all()
+        } if recs else {}
+        return [listings_by_id[i] for i in recs if i in listings_by_id]
 
     
     def content_based(self, listing_id):
         """
         Recommend similar listings based on content attributes and prioritize by area and city.
 
+        Uses the listing's text-embedding neighbours (FAISS, see listing_embeddings.py)
+        when available, otherwise the precomputed feature neighbours (listing_neighbors.py,
+        read from the memory-mapped feature store when it has them).
+        Both are ordered same area first, then same city, then elsewhere, and are
+        fetched with one query.
+
         Args:
         - listing_id: The ID of the listing the user is viewing.
 
         Returns:
         - List of recommended listing objects.
         """
-        feature_columns = ["bedrooms", "bathrooms", "price"]
-        content_features = self.listing_data[feature_columns]
-
-        # Normalize the feature values
-        content_features_normalized = (content_features - content_features.mean()) / content_features.std()
-
-        # Compute cosine similarity between listings
-        similarity_matrix = cosine_similarity(content_features_normalized)
-
-        # Get the index of the given listing_id
-        listing_index = self.listing_data.index[self.listing_data['id'] == listing_id].tolist()[0]
-
-        # Get similarity scores and sort
-        similarity_scores = similarity_matrix[listing_index]
-        similar_indices = similarity_scores.argsort()[::-1]
-        similar_indices = [idx for idx in similar_indices if idx != listing_index]  # Exclude the current listing
-
-        # Retrieve the listing data for filtering
-        current_listing = self.listing_data.iloc[listing_index]
-        current_area = current_listing['area']
-        current_city = current_listing['city']
-
-        # Get all similar listings
-        similar_listings = self.listing_data.iloc[similar_indices]
-        
-        # Create priority groups with explicit ordering
-        recommended_ids = []
-        seen_ids = set()
-        
-        # 1. First priority: Same area (maintain original similarity order)
-        area_listings = similar_listings[similar_listings['area'] == current_area]
-        for _, listing in area_listings.iterrows():
-            if listing['id'] not in seen_ids:
-                recommended_ids.append(listing['id'])
-                seen_ids.add(listing['id'])
-                if len(recommended_ids) >= self.rec_num:
-                    break
-        
-        # 2. Second priority: Same city, different area (maintain original similarity order)
-        if len(recommended_ids) < self.rec_num:
-            city_listings = similar_listings[(similar_listings['city'] == current_city) & (similar_listings['area'] != current_area)]
-            for _, listing in city_listings.iterrows():
-                if listing['id'] not in seen_ids:
-                    recommended_ids.append(listing['id'])
-                    seen_ids.add(listing['id'])
-                    if len(recommended_ids) >= self.rec_num:
-                        break
-        
-        # 3. Third priority: Other cities (maintain original similarity order)
-        if len(recommended_ids) < self.rec_num:
-            other_listings = similar_listings[similar_listings['city'] != current_city]
-            for _, listing in other_listings.iterrows():
-                if listing['id'] not in seen_ids:
-                    recommended_ids.append(listing['id'])
-                    seen_ids.add(listing['id'])
-                    if len(recommended_ids) >= self.rec_num:
-                        break
-        
         # exclude saved listings
-        saved_listings = get_user_listings(self.user_id, self.user_item_mat)
+        saved_listings = set(self.state.user_listing_ids(self.user_id))
+
+        # Read enough neighbours to still have rec_num after dropping saved ones
+        k = self.rec_num + len(saved_listings)
+        neighbor_ids = similar_listing_ids(listing_id, k, self.listing_data)
+        if not neighbor_ids:
+            # Neighbour table of the shared feature store, then Redis / on-demand scoring
+            neighbor_ids = self.state.neighbor_ids(listing_id, k)
+        if not neighbor_ids:
+            neighbor_ids = get_neighbor_ids(
+                listing_id, k=k, listings=self.listing_data, features=self.state.listing_features
+            )
+        recommended_ids = [i for i in neighbor_ids if i not in saved_listings][:self.rec_num]
 
         # Fetch the listings from the database in the correct order
-        recommended_listings = []
-        for listing_id in recommended_ids:
-            if listing_id not in saved_listings:  #skip saved listings
-                listing = Listing.query.get(listing_id)
-                if listing:
-                    recommended_listings.append(listing)
-        return recommended_listings
\ No newline at end of file
+        listings_by_id = {
+            listing.id: listing
+            for listing in Listing.query.filter(Listing.id.in_(recommended_ids)).all()
+        } if recommended_ids else {}
+        return [listings_by_id[i] for i in recommended_ids if i in listings_by_id]
@@ -0,0 +1,388 @@
+"""
+Process-wide recommender state.
+
+Holds the user-item interaction matrix as a scipy CSR matrix with id <-> index
+maps, built once per worker and then updated incrementally from Interaction rows
+newer than a watermark (Interaction.id). A periodic full rebuild picks up deletions
+(e.g. unsaves) that a watermark cannot see.
+
+When the feature store (feature_store.py) has a recent published version, the
+snapshot is instead backed by its memory-mapped files, shared by all workers,
+and swapped for the next version once it is published.
+
+Usage:
+    state = get_recommender_state()
+    snapshot = state.current()          # refreshes if stale, never blocks readers for long
+    row = snapshot.user_row(user_id)    # sparse 1 x n_listings row
+"""
+import os
+import threading
+import time
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+import feature_store
+from helpers import (
+    INTERACTION_CODES, INTERACTION_DTYPES, interactions_query, item_popularity_ranks,
+    listings_watermark, load_listing_data, read_sql_frame
+)
+
+# Interaction weights used in the user-item matrix (other types are ignored)
+INTERACTION_WEIGHTS = INTERACTION_CODES
+
+REFRESH_SECONDS = int(os.getenv("RECOMMENDER_REFRESH_SECONDS", 60))
+FULL_REBUILD_SECONDS = int(os.getenv("RECOMMENDER_FULL_REBUILD_SECONDS", 3600))
+
+
+class ArrayIndex(Mapping):
+    """
+    Read-only id -> position map over an id array, by binary search on the ids in
+    sorted order (no per-id Python objects, so it can sit on memory-mapped arrays).
+
+    Args:
+        ids (np.ndarray): position -> id.
+        order (np.ndarray): argsort of ids (computed when not given).
+        sorted_ids (np.ndarray): ids[order] (computed when not given).
+    """
+
+    def __init__(self, ids, order=None, sorted_ids=None):
+        self.ids = ids
+        self.order = np.argsort(ids, kind="stable") if order is None else order
+        self.sorted_ids = ids[self.order] if sorted_ids is None else sorted_ids
+
+    def _position(self, key):
+        try:
+            key = int(key)
+        except (TypeError, ValueError):
+            return None
+        i = int(np.searchsorted(self.sorted_ids, key))
+        if i < len(self.sorted_ids) and self.sorted_ids[i] == key:
+            return int(self.order[i])
+        return None
+
+    def __getitem__(self, key):
+        position = self._position(key)
+        if position is None:
+            raise KeyError(key)
+        return position
+
+    def __contains__(self, key):
+        return self._position(key) is not None
+
+    def __iter__(self):
+        return (int(i) for i in self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class RecommenderSnapshot:
+    """
+    Immutable view of the recommender data at one watermark.
+
+    Attributes:
+        matrix (csr_matrix): users x listings, summed interaction weights.
+        user_ids / listing_ids (np.ndarray): index -> id.
+        user_index / listing_index (Mapping): id -> index (dict, or ArrayIndex for stored snapshots).
+        listing_counts (np.ndarray): number of interactions per listing column.
+        user_counts (np.ndarray): number of interactions per user row.
+        interactions (pd.DataFrame): user_id, listing_id, interaction_type (numeric weight).
+        listings (pd.DataFrame): listing features (id, bedrooms, bathrooms, price, area, city, state).
+        watermark (int): highest Interaction.id included.
+        version (int): bumped on every change, usable as a cache key component.
+        neighbors (tuple): (ids, neighbor_ids, scores) neighbour table, when loaded from the store.
+        store_version (str): feature store version backing the arrays (None when built here).
+    """
+
+    def __init__(self, matrix, user_ids, listing_ids, listing_counts, user_counts,
+                 interactions, listings, watermark, version, user_index=None, listing_index=None,
+                 listing_features=None, neighbors=None, store_version=None):
+        self.matrix = matrix
+        self.user_ids = user_ids
+        self.listing_ids = listing_ids
+        self.user_index = user_index if user_index is not None else {
+            int(uid): i for i, uid in enumerate(user_ids)
+        }
+        self.listing_index = listing_index if listing_index is not None else {
+            int(lid): i for i, lid in enumerate(listing_ids)
+        }
+        self.listing_counts = listing_counts
+        self.user_counts = user_counts
+        self.interactions = interactions
+        self.listings = listings
+        self.watermark = watermark
+        self.version = version
+        self.neighbors = neighbors
+        self.store_version = store_version
+        self._listing_features = listing_features
+        self._user_item_frame = None
+        self._popularity_rank = None
+
+    def user_row(self, user_id):
+        """Sparse interaction row of a user (None when the user has no interactions)."""
+        idx = self.user_index.get(user_id)
+        if idx is None:
+            return None
+        return self.matrix.getrow(idx)
+
+    def user_listing_ids(self, user_id):
+        """Listing ids the user has interacted with."""
+        row = self.user_row(user_id)
+        if row is None:
+            return []
+        return [int(lid) for lid in self.listing_ids[row.indices[row.data > 0]]]
+
+    @property
+    def popularity_rank(self):
+        """Rank of each listing column by interaction count (0 = most popular), computed once."""
+        if self._popularity_rank is None:
+            self._popularity_rank = item_popularity_ranks(self.listing_counts)
+        return self._popularity_rank
+
+    @property
+    def listing_features(self):
+        """(unit feature matrix, area codes, city codes) in listings row order, computed once."""
+        if self._listing_features is None:
+            from listing_neighbors import listing_features
+            self._listing_features = listing_features(self.listings)
+        return self._listing_features
+
+    def neighbor_ids(self, listing_id, k):
+        """Neighbour ids of a listing from the stored neighbour table ([] when not in it)."""
+        if self.neighbors is None:
+            return []
+        ids, neighbor_ids, _ = self.neighbors
+        row = int(np.searchsorted(ids, listing_id))
+        if row >= len(ids) or ids[row] != listing_id:
+            return []
+        return [int(i) for i in neighbor_ids[row, :k] if i >= 0]
+
+    def user_item_frame(self):
+        """
+        Sparse-backed DataFrame view of the matrix (users x listings) for the pandas
+        helpers in helpers.py. Built lazily once per snapshot.
+        """
+        if self._user_item_frame is None:
+            self._user_item_frame = pd.DataFrame.sparse.from_spmatrix(
+                self.matrix, index=self.user_ids, columns=self.listing_ids
+            )
+        return self._user_item_frame
+
+
+def _empty_interactions():
+    return pd.DataFrame({
+        "user_id": pd.Series(dtype="int32"),
+        "listing_id": pd.Series(dtype="int32"),
+        "interaction_type": pd.Series(dtype="int8"),
+    })
+
+
+def build_snapshot(ids, user_ids, listing_ids, weights, listings, version=1):
+    """
+    RecommenderSnapshot from interaction arrays (ordered by interaction id) and a listings frame.
+
+    Used for full rebuilds and by the offline benchmarks to build a snapshot from a
+    training split without a database.
+    """
+    # Columns cover every listing (not only interacted ones) so new listings have an index
+    all_listing_ids = np.union1d(listings["id"].to_numpy(dtype=np.int64), listing_ids)
+    uniq_users = np.unique(user_ids)
+    rows = np.searchsorted(uniq_users, user_ids)
+    cols = np.searchsorted(all_listing_ids, listing_ids)
+
+    matrix = csr_matrix((weights, (rows, cols)), shape=(len(uniq_users), len(all_listing_ids)), dtype=np.float32)
+    matrix.sum_duplicates()
+    counts = np.bincount(cols, minlength=len(all_listing_ids)).astype(np.int64)
+    user_counts = np.bincount(rows, minlength=len(uniq_users)).astype(np.int64)
+
+    interactions = pd.DataFrame({
+        "user_id": user_ids.astype(np.int32),
+        "listing_id": listing_ids.astype(np.int32),
+        "interaction_type": weights.astype(np.int8)
+    }) if len(ids) else _empty_interactions()
+
+    watermark = int(ids[-1]) if len(ids) else 0
+    return RecommenderSnapshot(
+        matrix, uniq_users, all_listing_ids, counts, user_counts, interactions, listings, watermark, version
+    )
+
+
+class RecommenderState:
+    """Builds and incrementally refreshes RecommenderSnapshot objects for this process."""
+
+    def __init__(self, refresh_seconds=REFRESH_SECONDS, full_rebuild_seconds=FULL_REBUILD_SECONDS,
+                 use_store=True):
+        self.refresh_seconds = refresh_seconds
+        self.full_rebuild_seconds = full_rebuild_seconds
+        # Follow the published feature store when it is fresh (see feature_store.py)
+        self.use_store = use_store
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._last_full_build = 0.0
+        # listings_watermark() of the listings frame last loaded by this state
+        self._listings_mark = None
+
+    # --- loading ---
+    def _load_interactions(self, after_id=0):
+        """(ids, user_ids, listing_ids, weights) for interactions with id > after_id."""
+        # Columnar read; interaction codes (= weights) are computed by the database
+        df = read_sql_frame(interactions_query(after_id, with_id=True), dtype=INTERACTION_DTYPES)
+        return (df["id"].to_numpy(dtype=np.int64), df["user_id"].to_numpy(dtype=np.int64),
+                df["listing_id"].to_numpy(dtype=np.int64), df["interaction_type"].to_numpy(dtype=np.float32))
+
+    def _load_listings(self):
+        self._listings_mark = listings_watermark()
+        return load_listing_data()
+
+    def _current_listings(self, snap):
+        """The snapshot's listings frame, reloaded only when listings were added, edited or deleted."""
+        if self._listings_mark is not None and listings_watermark() == self._listings_mark:
+            return snap.listings
+        return self._load_listings()
+
+    # --- building ---
+    def _full_build(self, version):
+        ids, user_ids, listing_ids, weights = self._load_interactions()
+        return build_snapshot(ids, user_ids, listing_ids, weights, self._load_listings(), version)
+
+    def _incremental(self, snap, version):
+        ids, user_ids, listing_ids, weights = self._load_interactions(after_id=snap.watermark)
+        listings = self._current_listings(snap)
+        new_listing_cols = np.setdiff1d(
+            np.union1d(listings["id"].to_numpy(dtype=np.int64), listing_ids), snap.listing_ids
+        )
+        if not len(ids) and not len(new_listing_cols):
+            # Nothing new: keep the matrix, just pick up edited listing features
+            return RecommenderSnapshot(
+                snap.matrix, snap.user_ids, snap.listing_ids, snap.listing_counts, snap.user_counts,
+                snap.interactions, listings, snap.watermark, snap.version,
+                user_index=snap.user_index, listing_index=snap.listing_index
+            )
+
+        # Append-only id maps: existing indices never move
+        new_users = np.setdiff1d(np.unique(user_ids), snap.user_ids)
+        all_user_ids = np.concatenate([snap.user_ids, new_users])
+        all_listing_ids = np.concatenate([snap.listing_ids, new_listing_cols])
+        user_index = dict(snap.user_index)
+        user_index.update({int(uid): len(snap.user_ids) + i for i, uid in enumerate(new_users)})
+        listing_index = dict(snap.listing_index)
+        listing_index.update({int(lid): len(snap.listing_ids) + i for i, lid in enumerate(new_listing_cols)})
+
+        shape = (len(all_user_ids), len(all_listing_ids))
+        rows = np.fromiter((user_index[int(u)] for u in user_ids), dtype=np.int64, count=len(user_ids))
+        cols = np.fromiter((listing_index[int(l)] for l in listing_ids), dtype=np.int64, count=len(listing_ids))
+        delta = csr_matrix((weights, (rows, cols)), shape=shape, dtype=np.float32)
+
+        matrix = snap.matrix.copy()
+        matrix.resize(shape)
+        matrix = (matrix + delta).tocsr()
+
+        counts = np.zeros(shape[1], dtype=np.int64)
+        counts[:len(snap.listing_counts)] = snap.listing_counts
+        counts += np.bincount(cols, minlength=shape[1])
+        user_counts = np.zeros(shape[0], dtype=np.int64)
+        user_counts[:len(snap.user_counts)] = snap.user_counts
+        user_counts += np.bincount(rows, minlength=shape[0])
+
+        interactions = snap.interactions
+        if len(ids):
+            interactions = pd.concat([interactions, pd.DataFrame({
+                "user_id": user_ids.astype(np.int32),
+                "listing_id": listing_ids.astype(np.int32),
+                "interaction_type": weights.astype(np.int8)
+            })], ignore_index=True)
+
+        watermark = int(ids[-1]) if len(ids) else snap.watermark
+        return RecommenderSnapshot(
+            matrix, all_user_ids, all_listing_ids, counts, user_counts, interactions, listings, watermark, version,
+            user_index=user_index, listing_index=listing_index
+        )
+
+    def build_next(self, base, version, full=False):
+        """Snapshot following `base`: incremental, or a full build when `base` is None or `full`."""
+        if base is None or full:
+            return self._full_build(version)
+        return self._incremental(base, version)
+
+    def _stored_snapshot(self, snap):
+        """The live feature store snapshot (reusing `snap` when it is that version), or None."""
+        name = feature_store.current_version()
+        if name is None:
+            return None
+        if not feature_store.is_fresh(name):
+            if snap is None or snap.store_version is not None:
+                print(f"Feature store version {name} is stale, building recommender state from the database")
+            return None
+        if snap is not None and snap.store_version == name:
+            return snap
+        return feature_store.load_snapshot(name=name)
+
+    # --- public API ---
+    def refresh(self, force_full=False, full_if_due=True):
+        """
+        Bring the snapshot up to date: swap to the live feature store version when
+        there is a fresh one, otherwise build incrementally (or fully when forced,
+        or when due and `full_if_due` is set).
+
+        Request threads (current()) pass full_if_due=False, so the periodic full
+        rebuild only runs from the scheduler (rebuild_recommender_state_job in app.py).
+        """
+        with self._lock:
+            now = time.time()
+            snap = self._snapshot
+            version = (snap.version + 1) if snap else 1
+            stored = None
+            if self.use_store:
+                try:
+                    stored = self._stored_snapshot(snap)
+                except Exception as e:
+                    print(f"Feature store load error: {e}")
+            full_due = full_if_due and now - self._last_full_build > self.full_rebuild_seconds
+            if stored is not None:
+                if stored is not snap:
+                    # The stored frame is not the one the listings watermark describes
+                    self._listings_mark = None
+                self._snapshot = stored
+            elif snap is None or force_full or full_due:
+                self._snapshot = self._full_build(version)
+                self._last_full_build = now
+            else:
+                self._snapshot = self._incremental(snap, version)
+            self._last_refresh = now
+            return self._snapshot
+
+    def current(self):
+        """
+        Latest snapshot, refreshed incrementally first when older than refresh_seconds.
+        Only the very first build of a worker runs a full load inside the caller.
+        """
+        snap = self._snapshot
+        if snap is None or time.time() - self._last_refresh > self.refresh_seconds:
+            if self._lock.locked() and snap is not None:
+                # Another thread is refreshing: serve the previous snapshot
+                return snap
+            try:
+                snap = self.refresh(full_if_due=False)
+            except Exception as e:
+                print(f"Recommender state refresh error: {e}")
+                if snap is None:
+                    raise
+        return snap
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_recommender_state():
+    """The RecommenderState singleton of this worker process."""
+    global _state
+    if _state is None:
+        with _state_lock:
+            if _state is None:
+                _state = RecommenderState()
+    return _state
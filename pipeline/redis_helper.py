@@ -10,6 +10,7 @@ from sentence_transformers import SentenceTransformer
 from datetime import datetime
 from modules.enhanced_memory_manager import MemoryEntry
 from redis_config import get_redis_config, is_redis_cloud_configured
+from json_provider import dumps as json_dumps, loads as json_loads
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -98,19 +99,18 @@ def cache_response(expiry=300, key_prefix=None):
                 cached_data = redis_client.get(cache_key)
                 if cached_data:
                     logger.info(f"Cache HIT for key: {cache_key}")
-                    # Always return as Flask Response
-                    return jsonify(json.loads(cached_data))
+                    # Cached value is already encoded JSON: send it as-is without re-parsing
+                    return Response(cached_data, mimetype='application/json')
 
                 logger.info(f"Cache MISS for key: {cache_key}")
                 result = f(*args, **kwargs)
 
                 # If result is a Flask Response, try to extract JSON data
                 if isinstance(result, Response):
-                    # Try to get JSON data from response
+                    # Cache the already-encoded JSON body of successful responses
                     try:
-                        data = result.get_json()
-                        if data is not None:
-                            redis_client.setex(cache_key, expiry, json.dumps(data))
+                        if result.is_json and result.status_code == 200:
+                            redis_client.setex(cache_key, expiry, result.get_data(as_text=True))
                             logger.info(f"Cached result for key: {cache_key} (expires in {expiry}s)")
                         return result
                     except Exception as e:
@@ -118,7 +118,7 @@ def cache_response(expiry=300, key_prefix=None):
                         return result  # Don't cache non-JSON responses
                 # If result is JSON-serializable, cache and return as Response
                 try:
-                    redis_client.setex(cache_key, expiry, json.dumps(result))
+                    redis_client.setex(cache_key, expiry, json_dumps(result))
                     logger.info(f"Cached result for key: {cache_key} (expires in {expiry}s)")
                     return jsonify(result)
                 except Exception as e:
@@ -132,10 +132,9 @@ def cache_response(expiry=300, key_prefix=None):
 
 def store_semantic_cache(user_id, question, embedding, answer, expiry=3600):
     """Store a question embedding and answer in Redis semantic cache."""
-    import json
     question_hash = hashlib.md5(question.lower().strip().encode()).hexdigest()
     key = f"semantic_cache:{user_id}:{question_hash}"
-    value = json.dumps({
+    value = json_dumps({
         "embedding": embedding,  # Should be a list of floats
         "answer": answer,
         "question": question
@@ -144,7 +143,6 @@ def store_semantic_cache(user_id, question, embedding, answer, expiry=3600):
 
 def get_all_semantic_cache(user_id):
     """Retrieve all semantic cache entries for a user."""
-    import json
     pattern = f"semantic_cache:{user_id}:*"
     keys = redis_client.keys(pattern)
     results = []
@@ -152,7 +150,7 @@ def get_all_semantic_cache(user_id):
         val = redis_client.get(key)
         if val:
             try:
-                results.append(json.loads(val))
+                results.append(json_loads(val))
             except Exception:
                 continue
     return results
@@ -189,18 +187,25 @@ def invalidate_user_cache(user_id):
         invalidate_cache_pattern(pattern)
 
 def invalidate_listing_cache(listing_id=None):
-    """Invalidate cache related to listings"""
+    """
+    Invalidate cache related to listings.
+
+    For a single listing only its own entries and JSON fragments are dropped: feed and
+    search pages cache ordered id lists and pick up the new fragment on the next read.
+    Without a listing_id (new listings, bulk changes) the cached id lists are dropped too.
+    """
     if listing_id:
         patterns = [
             f"*listing:{listing_id}*",
-            f"*featured_properties*",
-            f"*search_properties*"
+            f"listing_fragment:*:{listing_id}:*",
+            f"admin_agent_totals:*"
         ]
     else:
         patterns = [
             f"*featured_properties*",
             f"*search_properties*",
-            f"*listing:*"
+            f"*listing:*",
+            f"admin_agent_totals:*"
         ]
     
     for pattern in patterns:
@@ -238,7 +243,8 @@ def invalidate_all_agent_caches(agent_id):
             f"*agent:{agent_id}*",
             f"*agent_listings:{agent_id}*",
             f"*agent_analytics:{agent_id}*",
-            f"*agent_trends:{agent_id}*"
+            f"*agent_trends:{agent_id}*",
+            f"admin_agent_totals:*"
         ]
         
         total_cleared = 0
@@ -260,7 +266,7 @@ def cache_user_data(user_id, data, expiry=600):
     
     try:
         key = f"user_data:{user_id}"
-        redis_client.setex(key, expiry, json.dumps(data))
+        redis_client.setex(key, expiry, json_dumps(data))
         logger.info(f"Cached user data for user {user_id}")
     except Exception as e:
         logger.error(f"Error caching user data: {e}")
@@ -273,7 +279,7 @@ def get_cached_user_data(user_id):
     try:
         key = f"user_data:{user_id}"
         data = redis_client.get(key)
-        return json.loads(data) if data else None
+        return json_loads(data) if data else None
     except Exception as e:
         logger.error(f"Error getting cached user data: {e}")
         return None
@@ -287,7 +293,7 @@ def cache_ai_response(question, response, user_id=None, expiry=3600):
         # Create a hash of the question for consistent caching
         question_hash = hashlib.md5(question.lower().strip().encode()).hexdigest()
         key = f"ai_response:{user_id or 'anonymous'}:{question_hash}"
-        redis_client.setex(key, expiry, json.dumps(response))
+        redis_client.setex(key, expiry, json_dumps(response))
         logger.info(f"Cached AI response for question hash: {question_hash}")
     except Exception as e:
         logger.error(f"Error caching AI response: {e}")
@@ -301,7 +307,7 @@ def get_cached_ai_response(question, user_id=None):
         question_hash = hashlib.md5(question.lower().strip().encode()).hexdigest()
         key = f"ai_response:{user_id or 'anonymous'}:{question_hash}"
         response = redis_client.get(key)
-        return json.loads(response) if response else None
+        return json_loads(response) if response else None
     except Exception as e:
         logger.error(f"Error getting cached AI response: {e}")
         return None
@@ -0,0 +1,232 @@
+"""
+Reels feed served from a prebuilt index instead of per-request filter queries.
+
+    reels_index               hash listing_id -> {"reels": [...], "attrs": {...}}
+    reels_index:meta          hash with built_at (readers reload when it changes)
+    reels_candidates:global   JSON list of listing ids ranked for the global feed
+
+A timer job rebuilds the index from one query over listings that have reels
+(units and reels batch-loaded) and ranks the global candidates against the
+global preference profile. Reel uploads and deletes update their listing's
+entry in place. Each worker keeps the index in memory and ranks reels against
+a user's preference profile (user_profiles.py) without touching the database.
+"""
+import os
+import threading
+import time
+
+from json_provider import dumps as json_dumps, loads as json_loads
+from listing_serializer import eager_listing_options, serialize_listing_reels
+from redis_helper import redis_client, is_redis_available
+from user_profiles import parse_profile_tags
+
+REELS_INDEX_KEY = "reels_index"
+REELS_INDEX_META_KEY = f"{REELS_INDEX_KEY}:meta"
+GLOBAL_CANDIDATES_KEY = "reels_candidates:global"
+REELS_FEED_LISTINGS = int(os.getenv("REELS_FEED_LISTINGS", 20))
+# How often a worker checks reels_index:meta for a newer build
+RELOAD_SECONDS = int(os.getenv("REELS_INDEX_RELOAD_SECONDS", 30))
+
+# Relative weight of each profile kind when scoring a listing
+KIND_WEIGHTS = {
+    "tag": 1.0,
+    "city": 2.0,
+    "state": 1.0,
+    "area": 2.0,
+    "bedrooms": 1.0
+}
+# Profile values considered per kind (as many as the old filter queries used)
+PROFILE_TOP = {
+    "tag": 5,
+    "city": 2,
+    "state": 2,
+    "area": 2,
+    "bedrooms": 2
+}
+
+
+def _lower(value):
+    return value.strip().lower() if value and value.strip() else None
+
+
+def _entry(listing):
+    return {
+        "reels": serialize_listing_reels(listing),
+        "attrs": {
+            "tag": parse_profile_tags(listing.tags),
+            "city": _lower(listing.city),
+            "state": _lower(listing.state),
+            "area": _lower(listing.area),
+            "bedrooms": str(int(listing.bedrooms)) if listing.bedrooms is not None else None
+        }
+    }
+
+
+def _load_entries(listing_ids=None):
+    """Index entries for listings with reels (all, or the given ids)."""
+    from supabase_models import db, Listing, Reel
+
+    query = Listing.query.options(*eager_listing_options(units=True, reels=True)).filter(
+        Listing.id.in_(db.session.query(Reel.listing_id).distinct())
+    )
+    if listing_ids is not None:
+        query = query.filter(Listing.id.in_(listing_ids))
+    return {listing.id: _entry(listing) for listing in query.all()}
+
+
+# --- ranking ------------------------------------------------------------------
+
+def _profile_weights(profile):
+    """kind -> {value: weight normalized to the kind's heaviest value}."""
+    weights = {}
+    for kind, top in PROFILE_TOP.items():
+        values = profile.get(kind, [])[:top]
+        if values:
+            heaviest = values[0][1]
+            weights[kind] = {value: weight / heaviest for value, weight in values}
+    return weights
+
+
+def score_entry(attrs, weights):
+    score = 0.0
+    for kind, kind_weights in weights.items():
+        if kind == "tag":
+            score += KIND_WEIGHTS[kind] * sum(kind_weights.get(tag, 0.0) for tag in attrs.get("tag", []))
+        else:
+            score += KIND_WEIGHTS[kind] * kind_weights.get(attrs.get(kind), 0.0)
+    return score
+
+
+def rank_listings(entries, profile, n=REELS_FEED_LISTINGS):
+    """
+    Listing ids with reels, best match for the profile first (newest first on ties).
+
+    Listings that match nothing in the profile are left out, unless the profile
+    is empty, in which case the newest listings are returned.
+    """
+    weights = _profile_weights(profile)
+    newest_first = sorted(entries, reverse=True)
+    if not weights:
+        return newest_first[:n]
+    scored = [(score_entry(entries[lid]["attrs"], weights), lid) for lid in newest_first]
+    scored = [(score, lid) for score, lid in scored if score > 0]
+    scored.sort(key=lambda item: item[0], reverse=True)  # stable: ties keep newest first
+    return [lid for _, lid in scored[:n]]
+
+
+# --- index maintenance --------------------------------------------------------
+
+def refresh_reels_index():
+    """
+    Rebuild the reels index and the global candidate list. Needs an app context.
+
+    Returns:
+        int: Number of listings indexed (0 when Redis is unavailable).
+    """
+    from user_profiles import get_profile, GLOBAL_PROFILE
+
+    if not is_redis_available():
+        print("Redis not available, skipping reels index refresh")
+        return 0
+    started = time.time()
+    entries = _load_entries()
+    candidates = rank_listings(entries, get_profile(GLOBAL_PROFILE))
+
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.delete(REELS_INDEX_KEY)
+    if entries:
+        pipe.hset(REELS_INDEX_KEY, mapping={str(lid): json_dumps(entry) for lid, entry in entries.items()})
+    pipe.set(GLOBAL_CANDIDATES_KEY, json_dumps(candidates))
+    pipe.hset(REELS_INDEX_META_KEY, mapping={"built_at": time.time(), "listings": len(entries)})
+    pipe.execute()
+    print(f"Reels index refreshed for {len(entries)} listings in {time.time() - started:.1f}s")
+    return len(entries)
+
+
+def refresh_listing_reels(listing_id):
+    """Update one listing's entry after a reel upload/delete (or listing edit)."""
+    if not is_redis_available():
+        return
+    try:
+        entry = _load_entries([listing_id]).get(listing_id)
+        pipe = redis_client.pipeline(transaction=True)
+        if entry:
+            pipe.hset(REELS_INDEX_KEY, str(listing_id), json_dumps(entry))
+        else:
+            pipe.hdel(REELS_INDEX_KEY, str(listing_id))
+        pipe.hset(REELS_INDEX_META_KEY, "built_at", time.time())
+        pipe.execute()
+    except Exception as e:
+        print(f"Reels index update error: {e}")
+
+
+_index = {"entries": None, "built_at": None, "checked": 0.0}
+_index_lock = threading.Lock()
+
+
+def get_reels_index():
+    """listing_id -> entry, cached per worker and reloaded when the index is rebuilt."""
+    now = time.time()
+    if _index["entries"] is not None and now - _index["checked"] < RELOAD_SECONDS:
+        return _index["entries"]
+    with _index_lock:
+        if _index["entries"] is not None and now - _index["checked"] < RELOAD_SECONDS:
+            return _index["entries"]
+        _index["checked"] = now
+        try:
+            if is_redis_available():
+                built_at = redis_client.hget(REELS_INDEX_META_KEY, "built_at")
+                if built_at is None:
+                    refresh_reels_index()
+                    built_at = redis_client.hget(REELS_INDEX_META_KEY, "built_at")
+                if built_at != _index["built_at"] or _index["entries"] is None:
+                    raw = redis_client.hgetall(REELS_INDEX_KEY)
+                    _index["entries"] = {int(lid): json_loads(value) for lid, value in raw.items()}
+                    _index["built_at"] = built_at
+            else:
+                _index["entries"] = _load_entries()
+        except Exception as e:
+            print(f"Reels index load error: {e}")
+            if _index["entries"] is None:
+                _index["entries"] = _load_entries()
+    return _index["entries"]
+
+
+# --- feeds --------------------------------------------------------------------
+
+def _flatten(entries, listing_ids):
+    reels = []
+    for lid in listing_ids:
+        entry = entries.get(lid)
+        if entry:
+            reels.extend(entry["reels"])
+    return reels
+
+
+def personalized_reels_for(profile, n=REELS_FEED_LISTINGS):
+    """Reels of the listings that best match a preference profile."""
+    entries = get_reels_index()
+    return _flatten(entries, rank_listings(entries, profile, n))
+
+
+def global_reels(n=REELS_FEED_LISTINGS):
+    """Reels of the precomputed global candidates (ranked by the global profile)."""
+    entries = get_reels_index()
+    candidates = None
+    if is_redis_available():
+        try:
+            raw = redis_client.get(GLOBAL_CANDIDATES_KEY)
+            candidates = json_loads(raw) if raw else None
+        except Exception as e:
+            print(f"Reels candidates read error: {e}")
+    if candidates is None:
+        from user_profiles import get_profile, GLOBAL_PROFILE
+        candidates = rank_listings(entries, get_profile(GLOBAL_PROFILE), n)
+    return _flatten(entries, candidates[:n])
+
+
+if __name__ == "__main__":
+    from app import app
+
+    with app.app_context():
+        refresh_reels_index()
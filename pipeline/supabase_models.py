@@ -75,13 +75,33 @@ class Listing(db.Model):
     promoted_until = db.Column(db.DateTime, nullable=True)
     paused_at = db.Column(db.DateTime, nullable=True)
     remaining_days = db.Column(db.Float, nullable=True)
-    
+
+    # Unit range summaries for complex listings (kept in sync whenever units are written)
+    unit_price_min = db.Column(db.Float, nullable=True)
+    unit_price_max = db.Column(db.Float, nullable=True)
+    unit_bedrooms_min = db.Column(db.Integer, nullable=True)
+    unit_bedrooms_max = db.Column(db.Integer, nullable=True)
+    unit_bathrooms_min = db.Column(db.Float, nullable=True)
+    unit_bathrooms_max = db.Column(db.Float, nullable=True)
+
     # Relationships
     agent = db.relationship('Agent', back_populates='listings')
     interactions = db.relationship('Interaction', back_populates='listing', cascade="all, delete-orphan")
     units = db.relationship('Unit', backref='listing', cascade="all, delete-orphan")
     reels = db.relationship('Reel', backref='listing', lazy=True)
 
+    def refresh_unit_summary(self, units):
+        """Recompute the stored price/bedroom/bathroom ranges from the given units."""
+        if self.listing_type != 'complex':
+            units = []
+        prices = [u.price_min for u in units if u.price_min and u.price_min > 0]
+        prices += [u.price_max for u in units if u.price_max and u.price_max > 0]
+        beds = [u.bedrooms for u in units if u.bedrooms and u.bedrooms > 0]
+        baths = [u.bathrooms for u in units if u.bathrooms and u.bathrooms > 0]
+        self.unit_price_min, self.unit_price_max = (min(prices), max(prices)) if prices else (None, None)
+        self.unit_bedrooms_min, self.unit_bedrooms_max = (min(beds), max(beds)) if beds else (None, None)
+        self.unit_bathrooms_min, self.unit_bathrooms_max = (min(baths), max(baths)) if baths else (None, None)
+
 class Interaction(db.Model):
     __tablename__ = 'interactions'
     id = db.Column(db.Integer, primary_key=True)
@@ -98,10 +118,18 @@ class Interaction(db.Model):
     user = db.relationship('User', back_populates='interactions')
     listing = db.relationship('Listing', back_populates='interactions')
 
+class ListingStats(db.Model):
+    """Pre-aggregated per-listing interaction counters, kept current by a trigger on interactions."""
+    __tablename__ = 'listing_stats'
+    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id', ondelete='CASCADE'), primary_key=True)
+    view_count = db.Column(db.Integer, nullable=False, default=0)
+    save_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class Reel(db.Model):
     __tablename__ = 'reels'
     id = db.Column(db.Integer, primary_key=True)
-    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id'), nullable=False)
+    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id'), nullable=False, index=True)
     video_path = db.Column(db.String(255), nullable=False)  # Supabase storage URL
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -113,6 +141,9 @@ class CommunityPost(db.Model):
     content = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     category = db.Column(db.String(255), nullable=True)
+    # Denormalized counters, updated atomically alongside likes/comments
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     comments = db.relationship('CommunityComment', backref='post', cascade="all, delete-orphan")
     likes = db.relationship('CommunityLike', backref='post', cascade="all, delete-orphan")
 
@@ -125,6 +156,7 @@ class CommunityComment(db.Model):
     content = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     parent_comment_id = db.Column(db.Integer, db.ForeignKey('community_comments.id'), nullable=True)
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     replies = db.relationship('CommunityComment', backref=db.backref('parent', remote_side=[id]), cascade="all, delete-orphan")
     likes = db.relationship('CommunityCommentLike', backref='comment', cascade="all, delete-orphan")
 
@@ -169,7 +201,7 @@ class PropertyApplication(db.Model):
     lease_duration = db.Column(db.Integer, nullable=False)
     additional_notes = db.Column(db.Text)
     status = db.Column(db.String(50), default='pending')
-    created_at = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.String(50))
     
     listing = db.relationship('Listing', backref='applications')
@@ -0,0 +1,205 @@
+"""
+Trending listings with exponential time decay, kept in Redis sorted sets.
+
+    trending:global             {listing_id: score}
+    trending:state:{state}      per state (lower-cased)
+    trending:city:{city}        per city (lower-cased)
+    trending:meta               hash with the decay epoch
+
+Each interaction adds weight * 2^((now - epoch) / half_life) to the listing's
+score, so an interaction's contribution relative to newer ones halves every
+TRENDING_HALF_LIFE_HOURS without ever rewriting old scores. Reads are a ZREVRANGE
+(O(log n + k)). rescale_trending() periodically moves the epoch forward and
+scales every set down so the increments stay far from float overflow; it also
+trims each set to its top TRENDING_MAX_PER_KEY members. Every worker checks
+hourly and the first to find the epoch older than TRENDING_RESCALE_HOURS does it.
+
+Usage:
+    record_interaction(listing_id, "view", state="Lagos", city="Ikeja")
+    ids = get_trending_ids(10, city="Ikeja")
+"""
+import math
+import os
+import time
+
+from redis_helper import redis_client, is_redis_available
+
+TRENDING_PREFIX = "trending"
+TRENDING_GLOBAL_KEY = f"{TRENDING_PREFIX}:global"
+TRENDING_META_KEY = f"{TRENDING_PREFIX}:meta"
+TRENDING_RESCALE_LOCK_KEY = f"{TRENDING_PREFIX}:rescale_lock"
+TRENDING_RESCALE_HOURS = float(os.getenv("TRENDING_RESCALE_HOURS", 24))
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 72))
+TRENDING_MAX_PER_KEY = int(os.getenv("TRENDING_MAX_PER_KEY", 5000))
+# Same weights as the recommender matrix; other interaction types do not trend
+TRENDING_WEIGHTS = {
+    "view": 1.0,
+    "saved": 2.0
+}
+
+_HALF_LIFE_SECONDS = TRENDING_HALF_LIFE_HOURS * 60 * 60
+
+
+def _location(value):
+    return value.strip().lower() if value and value.strip() else None
+
+
+def trending_key(state=None, city=None):
+    """Sorted set for a city, else a state, else the global ranking."""
+    if _location(city):
+        return f"{TRENDING_PREFIX}:city:{_location(city)}"
+    if _location(state):
+        return f"{TRENDING_PREFIX}:state:{_location(state)}"
+    return TRENDING_GLOBAL_KEY
+
+
+def _epoch():
+    """Start of the current decay epoch (created on first use)."""
+    epoch = redis_client.hget(TRENDING_META_KEY, "epoch")
+    if epoch is None:
+        epoch = int(time.time())
+        redis_client.hsetnx(TRENDING_META_KEY, "epoch", epoch)
+        epoch = redis_client.hget(TRENDING_META_KEY, "epoch")
+    return float(epoch)
+
+
+def _increment(weight, at, epoch):
+    return weight * math.pow(2.0, (at - epoch) / _HALF_LIFE_SECONDS)
+
+
+def record_interaction(listing_id, interaction_type, state=None, city=None, at=None):
+    """
+    Add one interaction to the global, state and city rankings.
+
+    Args:
+        listing_id (int): The listing interacted with.
+        interaction_type (str): "view" or "saved" (others are ignored).
+        state / city (str): The listing's location, when known.
+        at (float): Unix time of the interaction (default now).
+    """
+    weight = TRENDING_WEIGHTS.get(interaction_type)
+    if weight is None or not is_redis_available():
+        return
+    try:
+        amount = _increment(weight, at or time.time(), _epoch())
+        member = str(listing_id)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.zincrby(TRENDING_GLOBAL_KEY, amount, member)
+        if _location(state):
+            pipe.zincrby(trending_key(state=state), amount, member)
+        if _location(city):
+            pipe.zincrby(trending_key(city=city), amount, member)
+        pipe.execute()
+    except Exception as e:
+        print(f"Trending update error: {e}")
+
+
+def get_trending_ids(n=10, state=None, city=None, offset=0):
+    """
+    Top trending listing ids (city ranking when city is given, else state, else global).
+
+    Returns:
+        list: Listing ids, hottest first; empty when Redis is unavailable.
+    """
+    if not is_redis_available():
+        return []
+    try:
+        ids = redis_client.zrevrange(trending_key(state, city), offset, offset + n - 1)
+        return [int(i) for i in ids]
+    except Exception as e:
+        print(f"Trending read error: {e}")
+        return []
+
+
+def rescale_trending(min_age_hours=0):
+    """
+    Move the decay epoch to now, scaling all scores down to match, and trim each set.
+
+    Args:
+        min_age_hours (float): Skip unless the current epoch is at least this old.
+
+    Returns:
+        int: Number of sorted sets rescaled (0 when skipped).
+    """
+    if not is_redis_available():
+        return 0
+    # Scaling twice from the same epoch would halve the scores again, so one worker at a time
+    if not redis_client.set(TRENDING_RESCALE_LOCK_KEY, 1, nx=True, ex=300):
+        return 0
+    try:
+        return _rescale(min_age_hours)
+    finally:
+        redis_client.delete(TRENDING_RESCALE_LOCK_KEY)
+
+
+def _rescale(min_age_hours):
+    now = int(time.time())
+    epoch = _epoch()
+    if now - epoch < min_age_hours * 60 * 60:
+        return 0
+    factor = math.pow(2.0, -(now - epoch) / _HALF_LIFE_SECONDS)
+    keys = [TRENDING_GLOBAL_KEY]
+    keys += list(redis_client.scan_iter(match=f"{TRENDING_PREFIX}:state:*"))
+    keys += list(redis_client.scan_iter(match=f"{TRENDING_PREFIX}:city:*"))
+
+    pipe = redis_client.pipeline(transaction=True)
+    for key in keys:
+        pipe.zunionstore(key, {key: factor})
+        pipe.zremrangebyrank(key, 0, -(TRENDING_MAX_PER_KEY + 1))
+    pipe.hset(TRENDING_META_KEY, "epoch", now)
+    pipe.execute()
+    return len(keys)
+
+
+def rebuild_trending(days=30):
+    """
+    Recreate the rankings from the interactions of the last `days` days
+    (e.g. after a Redis flush). Needs an app context.
+
+    Returns:
+        int: Number of interactions replayed.
+    """
+    from datetime import datetime, timedelta, timezone
+
+    from supabase_models import db, Interaction
+
+    if not is_redis_available():
+        return 0
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = db.session.query(
+        Interaction.listing_id, Interaction.interaction_type, Interaction.state,
+        Interaction.city, Interaction.created_at
+    ).filter(
+        Interaction.created_at >= since,
+        Interaction.interaction_type.in_(list(TRENDING_WEIGHTS))
+    ).all()
+
+    keys = [TRENDING_GLOBAL_KEY]
+    keys += list(redis_client.scan_iter(match=f"{TRENDING_PREFIX}:state:*"))
+    keys += list(redis_client.scan_iter(match=f"{TRENDING_PREFIX}:city:*"))
+    if keys:
+        redis_client.delete(*keys)
+    epoch = int(time.time())
+    redis_client.hset(TRENDING_META_KEY, "epoch", epoch)
+
+    # Aggregate client-side so each key is written with one ZADD
+    scores = {}
+    for listing_id, interaction_type, state, city, created_at in rows:
+        at = created_at.replace(tzinfo=timezone.utc).timestamp()
+        amount = _increment(TRENDING_WEIGHTS[interaction_type], at, epoch)
+        for key in {TRENDING_GLOBAL_KEY, trending_key(state=state), trending_key(city=city)}:
+            scores.setdefault(key, {})
+            scores[key][str(listing_id)] = scores[key].get(str(listing_id), 0.0) + amount
+
+    pipe = redis_client.pipeline(transaction=False)
+    for key, members in scores.items():
+        pipe.zadd(key, members)
+    pipe.execute()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    from app import app
+
+    with app.app_context():
+        print(f"Replayed {rebuild_trending()} interactions into the trending sets")
@@ -0,0 +1,207 @@
+"""
+Compact per-user preference profiles in Redis.
+
+    user_profile:{user_id}   hash of weighted counters:
+        tag:{tag}  city:{city}  state:{state}  area:{area}  bedrooms:{n}
+        _epoch     start of the profile's decay epoch
+
+Every interaction adds weight * 2^((now - epoch) / half_life) to the fields of
+the listing it touched (HINCRBYFLOAT, one pipeline), so recent interests outweigh
+old ones without rewriting the hash. When the growth factor gets large the hash
+is rescaled once and the epoch moves forward. Unsaves subtract the save weight,
+grown to the time of the save they undo (pass the saved row's created_at as at).
+
+A second profile, user_profile:global, aggregates every user's interactions for
+the non-personal reels feed.
+
+Profiles that are missing (new deployment, Redis flush, expired) are rebuilt
+from the user's latest interactions on first read.
+"""
+import math
+import os
+import time
+from datetime import timezone
+
+from redis_helper import redis_client, is_redis_available
+
+PROFILE_PREFIX = "user_profile"
+GLOBAL_PROFILE = "global"
+PROFILE_HALF_LIFE_DAYS = float(os.getenv("USER_PROFILE_HALF_LIFE_DAYS", 30))
+PROFILE_TTL = int(os.getenv("USER_PROFILE_TTL", 90 * 24 * 60 * 60))
+# Interactions replayed when a missing profile is rebuilt
+BACKFILL_LIMIT = int(os.getenv("USER_PROFILE_BACKFILL_LIMIT", 100))
+# Rescale once increments have grown by 2^RESCALE_HALF_LIVES
+RESCALE_HALF_LIVES = 20
+PROFILE_WEIGHTS = {
+    "view": 1.0,
+    "saved": 2.0,
+    "unsave": -2.0
+}
+KINDS = ("tag", "city", "state", "area", "bedrooms")
+
+_HALF_LIFE_SECONDS = PROFILE_HALF_LIFE_DAYS * 24 * 60 * 60
+
+
+def profile_key(user_id):
+    return f"{PROFILE_PREFIX}:{user_id}"
+
+
+def parse_profile_tags(tags):
+    """Lower-cased, de-duplicated tags of a comma separated string."""
+    if not tags:
+        return []
+    return list(dict.fromkeys(t.strip().lower() for t in tags.split(',') if t.strip()))
+
+
+def profile_fields(listing):
+    """
+    Profile fields touched by an interaction with `listing`.
+
+    Args:
+        listing: Any object with tags, city, state, area and bedrooms attributes
+            (a Listing, or a row from a column query).
+    """
+    fields = [f"tag:{tag}" for tag in parse_profile_tags(getattr(listing, 'tags', None))]
+    for kind in ("city", "state", "area"):
+        value = getattr(listing, kind, None)
+        if value and value.strip():
+            fields.append(f"{kind}:{value.strip().lower()}")
+    bedrooms = getattr(listing, 'bedrooms', None)
+    if bedrooms is not None:
+        fields.append(f"bedrooms:{int(bedrooms)}")
+    return fields
+
+
+def interaction_time(created_at):
+    """Unix time of a (naive UTC) Interaction.created_at, or now when it is missing."""
+    return created_at.replace(tzinfo=timezone.utc).timestamp() if created_at else time.time()
+
+
+def _growth(at, epoch):
+    return math.pow(2.0, (at - epoch) / _HALF_LIFE_SECONDS)
+
+
+def _rescale(key, epoch, now):
+    """Scale every counter to a new epoch at `now` (rare; keeps increments small)."""
+    factor = _growth(epoch, now)
+    values = redis_client.hgetall(key)
+    scaled = {field: float(value) * factor for field, value in values.items() if field != "_epoch"}
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.delete(key)
+    if scaled:
+        pipe.hset(key, mapping=scaled)
+    pipe.hset(key, "_epoch", now)
+    pipe.expire(key, PROFILE_TTL)
+    pipe.execute()
+    return float(now)
+
+
+def _apply(key, fields, weight, at):
+    epoch = redis_client.hget(key, "_epoch")
+    if epoch is None:
+        epoch = float(at)
+        redis_client.hsetnx(key, "_epoch", epoch)
+    epoch = float(epoch)
+    if (at - epoch) / _HALF_LIFE_SECONDS > RESCALE_HALF_LIVES:
+        epoch = _rescale(key, epoch, at)
+
+    amount = weight * _growth(at, epoch)
+    pipe = redis_client.pipeline(transaction=False)
+    for field in fields:
+        pipe.hincrbyfloat(key, field, amount)
+    pipe.expire(key, PROFILE_TTL)
+    pipe.execute()
+
+
+def update_profile(user_id, interaction_type, listing, at=None):
+    """
+    Fold one interaction into the user's profile and the global profile.
+
+    Args:
+        user_id (int): The user.
+        interaction_type (str): "view", "saved" or "unsave" (others are ignored).
+        listing: The listing interacted with (see profile_fields).
+        at (float): Unix time of the interaction (default now); for "unsave", the
+            time of the save being undone.
+    """
+    weight = PROFILE_WEIGHTS.get(interaction_type)
+    if weight is None or listing is None or not is_redis_available():
+        return
+    fields = profile_fields(listing)
+    if not fields:
+        return
+    at = at or time.time()
+    try:
+        # Only update a profile once it exists; a missing one is backfilled on read
+        for key in (profile_key(user_id), profile_key(GLOBAL_PROFILE)):
+            if redis_client.exists(key):
+                _apply(key, fields, weight, at)
+    except Exception as e:
+        print(f"User profile update error: {e}")
+
+
+def _backfill(user_id):
+    """Rebuild a profile from the latest interactions (of the user, or of everyone for the global one)."""
+    from supabase_models import db, Interaction, Listing
+
+    query = db.session.query(
+        Interaction.interaction_type, Interaction.created_at,
+        Listing.tags, Listing.city, Listing.state, Listing.area, Listing.bedrooms
+    ).join(Listing, Listing.id == Interaction.listing_id).filter(
+        Interaction.interaction_type.in_(["view", "saved"])
+    )
+    if user_id != GLOBAL_PROFILE:
+        query = query.filter(Interaction.user_id == user_id)
+    rows = query.order_by(Interaction.created_at.desc()).limit(BACKFILL_LIMIT).all()
+
+    now = time.time()
+    counters = {}
+    for row in rows:
+        at = interaction_time(row.created_at)
+        amount = PROFILE_WEIGHTS[row.interaction_type] * _growth(at, now)
+        for field in profile_fields(row):
+            counters[field] = counters.get(field, 0.0) + amount
+
+    key = profile_key(user_id)
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.delete(key)
+    if counters:
+        pipe.hset(key, mapping=counters)
+    pipe.hset(key, "_epoch", now)
+    pipe.expire(key, PROFILE_TTL)
+    pipe.execute()
+    return counters
+
+
+def get_profile(user_id):
+    """
+    The user's preference counters grouped by kind, heaviest first.
+
+    Returns:
+        dict: kind -> [(value, weight), ...] for each of KINDS (empty lists when the
+        user has no interactions or Redis is unavailable).
+    """
+    profile = {kind: [] for kind in KINDS}
+    if not user_id or not is_redis_available():
+        return profile
+    try:
+        values = redis_client.hgetall(profile_key(user_id))
+        if not values:
+            values = _backfill(user_id)
+    except Exception as e:
+        print(f"User profile read error: {e}")
+        return profile
+
+    for field, weight in values.items():
+        kind, _, value = field.partition(":")
+        weight = float(weight)
+        if kind in profile and weight > 1e-9:
+            profile[kind].append((value, weight))
+    for kind in KINDS:
+        profile[kind].sort(key=lambda item: item[1], reverse=True)
+    return profile
+
+
+def top_values(profile, kind, n):
+    """The n heaviest values of one kind (e.g. top_values(profile, "city", 2))."""
+    return [value for value, _ in profile.get(kind, [])[:n]]
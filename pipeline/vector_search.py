@@ -20,6 +20,8 @@ from datetime import datetime
 import asyncio
 from typing import List, Generator
 from sqlalchemy import create_engine, text
+import numpy as np
+from listing_embeddings import save_listing_embeddings
 
 
 # Connect to Supabase database
@@ -104,22 +106,15 @@ def database_vectorize(df):
     """
     import pandas as pd
 
-    # 2. Load units table
-    units_df = pd.read_sql_query(text("SELECT * FROM units"), engine)
-
-    # 3. Group units to get min/max of bedrooms, bathrooms, and price
-    unit_stats = units_df.groupby('listing_id').agg({
-        'bedrooms': ['min', 'max'],
-        'bathrooms': ['min', 'max'],
-        'price_min': 'min',
-        'price_max': 'max'
-    }).reset_index()
-
-    # Flatten MultiIndex columns
-    unit_stats.columns = ['listing_id', 'bedrooms_min', 'bedrooms_max', 'bathrooms_min', 'bathrooms_max', 'price_min', 'price_max']
-
-    # 4. Merge stats back into listings
-    merged_df = df.merge(unit_stats, how='left', left_on='id', right_on='listing_id')
+    # 2. Unit ranges are stored on the listing row (listings.unit_*), so no units scan is needed
+    merged_df = df.rename(columns={
+        'unit_bedrooms_min': 'bedrooms_min',
+        'unit_bedrooms_max': 'bedrooms_max',
+        'unit_bathrooms_min': 'bathrooms_min',
+        'unit_bathrooms_max': 'bathrooms_max',
+        'unit_price_min': 'price_min',
+        'unit_price_max': 'price_max'
+    })
 
     # 5. Fill complex listings' values with computed ranges
     def format_range(min_val, max_val):
@@ -157,7 +152,7 @@ def database_vectorize(df):
     merged_df.drop(columns=[
         'bedrooms_min', 'bedrooms_max',
         'bathrooms_min', 'bathrooms_max',
-        'price_min', 'price_max', 'listing_id',
+        'price_min', 'price_max',
         'bedrooms', 'bathrooms', 'price', 'image_paths', 'agent_id'
     ], inplace=True)
 
@@ -172,6 +167,13 @@ def database_vectorize(df):
     merged_df["embedding"] = merged_df["combined"].apply(get_embedding)
     merged_df.drop(columns=["combined"], inplace=True)
 
+    # Keep a local float32 copy + FAISS index for similar-listing recommendations.
+    # Blank text gets an empty embedding, so only full-dimension rows go in the index
+    lengths = merged_df["embedding"].map(len)
+    if (lengths > 0).any():
+        valid = merged_df[lengths == lengths[lengths > 0].mode()[0]]
+        save_listing_embeddings(valid["id"].to_numpy(), np.vstack(valid["embedding"].to_numpy()))
+
     documents = merged_df.to_dict("records")
     collection.delete_many({})
     collection.insert_many(documents)